@@ -0,0 +1,64 @@
+# server/agents/action_planner.py
+import os
+import json
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RULES_PATH = os.path.join(BASE_DIR, "config", "planner_rules.json")
+
+
+def _match(condition: dict, facts: dict) -> bool:
+    """
+    condition 예시: {"emotion_label_in": [...], "emotion_score_gte": 0.6}
+    key = <fact 이름>_<연산자>, 모든 조건을 만족해야 True
+    """
+    for key, expected in condition.items():
+        field, _, op = key.rpartition("_")
+        value = facts.get(field)
+
+        if op == "in":
+            ok = value in expected
+        elif op == "gte":
+            ok = value is not None and float(value) >= expected
+        elif op == "lte":
+            ok = value is not None and float(value) <= expected
+        elif op == "eq":
+            ok = value == expected
+        else:
+            raise ValueError(f"지원하지 않는 planner 조건: {key}")
+
+        if not ok:
+            return False
+    return True
+
+
+class ActionPlanner:
+    """
+    설정 파일(config/planner_rules.json)의 규칙으로 Action(calm / policy / basic)을 결정하는 로컬 플래너.
+    LLM 호출 없이 결정적으로 동작하며, 어떤 규칙에도 걸리지 않을 때만 LLM fallback(옵션)을 사용한다.
+    """
+
+    def __init__(self, rules_path: str = RULES_PATH):
+        with open(rules_path, encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.rules = config.get("rules", [])
+        self.default_actions = config.get("default_actions", ["basic"])
+        self.llm_fallback = config.get("llm_fallback", False)
+
+    def plan(self, intent, emotion_label, emotion_score):
+        """
+        매칭된 규칙의 action 리스트 반환.
+        아무 규칙도 매칭되지 않으면 None (→ 호출한 쪽에서 fallback 결정)
+        """
+        facts = {
+            "intent": intent,
+            "emotion_label": emotion_label,
+            "emotion_score": emotion_score,
+        }
+
+        actions = []
+        for rule in self.rules:
+            if _match(rule.get("when", {}), facts) and rule["action"] not in actions:
+                actions.append(rule["action"])
+
+        return actions or None
@@ -0,0 +1,165 @@
+# server/agents/admission.py
+import os
+import math
+import functools
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+
+from agents.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS, ADMISSION_SHED
+
+# ✅ 요청 단위 admission (/api/analyze-*, /ws/call 발화 1건)
+ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "32"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "64"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "1.0"))   # 대기열에서 기다릴 최대 시간(초)
+
+
+class Overloaded(Exception):
+    """
+    대기열이 가득 찼거나 대기 시간이 길어서 요청을 거절 (main.py에서 429/503 + Retry-After로 응답)
+    (ADMISSION_SHED는 거절하는 쪽에서 기록)
+    """
+
+    def __init__(self, stage: str, reason: str, retry_after: int, status_code: int = 503):
+        super().__init__(f"{stage} 과부하 ({reason}) → {retry_after}초 후 재시도")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+        self.status_code = status_code
+
+
+class Ticket:
+    """
+    확보한 slot 1개 (release는 여러 번 불러도 1번만 반영)
+    """
+
+    def __init__(self, gate):
+        self.gate = gate
+        self.started = time.monotonic()
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.gate._release(time.monotonic() - self.started)
+
+
+class AdmissionGate:
+    """
+    동시 실행 limit개 + 대기열 max_queue개 (asyncio 전용, 이벤트 루프 1개 기준)
+    - 대기열이 가득 차면 바로 거절 (queue_full)
+    - max_wait(또는 호출 시 timeout) 안에 slot을 못 받으면 거절 (wait_timeout)
+    - slot은 먼저 기다린 순서대로 넘겨줌 (FIFO)
+    """
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float, status_code: int = 503):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.status_code = status_code
+        self._active = 0
+        self._waiters = deque()
+        self._hold_seconds = 1.0   # slot 1개를 쥐고 있는 평균 시간 (EWMA, Retry-After 계산용)
+
+    def retry_after(self) -> int:
+        # 지금 대기열이 다 빠질 때까지의 예상 시간 (최소 1초)
+        return max(1, math.ceil(self._hold_seconds * (len(self._waiters) + 1) / self.limit))
+
+    def _shed(self, reason: str):
+        ADMISSION_SHED.labels(self.name, reason).inc()
+        raise Overloaded(self.name, reason, self.retry_after(), self.status_code)
+
+    async def admit(self, timeout: float = None) -> Ticket:
+        """
+        slot 확보 → Ticket (반드시 release). timeout: 남은 요청 deadline 등 (max_wait보다 짧으면 우선)
+        """
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            ADMISSION_ACTIVE.labels(self.name).inc()
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(0.0)
+            return Ticket(self)
+
+        if len(self._waiters) >= self.max_queue:
+            self._shed("queue_full")
+
+        wait = self.max_wait if timeout is None else min(self.max_wait, timeout)
+        if wait <= 0:
+            self._shed("wait_timeout")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(self.name).inc()
+        started = time.monotonic()
+        try:
+            # wait_for는 slot을 넘겨받는 순간 들어온 취소를 삼킬 수 있어서(3.12 미만) asyncio.wait 사용
+            await asyncio.wait((waiter,), timeout=wait)
+            if not waiter.done():
+                waiter.cancel()
+                self._shed("wait_timeout")
+        except asyncio.CancelledError:
+            # slot을 넘겨받은 직후 취소됐으면 다음 대기자에게 반납
+            if waiter.done() and not waiter.cancelled():
+                self._release(0.0, observe=False)
+            else:
+                waiter.cancel()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+            ADMISSION_QUEUE_DEPTH.labels(self.name).dec()
+
+        ADMISSION_WAIT_SECONDS.labels(self.name).observe(time.monotonic() - started)
+        return Ticket(self)
+
+    def _release(self, held_seconds: float, observe: bool = True):
+        if observe:
+            self._hold_seconds = 0.9 * self._hold_seconds + 0.1 * held_seconds
+        # 대기자가 있으면 slot을 그대로 넘김 (active 수는 유지)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+        ADMISSION_ACTIVE.labels(self.name).dec()
+
+    @asynccontextmanager
+    async def slot(self, timeout: float = None):
+        ticket = await self.admit(timeout)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "limit": self.limit,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "avg_hold_seconds": round(self._hold_seconds, 3),
+        }
+
+
+# 분석 요청 전체 (대기열이 넘치면 429: 클라이언트가 보내는 양을 줄여야 함)
+request_gate = AdmissionGate(
+    "request",
+    limit=ADMISSION_MAX_CONCURRENT,
+    max_queue=ADMISSION_MAX_QUEUE,
+    max_wait=ADMISSION_MAX_WAIT,
+    status_code=429,
+)
+
+
+def admitted(endpoint):
+    """
+    API endpoint 데코레이터: request_gate slot을 확보한 뒤 실행 (응답을 반환하면 반납)
+    (streaming 응답은 본문 전송이 끝날 때 반납해야 하므로 endpoint에서 직접 admit)
+    """
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        async with request_gate.slot():
+            return await endpoint(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,94 @@
+# server/agents/audio_pipeline.py
+import asyncio
+
+from agents.admission import Overloaded
+from agents.audio_segmenter import SAMPLE_RATE, VoiceSegmenter, pcm16_to_float, resample
+
+
+class AudioPipeline:
+    """
+    통화 오디오 chunk → VAD segment → STT(프로세스 풀) → KoBERT 감정(배치 엔진)
+
+    - segment가 끝나는 즉시 STT를 시작하므로 여러 segment가 worker 수만큼 동시에 인식됨
+    - 결과는 segment 순서대로 results()로 전달 (세션 감정 smoothing 순서 유지)
+    - STT / 감정 대기열이 넘쳐서 거절된 segment는 error 필드만 담아 전달 (나머지 segment는 계속)
+    """
+
+    def __init__(self, stt_pool, emotion_agent, sample_rate: int = SAMPLE_RATE, include_proba: bool = False):
+        self.stt_pool = stt_pool
+        self.emotion_agent = emotion_agent
+        self.sample_rate = sample_rate
+        self.include_proba = include_proba
+        self.segmenter = VoiceSegmenter()
+        self.count = 0
+        self._queue = asyncio.Queue()   # segment별 분석 Task (None이면 입력 종료)
+        self._tasks = []
+        self._pcm_rest = b""
+
+    # -----------------------------
+    # 입력
+    # -----------------------------
+    def feed_pcm(self, pcm: bytes, channels: int = 1):
+        """
+        16-bit PCM bytes (sample_rate는 생성 시 지정)
+        네트워크 chunk가 sample 중간에서 잘려도 다음 chunk와 이어 붙임
+        """
+        pcm = self._pcm_rest + pcm
+        usable = len(pcm) - len(pcm) % (2 * channels)
+        self._pcm_rest = pcm[usable:]
+        self.feed(resample(pcm16_to_float(pcm[:usable], channels), self.sample_rate))
+
+    def feed(self, samples):
+        """
+        16kHz mono float32 samples
+        """
+        for segment in self.segmenter.feed(samples):
+            self._submit(segment)
+
+    def close(self):
+        for segment in self.segmenter.flush():
+            self._submit(segment)
+        self._queue.put_nowait(None)
+
+    def _submit(self, segment):
+        task = asyncio.ensure_future(self._analyze(self.count, segment))
+        self.count += 1
+        self._tasks.append(task)
+        self._queue.put_nowait(task)
+
+    # -----------------------------
+    # 분석
+    # -----------------------------
+    async def _analyze(self, index: int, segment: dict):
+        result = {
+            "index": index,
+            "start": round(segment["start"], 3),
+            "end": round(segment["end"], 3),
+            "text": "",
+        }
+        try:
+            result["text"] = await self.stt_pool.atranscribe(segment["samples"])
+            if not result["text"]:
+                # 숨소리 / 잡음처럼 인식된 문장이 없으면 감정 분석 생략
+                return result
+            emotion = await self.emotion_agent.aanalyze(result["text"], with_proba=self.include_proba)
+        except Overloaded as e:
+            result["error"] = {"stage": e.stage, "message": str(e), "retry_after": e.retry_after}
+            return result
+        result.update(emotion)
+        return result
+
+    async def results(self):
+        """
+        segment 분석 결과를 순서대로 생성 (close() 이후 남은 segment까지 끝나면 종료)
+        """
+        while True:
+            task = await self._queue.get()
+            if task is None:
+                return
+            yield await task
+
+    def cancel(self):
+        for task in self._tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,165 @@
+# server/agents/audio_segmenter.py
+import os
+import wave
+from collections import deque
+
+import numpy as np
+
+# 🔹 STT 입력 샘플레이트 (whisper 계열 기준)
+SAMPLE_RATE = 16000
+
+# 🔹 에너지 기반 VAD 설정 (환경변수로 조정 가능)
+VAD_FRAME_MS = int(os.getenv("VAD_FRAME_MS", "30"))
+VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "0.01"))  # frame RMS (-40dBFS)
+VAD_SILENCE_MS = int(os.getenv("VAD_SILENCE_MS", "500"))          # 이만큼 조용하면 발화 종료
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "250"))    # 더 짧은 소리는 잡음으로 버림
+VAD_MAX_SEGMENT_MS = int(os.getenv("VAD_MAX_SEGMENT_MS", "15000"))  # 길게 말하면 강제로 끊어서 STT
+VAD_PADDING_MS = int(os.getenv("VAD_PADDING_MS", "150"))          # 발화 시작 전 여유 구간
+
+# 🔹 WAV 파일을 읽을 때 chunk 1개의 길이
+AUDIO_CHUNK_MS = int(os.getenv("AUDIO_CHUNK_MS", "200"))
+
+
+def pcm16_to_float(pcm: bytes, channels: int = 1) -> np.ndarray:
+    """
+    16-bit little-endian PCM → [-1, 1] float32 mono
+    """
+    samples = np.frombuffer(pcm, dtype="<i2").astype("float32") / 32768.0
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def resample(samples: np.ndarray, from_rate: int, to_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    선형 보간 resampling (전화망 8kHz → 16kHz 정도 용도)
+    """
+    if from_rate == to_rate or len(samples) == 0:
+        return samples
+    length = int(round(len(samples) * to_rate / from_rate))
+    positions = np.arange(length, dtype="float64") * from_rate / to_rate
+    return np.interp(positions, np.arange(len(samples)), samples).astype("float32")
+
+
+def read_wav(source, chunk_ms: int = AUDIO_CHUNK_MS):
+    """
+    WAV 파일(경로 또는 file object)을 chunk_ms씩 읽어서 16kHz mono float32로 변환 (generator)
+    16-bit PCM만 지원 → 아니면 ValueError
+    """
+    with wave.open(source, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"16-bit PCM WAV만 지원: sample width {wav.getsampwidth() * 8}bit")
+        channels, rate = wav.getnchannels(), wav.getframerate()
+        frames_per_chunk = max(1, rate * chunk_ms // 1000)
+        while True:
+            pcm = wav.readframes(frames_per_chunk)
+            if not pcm:
+                break
+            yield resample(pcm16_to_float(pcm, channels), rate)
+
+
+class VoiceSegmenter:
+    """
+    chunk 단위로 들어오는 16kHz mono 오디오를 발화 구간(segment)으로 자름
+    - frame RMS가 threshold 이상이면 음성
+    - 음성 뒤에 silence_ms 동안 조용하면 segment 종료 (또는 max_segment_ms 도달)
+    - feed()는 이번 chunk로 끝난 segment만 반환, 마지막 구간은 flush()
+    segment: {"start": 초, "end": 초, "samples": float32 ndarray}
+    """
+
+    def __init__(
+        self,
+        sample_rate: int = SAMPLE_RATE,
+        frame_ms: int = VAD_FRAME_MS,
+        threshold: float = VAD_ENERGY_THRESHOLD,
+        silence_ms: int = VAD_SILENCE_MS,
+        min_speech_ms: int = VAD_MIN_SPEECH_MS,
+        max_segment_ms: int = VAD_MAX_SEGMENT_MS,
+        padding_ms: int = VAD_PADDING_MS,
+    ):
+        self.sample_rate = sample_rate
+        self.frame = sample_rate * frame_ms // 1000
+        self.threshold = threshold
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = max(1, max_segment_ms // frame_ms)
+
+        self._rest = np.zeros(0, dtype="float32")   # frame 크기가 안 된 나머지 샘플
+        self._offset = 0                            # 지금까지 처리한 frame의 샘플 위치
+        self._padding = deque(maxlen=max(0, padding_ms // frame_ms))
+        self._reset_segment()
+
+    def _reset_segment(self):
+        self._frames = []
+        self._start = None
+        self._voiced = 0
+        self._silence = 0
+
+    def feed(self, samples: np.ndarray) -> list:
+        samples = np.concatenate([self._rest, samples]) if len(self._rest) else samples
+        n_frames = len(samples) // self.frame
+        self._rest = samples[n_frames * self.frame:]
+
+        segments = []
+        for i in range(n_frames):
+            frame = samples[i * self.frame:(i + 1) * self.frame]
+            segment = self._add_frame(frame)
+            if segment is not None:
+                segments.append(segment)
+        return segments
+
+    def flush(self) -> list:
+        """
+        입력 종료: 진행 중인 segment를 마무리해서 반환
+        """
+        rest, self._rest = self._rest, np.zeros(0, dtype="float32")
+        if self._start is None:
+            return []
+        if len(rest):
+            self._frames.append(rest)
+        segment = self._close()
+        return [segment] if segment is not None else []
+
+    def _add_frame(self, frame: np.ndarray):
+        voiced = float(np.sqrt(np.mean(frame * frame))) >= self.threshold
+        position = self._offset
+        self._offset += len(frame)
+
+        if self._start is None:
+            if not voiced:
+                self._padding.append(frame)
+                return None
+            # 발화 시작: 직전 padding 구간부터 포함
+            self._start = position - len(self._padding) * self.frame
+            self._frames = list(self._padding) + [frame]
+            self._padding.clear()
+            self._voiced = 1
+            return None
+
+        self._frames.append(frame)
+        if voiced:
+            self._voiced += 1
+            self._silence = 0
+        else:
+            self._silence += 1
+
+        if self._silence >= self.silence_frames or len(self._frames) >= self.max_frames:
+            return self._close()
+        return None
+
+    def _close(self):
+        # 끝의 무음은 padding 길이만 남기고 제거
+        trailing = max(0, self._silence - self._padding.maxlen)
+        frames = self._frames[: len(self._frames) - trailing] if trailing else self._frames
+        start, voiced = self._start, self._voiced
+        self._reset_segment()
+
+        if voiced < self.min_speech_frames:
+            return None
+        samples = np.concatenate(frames)
+        return {
+            "start": start / self.sample_rate,
+            "end": (start + len(samples)) / self.sample_rate,
+            "samples": samples,
+        }
@@ -1,17 +1,16 @@
-from openai import OpenAI
-import os
+from contextlib import aclosing
+
+from agents import llm_provider, singleflight
+from agents.metrics import span, record_usage
 
 class CalmAgent:
     def __init__(self):
-        api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+        # 공용 커넥션 풀을 쓰는 클라이언트 (다른 에이전트와 공유)
+        self.client = llm_provider.openai_client()
+        self.async_client = llm_provider.async_openai_client()
 
-    def generate(self, emotion_label, emotion_score=None):
-        """
-        상담사만을 위한 감정 안정 가이드 생성
-        (고객에게 전달할 문장은 절대 포함 X)
-        """
-        prompt = f"""
+    def _build_prompt(self, emotion_label):
+        return f"""
 다음 감정에 대해 상담사만을 위한 감정 안정 피드백을 생성하세요.
 
 고객 감정: {emotion_label}
@@ -24,10 +23,59 @@ class CalmAgent:
 - 고객에게 말하는 문장은 절대 쓰지 말 것
 """
 
-        res = self.client.chat.completions.create(
+    def generate(self, emotion_label, emotion_score=None):
+        """
+        상담사만을 위한 감정 안정 가이드 생성
+        (고객에게 전달할 문장은 절대 포함 X)
+        """
+        with span("calm_llm"):
+            res = llm_provider.call("calm", lambda timeout: self.client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": self._build_prompt(emotion_label)}],
+                temperature=0.2,
+                timeout=timeout,
+            ))
+        record_usage("calm", res.usage)
+
+        return res.choices[0].message.content.strip()
+
+    async def agenerate(self, emotion_label, emotion_score=None):
+        """
+        generate의 async 버전
+        """
+        async def call_llm():
+            res = await llm_provider.acall("calm", lambda timeout: self.async_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": self._build_prompt(emotion_label)}],
+                temperature=0.2,
+                timeout=timeout,
+            ))
+            record_usage("calm", res.usage)
+            return res.choices[0].message.content.strip()
+
+        # 프롬프트는 감정 레이블로만 정해지므로 같은 레이블의 동시 요청은 1번만 호출
+        with span("calm_llm"):
+            return await singleflight.flight("calm").do(emotion_label, call_llm)
+
+    async def astream(self, emotion_label, emotion_score=None):
+        """
+        streaming 버전: 피드백을 LLM이 생성하는 대로 토큰 단위로 yield
+        """
+        # provider slot은 stream이 끝날 때까지 유지, chunk마다 남은 deadline 안에서 대기
+        # (연결 / 첫 응답까지만 재시도, 토큰을 보내기 시작한 뒤에는 재시도하지 않음)
+        stream = llm_provider.astream("calm", lambda timeout: self.async_client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": self._build_prompt(emotion_label)}],
             temperature=0.2,
-        )
-
-        return res.choices[0].message.content.strip()
\ No newline at end of file
+            stream=True,
+            stream_options={"include_usage": True},  # 마지막 chunk에 토큰 사용량
+            timeout=timeout,
+        ))
+        # 중간에 끊겨도 slot / HTTP 응답이 바로 정리되도록 aclosing
+        with span("calm_llm"):
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if chunk.usage:
+                        record_usage("calm", chunk.usage)
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
@@ -0,0 +1,33 @@
+# server/agents/degraded.py
+import os
+import json
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEGRADED_TEMPLATES = os.path.join(BASE_DIR, "config", "degraded_templates.json")
+
+
+class DegradedResponder:
+    """
+    LLM stage가 시간 예산 안에 끝나지 않았을 때 대신 쓰는 템플릿 응답 (config/degraded_templates.json)
+
+    - calm(label): 감정별 상담사 안정 팁
+    - reply(intent, policy_context): intent별 대응문 + (검색이 끝났다면) 정책 발췌
+    """
+
+    def __init__(self, templates_path: str = DEGRADED_TEMPLATES):
+        with open(templates_path, encoding="utf-8") as f:
+            templates = json.load(f)
+
+        self.calm_templates = templates["calm"]
+        self.reply_templates = templates["reply"]
+        self.policy_snippet_chars = templates.get("policy_snippet_chars", 200)
+
+    def calm(self, emotion_label: str) -> str:
+        return self.calm_templates.get(emotion_label, self.calm_templates["default"])
+
+    def reply(self, intent: str, policy_context: str = None) -> str:
+        reply = self.reply_templates.get(intent, self.reply_templates["default"])
+        if policy_context:
+            snippet = " ".join(policy_context.split())[: self.policy_snippet_chars]
+            reply += f"\n\n(참고 정책) {snippet}"
+        return reply
@@ -1,9 +1,17 @@
 # server/agents/emotion_agent.py
 import os
-import torch
+import gc
+import json
+import math
+import asyncio
+import hashlib
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 from huggingface_hub import snapshot_download  # HF에서 모델 다운로드
 
+from agents.emotion_batcher import EmotionBatcher, INFER_TIMEOUT
+from agents.emotion_backends import EMOTION_BACKEND, create_backend
+from agents.response_cache import ResponseCache, normalize_text
+
 # 🔹 Hugging Face에 올린 네 모델 리포 이름
 MODEL_REPO = "hozziii/kobert-emotion-final"
 
@@ -11,38 +19,87 @@ MODEL_REPO = "hozziii/kobert-emotion-final"
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_DIR = os.path.join(BASE_DIR, "models", "kobert_emotion_final")
 
-# 🔹 로컬 모델 디렉토리 준비 & 없으면 HF에서 받아오기
-os.makedirs(MODEL_DIR, exist_ok=True)
-local_model_file = os.path.join(MODEL_DIR, "model.safetensors")
+# 🔹 hot reload warmup: 새 모델로 교체하기 전에 돌려 보는 문장
+WARMUP_TEXTS = ["주문한 상품이 아직 안 왔어요", "환불은 언제 되나요?", "몇 번을 말해야 알아들어요"]
+
+
+def model_fingerprint(model_dir: str = MODEL_DIR) -> str:
+    """
+    모델 폴더 파일(이름, 크기, 수정 시각)로 만든 버전 문자열 (가중치 전체를 읽지 않음)
+    onnx/ 등 하위 폴더는 모델에서 만들어지는 캐시이므로 제외
+    """
+    if not os.path.isdir(model_dir):
+        return "missing"
+    files = []
+    for name in sorted(os.listdir(model_dir)):
+        path = os.path.join(model_dir, name)
+        if os.path.isfile(path) and not name.startswith("."):
+            stat = os.stat(path)
+            files.append([name, stat.st_size, stat.st_mtime_ns])
+    return hashlib.sha256(json.dumps(files).encode("utf-8")).hexdigest()[:12]
+
+
+class EmotionModel:
+    """
+    로딩된 KoBERT 토크나이저/모델과 배치 엔진 묶음 (읽기 전용으로 공유)
+    model: fp32 torch 모델 (torch 백엔드일 때만 유지, int8 / onnx면 None)
+    """
+
+    def __init__(self, tokenizer, model, id2label, backend, version=None):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.id2label = id2label
+        self.backend = backend
+        self.version = version
+        # 동시 요청을 모아서 한 번에 forward 하는 배치 엔진 (worker 스레드는 첫 요청 때 시작)
+        self.batcher = EmotionBatcher(tokenizer, backend)
+
 
-if not os.path.exists(local_model_file):
-    print("[EmotionAgent] 로컬에 KoBERT 감정 모델이 없어 HF에서 다운로드합니다...")
-    snapshot_download(
-        repo_id=MODEL_REPO,
-        local_dir=MODEL_DIR,
-        ignore_patterns=["*.msgpack"],  # 선택 옵션
+def load_emotion_model(backend: str = EMOTION_BACKEND) -> EmotionModel:
+    # 🔹 로컬 모델 디렉토리 준비 & 없으면 HF에서 받아오기
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    local_model_file = os.path.join(MODEL_DIR, "model.safetensors")
+
+    if not os.path.exists(local_model_file):
+        print("[EmotionAgent] 로컬에 KoBERT 감정 모델이 없어 HF에서 다운로드합니다...")
+        snapshot_download(
+            repo_id=MODEL_REPO,
+            local_dir=MODEL_DIR,
+            ignore_patterns=["*.msgpack"],  # 선택 옵션
+        )
+        print("[EmotionAgent] 다운로드 완료:", MODEL_DIR)
+
+    # 🔹 로딩 전에 버전을 잡아 둠 (로딩 중에 파일이 또 바뀌면 다음 reload에서 반영)
+    version = model_fingerprint()
+
+    # 🔹 토크나이저 & 모델 로딩
+    tokenizer = AutoTokenizer.from_pretrained(
+        "monologg/kobert",
+        trust_remote_code=True,
     )
-    print("[EmotionAgent] 다운로드 완료:", MODEL_DIR)
 
-# 🔹 토크나이저 & 모델 로딩
-tokenizer = AutoTokenizer.from_pretrained(
-    "monologg/kobert",
-    trust_remote_code=True,
-)
+    model = AutoModelForSequenceClassification.from_pretrained(
+        MODEL_DIR,              # HF에서 받은 폴더에서 바로 로딩
+        local_files_only=True,
+        trust_remote_code=True,
+    )
+    model.eval()
 
-model = AutoModelForSequenceClassification.from_pretrained(
-    MODEL_DIR,              # HF에서 받은 폴더에서 바로 로딩
-    local_files_only=True,
-    trust_remote_code=True,
-)
-model.eval()
+    # 🔹 id2label 설정 (모델 config에 있으면 그것 우선)
+    if hasattr(model.config, "id2label") and model.config.id2label:
+        id2label = {int(k): v for k, v in model.config.id2label.items()}
+    else:
+        # 기본 매핑 (모델이 3-class라고 가정)
+        id2label = {0: "anger", 1: "sad", 2: "fear"}
 
-# 🔹 id2label 설정 (모델 config에 있으면 그것 우선)
-if hasattr(model.config, "id2label") and model.config.id2label:
-    id2label = {int(k): v for k, v in model.config.id2label.items()}
-else:
-    # 기본 매핑 (모델이 3-class라고 가정)
-    id2label = {0: "anger", 1: "sad", 2: "fear"}
+    # 🔹 추론 백엔드 (torch / torch-int8 / onnx)
+    print(f"[EmotionAgent] 추론 백엔드: {backend} (version={version})")
+    engine = create_backend(backend, model, MODEL_DIR, tokenizer, inplace=True)
+    if backend != "torch":
+        # int8 / onnx 백엔드가 만들어지면 fp32 모델은 더 이상 필요 없음 (워커마다 수백 MB)
+        model = None
+        gc.collect()
+    return EmotionModel(tokenizer, model, id2label, engine, version)
 
 
 # ✅ 인삿말/형식 멘트 패턴 (무조건 neutral로 처리할 후보들)
@@ -61,17 +118,24 @@ GREETING_PATTERNS = [
 # ✅ 감정 확신도가 너무 낮으면 neutral로 돌리는 threshold
 NEUTRAL_THRESHOLD = 0.55
 
+# ✅ 같은 발화(정규화 기준)의 모델 결과를 재사용하는 LRU 캐시 크기
+EMOTION_CACHE_SIZE = int(os.getenv("EMOTION_CACHE_SIZE", "4096"))
+
 
 class EmotionAgent:
     """
     KoBERT 기반 감정 분류 에이전트
+    (모델 추론은 EmotionBatcher를 통해 다른 요청과 함께 배치로 실행됨)
     """
 
-    # 대표 감정 1개만 반환
-    def predict(self, text: str) -> dict:
-        # -----------------------------
-        # 0) 인삿말/형식 멘트 휴리스틱
-        # -----------------------------
+    def __init__(self, emotion_model: EmotionModel = None, cache_size: int = EMOTION_CACHE_SIZE):
+        # 서버에서는 registry가 로딩한 모델을 넘겨줌 (없으면 오프라인 스크립트용으로 직접 로딩)
+        self.emotion_model = emotion_model or load_emotion_model()
+        # 정규화 텍스트 → 모델 출력(probs, embedding). 모델 결과는 변하지 않으므로 TTL 없음
+        self.cache = ResponseCache("emotion", max_size=cache_size, ttl_seconds=float("inf"))
+
+    # 인삿말/형식 멘트면 neutral 결과, 아니면 None
+    def _greeting_result(self, text: str):
         cleaned = text.strip()
         no_space = cleaned.replace(" ", "")
 
@@ -82,55 +146,29 @@ class EmotionAgent:
                     "emotion_label": "neutral",
                     "emotion_score": 0.7,  # 적당한 중간값
                 }
+        return None
 
-        # -----------------------------
-        # 1) KoBERT 모델 추론
-        # -----------------------------
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=128,
-        )
-        with torch.no_grad():
-            outputs = model(**inputs)
-            probs = torch.softmax(outputs.logits, dim=1)
-            score, idx = torch.max(probs, dim=1)
-
-        score_val = float(score)
-        label = id2label[int(idx.item())]
+    # 확률 분포 → 대표 감정 1개
+    def _to_label(self, probs: list) -> dict:
+        idx = max(range(len(probs)), key=lambda i: probs[i])
+        score_val = float(probs[idx])
+        label = self.emotion_model.id2label[idx]
 
-        # -----------------------------
-        # 2) 확신도가 낮으면 neutral로 강등
-        # -----------------------------
+        # 확신도가 낮으면 neutral로 강등
         if score_val < NEUTRAL_THRESHOLD:
             return {
                 "emotion_label": "neutral",
                 "emotion_score": score_val,
             }
 
-        # -----------------------------
-        # 3) 일반적인 감정 결과 반환
-        # -----------------------------
+        # 일반적인 감정 결과 반환
         return {
             "emotion_label": label,
             "emotion_score": score_val,
         }
 
-    # anger, sad, fear 전체 확률 반환 (그래프용)
-    def predict_proba(self, text: str) -> dict:
-        inputs = tokenizer(
-            text,
-            return_tensors="pt",
-            truncation=True,
-            padding=True,
-            max_length=128,
-        )
-        with torch.no_grad():
-            outputs = model(**inputs)
-            probs = torch.softmax(outputs.logits, dim=1)[0].tolist()
-
+    # 확률 분포 → 그래프용 dict
+    def _to_proba(self, probs: list) -> dict:
         # 여기서는 여전히 모델이 가진 3개 클래스 분포 그대로 반환
         # (프론트 그래프용)
         return {
@@ -138,3 +176,113 @@ class EmotionAgent:
             "sad": float(probs[1]),
             "fear": float(probs[2]),
         }
+
+    # -----------------------------
+    # 모델 추론 (캐시 → 배치 엔진)
+    # -----------------------------
+    def _infer(self, text: str) -> dict:
+        key = (normalize_text(text),)
+        output = self.cache.get(key)
+        if output is None:
+            output = self.emotion_model.batcher.infer(text)
+            self.cache.set(key, output)
+        return output
+
+    async def _ainfer(self, text: str, bounded: bool = True) -> dict:
+        key = (normalize_text(text),)
+        output = self.cache.get(key)
+        if output is None:
+            batcher = self.emotion_model.batcher
+            future = batcher.submit(text, bounded=bounded)
+            try:
+                output = await asyncio.wait_for(asyncio.wrap_future(future), INFER_TIMEOUT)
+            except asyncio.TimeoutError:
+                raise batcher.timeout_error()
+            self.cache.set(key, output)
+        return output
+
+    def _build_result(self, greeting, output, with_proba, with_embedding) -> dict:
+        # 인삿말이면 감정은 neutral 고정, 분포/임베딩은 모델 결과 그대로
+        result = dict(greeting or self._to_label(output["probs"]))
+        if with_proba:
+            result["emotion_proba"] = self._to_proba(output["probs"])
+        if with_embedding:
+            result["embedding"] = output["embedding"]
+        return result
+
+    # -----------------------------
+    # 한 번의 추론으로 대표 감정 + neutral 강등 + 전체 분포
+    # -----------------------------
+    def analyze(self, text: str, with_proba: bool = True, with_embedding: bool = False) -> dict:
+        """
+        반환: {"emotion_label", "emotion_score", "emotion_proba"(옵션), "embedding"(옵션)}
+        인삿말이고 분포/임베딩이 필요 없으면 모델을 돌리지 않음
+        """
+        greeting = self._greeting_result(text)
+        if greeting is not None and not (with_proba or with_embedding):
+            return greeting
+        return self._build_result(greeting, self._infer(text), with_proba, with_embedding)
+
+    async def aanalyze(self, text: str, with_proba: bool = True, with_embedding: bool = False,
+                       bounded: bool = True) -> dict:
+        """
+        analyze의 async 버전: 이벤트 루프를 막지 않고 배치 결과를 기다림
+        with_embedding=True면 같은 forward에서 나온 문장 임베딩도 "embedding"으로 함께 반환
+        bounded=False: 대기열이 차도 거절하지 않음 (aanalyze_many처럼 개수를 나눠서 넣는 경우)
+        """
+        greeting = self._greeting_result(text)
+        if greeting is not None and not (with_proba or with_embedding):
+            return greeting
+        output = await self._ainfer(text, bounded=bounded)
+        return self._build_result(greeting, output, with_proba, with_embedding)
+
+    async def aanalyze_many(self, texts: list, with_proba: bool = True, with_embedding: list = None) -> list:
+        """
+        여러 텍스트 (/analyze-batch): 배치 큐 대기열 한도(max_queue)개씩 나눠서 제출
+        → 실시간 요청용 대기열 한도에 걸려 자기 텍스트를 거절하지 않음
+        with_embedding: 텍스트별 bool 리스트 (None이면 모두 False)
+        반환: 텍스트 순서대로 결과 dict 또는 예외 (시간 초과 등, 호출한 쪽에서 대체)
+        """
+        flags = with_embedding or [False] * len(texts)
+        chunk_size = max(1, self.emotion_model.batcher.max_queue)
+        results = []
+        for start in range(0, len(texts), chunk_size):
+            results += await asyncio.gather(
+                *(
+                    self.aanalyze(text, with_proba=with_proba, with_embedding=flag, bounded=False)
+                    for text, flag in zip(texts[start:start + chunk_size], flags[start:start + chunk_size])
+                ),
+                return_exceptions=True,
+            )
+        return results
+
+    # 대표 감정 1개만 반환
+    def predict(self, text: str) -> dict:
+        return self.analyze(text, with_proba=False)
+
+    async def apredict(self, text: str, with_embedding: bool = False) -> dict:
+        return await self.aanalyze(text, with_proba=False, with_embedding=with_embedding)
+
+    # 문장 임베딩 여러 개 (intent 예시 문장 등 초기화용)
+    def encode_many(self, texts: list) -> list:
+        futures = [self.emotion_model.batcher.submit(text) for text in texts]
+        return [future.result()["embedding"] for future in futures]
+
+    # 🔹 hot reload: 교체 전 warmup / 교체 후 이전 버전 정리
+    def warmup(self, texts: list = WARMUP_TEXTS):
+        """
+        배치 worker 시작 + 백엔드 첫 forward(메모리 할당 등)를 요청이 오기 전에 끝내 둠
+        출력이 이상하면(클래스 수 불일치 / NaN) 예외 → 교체하지 않음
+        """
+        for text in texts:
+            probs = self._infer(text)["probs"]
+            if len(probs) != len(self.emotion_model.id2label) or not all(math.isfinite(p) for p in probs):
+                raise ValueError(f"warmup 출력 이상: {list(probs)}")
+            self.analyze(text)
+
+    def close(self):
+        self.emotion_model.batcher.stop()
+
+    # anger, sad, fear 전체 확률 반환 (그래프용)
+    def predict_proba(self, text: str) -> dict:
+        return self._to_proba(self._infer(text)["probs"])
@@ -0,0 +1,218 @@
+# server/agents/emotion_backends.py
+import os
+import argparse
+
+import numpy as np
+import torch
+
+# 🔹 사용할 추론 백엔드: torch (기본) | torch-int8 | onnx
+EMOTION_BACKEND = os.getenv("EMOTION_BACKEND", "torch")
+# 🔹 ORT 세션 intra-op 스레드 수 (0이면 onnxruntime 기본값)
+ORT_THREADS = int(os.getenv("EMOTION_ORT_THREADS", "0"))
+
+
+class PooledClassifier(torch.nn.Module):
+    """
+    (logits, mean-pooled 문장 임베딩)을 한 번의 forward로 반환하는 래퍼
+    → torch / int8 / ONNX 백엔드가 같은 출력 형태를 갖도록 함
+    """
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask, token_type_ids=None):
+        outputs = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            token_type_ids=token_type_ids,
+            output_hidden_states=True,
+        )
+        # 마지막 hidden state를 mean pooling (padding 제외)
+        hidden = outputs.hidden_states[-1]
+        mask = attention_mask.unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1.0)
+        return outputs.logits, pooled
+
+
+def _postprocess(logits: np.ndarray, pooled: np.ndarray):
+    """
+    logits → softmax 확률 리스트, pooled → L2 정규화 임베딩
+    """
+    logits = logits - logits.max(axis=1, keepdims=True)
+    probs = np.exp(logits)
+    probs /= probs.sum(axis=1, keepdims=True)
+
+    norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+    embeddings = (pooled / np.maximum(norms, 1e-12)).astype("float32")
+    return probs.tolist(), embeddings
+
+
+class TorchBackend:
+    """
+    fp32 eager PyTorch
+    """
+
+    name = "torch"
+
+    def __init__(self, model):
+        self.module = PooledClassifier(model).eval()
+
+    def forward(self, inputs):
+        """
+        inputs: tokenizer(..., return_tensors="pt") 결과
+        반환: (클래스별 확률 리스트들, 임베딩 np.ndarray)
+        """
+        with torch.no_grad():
+            logits, pooled = self.module(**inputs)
+        return _postprocess(logits.numpy(), pooled.numpy())
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    Linear 레이어 dynamic int8 quantization (CPU 전용)
+    inplace=True면 fp32 Linear를 바로 교체 (서버: fp32 사본을 메모리에 남기지 않음)
+    """
+
+    name = "torch-int8"
+
+    def __init__(self, model, inplace=False):
+        quantized = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=inplace
+        )
+        super().__init__(quantized)
+
+
+class OnnxBackend:
+    """
+    ONNX Runtime (CPUExecutionProvider)
+    모델 폴더의 onnx/model.onnx를 사용하고, 없거나 체크포인트보다 오래됐으면 torch 모델에서 export 후 저장
+    """
+
+    name = "onnx"
+
+    def __init__(self, model, model_dir, tokenizer):
+        import onnxruntime as ort  # 선택 의존성: EMOTION_BACKEND=onnx일 때만 필요
+
+        onnx_path = os.path.join(model_dir, "onnx", "model.onnx")
+        weights_path = os.path.join(model_dir, "model.safetensors")
+        # 체크포인트를 교체(hot reload)했으면 이전 모델에서 export한 파일은 다시 만듦
+        if not os.path.exists(onnx_path) or (
+            os.path.exists(weights_path) and os.path.getmtime(onnx_path) < os.path.getmtime(weights_path)
+        ):
+            export_onnx(model, tokenizer, onnx_path)
+
+        options = ort.SessionOptions()
+        if ORT_THREADS > 0:
+            options.intra_op_num_threads = ORT_THREADS
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def forward(self, inputs):
+        feed = {
+            name: inputs[name].numpy().astype("int64")
+            for name in self.input_names
+            if name in inputs
+        }
+        logits, pooled = self.session.run(None, feed)
+        return _postprocess(logits, pooled)
+
+
+def export_onnx(model, tokenizer, onnx_path):
+    print(f"[EmotionAgent] ONNX export: {onnx_path}")
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+
+    sample = tokenizer(["샘플 문장입니다"], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes.update({"logits": {0: "batch"}, "pooled": {0: "batch"}})
+
+    tmp_path = f"{onnx_path}.{os.getpid()}.tmp"   # 여러 워커가 동시에 export해도 서로 덮어쓰지 않음
+    torch.onnx.export(
+        PooledClassifier(model).eval(),
+        tuple(sample[name] for name in input_names),
+        tmp_path,
+        input_names=input_names,
+        output_names=["logits", "pooled"],
+        dynamic_axes=dynamic_axes,
+        opset_version=14,
+    )
+    os.replace(tmp_path, onnx_path)
+
+
+def create_backend(name, model, model_dir, tokenizer, inplace=False):
+    """
+    inplace=True: 더 이상 fp32 모델을 쓰지 않는 경우 (torch-int8이 원본 모델을 직접 quantize)
+    백엔드 비교/벤치처럼 같은 모델로 여러 백엔드를 만들 때는 False
+    """
+    if name == "torch":
+        return TorchBackend(model)
+    if name == "torch-int8":
+        return QuantizedTorchBackend(model, inplace=inplace)
+    if name == "onnx":
+        return OnnxBackend(model, model_dir, tokenizer)
+    raise ValueError(f"지원하지 않는 EMOTION_BACKEND: {name}")
+
+
+# ==========================
+# 백엔드 간 결과 비교 (label 일치율)
+# ==========================
+def compare_backends(tokenizer, backends, texts, batch_size=16):
+    """
+    첫 번째 백엔드를 기준으로 나머지 백엔드의 argmax label 일치율 / 최대 확률 차이 계산
+    """
+    outputs = {backend.name: [] for backend in backends}
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(
+            texts[start:start + batch_size],
+            return_tensors="pt",
+            truncation=True,
+            padding=True,
+            max_length=128,
+        )
+        for backend in backends:
+            probs, _ = backend.forward(inputs)
+            outputs[backend.name].extend(probs)
+
+    reference = backends[0].name
+    ref_probs = np.asarray(outputs[reference])
+    report = {}
+    for backend in backends[1:]:
+        probs = np.asarray(outputs[backend.name])
+        report[backend.name] = {
+            "reference": reference,
+            "label_agreement": float((probs.argmax(1) == ref_probs.argmax(1)).mean()),
+            "max_prob_diff": float(np.abs(probs - ref_probs).max()),
+        }
+    return report
+
+
+if __name__ == "__main__":
+    # 예: python -m agents.emotion_backends config/emotion_validation.txt --backends torch,torch-int8,onnx
+    from agents.emotion_agent import MODEL_DIR, load_emotion_model
+
+    parser = argparse.ArgumentParser(description="KoBERT 감정 백엔드 label 일치율 검증")
+    parser.add_argument("validation_file", help="한 줄에 발화 1개")
+    parser.add_argument("--backends", default="torch,torch-int8,onnx")
+    parser.add_argument("--min-agreement", type=float, default=0.98)
+    args = parser.parse_args()
+
+    with open(args.validation_file, encoding="utf-8") as f:
+        texts = [line.strip() for line in f if line.strip()]
+
+    emotion_model = load_emotion_model(backend="torch")
+    backends = [
+        create_backend(name, emotion_model.model, MODEL_DIR, emotion_model.tokenizer)
+        for name in args.backends.split(",")
+    ]
+
+    report = compare_backends(emotion_model.tokenizer, backends, texts)
+    ok = True
+    for name, result in report.items():
+        passed = result["label_agreement"] >= args.min_agreement
+        ok = ok and passed
+        print(f"{name:<12} agreement={result['label_agreement']:.4f} "
+              f"max_prob_diff={result['max_prob_diff']:.4f} {'OK' if passed else 'FAIL'}")
+    raise SystemExit(0 if ok else 1)
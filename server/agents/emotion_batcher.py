@@ -0,0 +1,211 @@
+# server/agents/emotion_batcher.py
+import os
+import math
+import queue
+import threading
+import time
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import torch
+
+from agents.metrics import EMOTION_BATCH_SIZE, ADMISSION_QUEUE_DEPTH, ADMISSION_WAIT_SECONDS, ADMISSION_SHED, span
+from agents.admission import Overloaded
+
+# ✅ 배치 설정 (환경변수로 조정 가능)
+MAX_BATCH_SIZE = int(os.getenv("EMOTION_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("EMOTION_MAX_WAIT_MS", "5"))
+TORCH_THREADS = int(os.getenv("EMOTION_TORCH_THREADS", "0"))  # 0이면 torch 기본값 사용
+# 요청 경로에서 대기열이 이 이상이면 forward를 기다리지 않고 바로 거절 (503)
+MAX_QUEUE = int(os.getenv("EMOTION_MAX_QUEUE", "256"))
+# 결과를 기다리는 최대 시간(초): worker가 멈춰도 요청이 무한히 기다리지 않도록
+INFER_TIMEOUT = float(os.getenv("EMOTION_INFER_TIMEOUT", "10"))
+
+# worker 종료 신호 (stop)
+_STOP = object()
+
+# gunicorn --preload: fork 전에 만든 배치 엔진은 자식 프로세스에서 worker 스레드 없이 복사됨
+# → 자식에서 queue / lock / worker를 새로 만들어 첫 submit 때 worker를 다시 시작
+_batchers = weakref.WeakSet()
+
+
+def _reset_after_fork():
+    for batcher in list(_batchers):
+        batcher._reset()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+class EmotionBatcher:
+    """
+    동시에 들어온 KoBERT 추론 요청을 모아서 한 번의 forward로 처리하는 micro-batching 엔진.
+
+    - submit(text)는 바로 Future를 반환하고, 전용 worker 스레드가 배치를 실행한 뒤 결과를 채운다.
+    - 배치는 max_batch_size개가 모이거나, 첫 요청 이후 max_wait_ms가 지나면 실행된다.
+    - forward는 worker 스레드 1개에서만 돌기 때문에 요청 스레드끼리 torch intra-op 스레드를 두고 경쟁하지 않는다.
+    - stop()은 이미 들어온 요청까지 처리한 뒤 worker를 끝낸다 (모델 hot reload로 이전 버전을 정리할 때).
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        backend,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_wait_ms: float = MAX_WAIT_MS,
+        num_threads: int = TORCH_THREADS,
+        max_length: int = 128,
+        max_queue: int = MAX_QUEUE,
+    ):
+        self.tokenizer = tokenizer
+        self.backend = backend  # agents.emotion_backends (torch / torch-int8 / onnx)
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.num_threads = num_threads
+        self.max_length = max_length
+        self.max_queue = max_queue
+        self._batch_seconds = 0.05   # 배치 1번 평균 처리 시간 (EWMA, Retry-After 계산용)
+
+        self._reset()
+        _batchers.add(self)
+
+    def _reset(self):
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    # -----------------------------
+    # public API
+    # -----------------------------
+    def submit(self, text: str, bounded: bool = False) -> Future:
+        """
+        text 1개를 배치 큐에 넣고 Future 반환
+        결과: {"probs": 클래스별 확률 리스트, "embedding": 문장 임베딩(np.ndarray, L2 정규화)}
+        bounded=True (API 요청 경로): 대기열이 max_queue 이상이면 admission.Overloaded
+        (인덱스 빌드 등 초기화용 encode_many는 거절하지 않음)
+        """
+        depth = self._queue.qsize()
+        if bounded and depth >= self.max_queue:
+            ADMISSION_SHED.labels("emotion", "queue_full").inc()
+            raise Overloaded("emotion", "queue_full", self._retry_after(depth))
+        future = Future()
+        # worker 종료 판단(_exit)과 겹치지 않도록 넣는 것과 worker 확인을 같은 lock 안에서
+        with self._lock:
+            self._queue.put((text, future, time.monotonic()))
+            if self._worker is None or not self._worker.is_alive():
+                self._start_worker()
+        ADMISSION_QUEUE_DEPTH.labels("emotion").set(depth + 1)
+        return future
+
+    def infer(self, text: str, timeout: float = INFER_TIMEOUT) -> dict:
+        """
+        sync 호출용: 결과가 나올 때까지 대기 (timeout 초과 시 Overloaded)
+        """
+        future = self.submit(text)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise self.timeout_error()
+
+    def timeout_error(self) -> Overloaded:
+        # 결과를 제때 못 받은 요청 (배치 큐 적체 / worker 이상) → 호출한 쪽에서 raise
+        ADMISSION_SHED.labels("emotion", "wait_timeout").inc()
+        return Overloaded("emotion", "wait_timeout", self._retry_after(self._queue.qsize()))
+
+    def _retry_after(self, depth: int) -> int:
+        # 지금 대기열이 다 처리될 때까지의 예상 시간 (최소 1초)
+        return max(1, math.ceil(depth / self.max_batch_size * self._batch_seconds))
+
+    def stop(self):
+        """
+        남은 요청까지 처리한 뒤 worker 종료 (이후 submit이 오면 worker를 다시 시작)
+        """
+        with self._lock:
+            if self._worker is not None:
+                self._queue.put(_STOP)
+
+    # -----------------------------
+    # worker
+    # -----------------------------
+    def _start_worker(self):
+        # self._lock을 잡은 상태에서 호출
+        self._worker = threading.Thread(target=self._run, name="emotion-batcher", daemon=True)
+        self._worker.start()
+
+    def _collect_batch(self):
+        """
+        (batch, stop 신호를 받았는지)
+        """
+        batch = []
+        item = self._queue.get()
+        deadline = time.monotonic() + self.max_wait
+
+        while item is not _STOP:
+            batch.append(item)
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+
+        return batch, item is _STOP
+
+    def _exit(self) -> bool:
+        with self._lock:
+            if not self._queue.empty():
+                # stop 이후에 들어온 요청이 있으면 그것까지 처리하고 다시 종료 시도
+                self._queue.put(_STOP)
+                return False
+            self._worker = None
+            return True
+
+    def _run(self):
+        if self.num_threads > 0:
+            torch.set_num_threads(self.num_threads)
+
+        while True:
+            batch, stop = self._collect_batch()
+            if stop and not batch:
+                if self._exit():
+                    return
+                continue
+            started = time.monotonic()
+            ADMISSION_QUEUE_DEPTH.labels("emotion").set(self._queue.qsize())
+            for _, _, enqueued in batch:
+                ADMISSION_WAIT_SECONDS.labels("emotion").observe(started - enqueued)
+
+            # 취소된 요청은 버림
+            batch = [(text, fut) for text, fut, _ in batch if fut.set_running_or_notify_cancel()]
+            if batch:
+                self._run_batch(batch)
+                self._batch_seconds = 0.9 * self._batch_seconds + 0.1 * (time.monotonic() - started)
+            if stop and self._exit():
+                return
+
+    def _run_batch(self, batch):
+        texts = [text for text, _ in batch]
+        EMOTION_BATCH_SIZE.observe(len(texts))
+
+        try:
+            with span("emotion_tokenize"):
+                inputs = self.tokenizer(
+                    texts,
+                    return_tensors="pt",
+                    truncation=True,
+                    padding=True,
+                    max_length=self.max_length,
+                )
+            # 한 번의 forward로 확률 분포 + 문장 임베딩(intent 분류 등에 재사용)
+            with span("emotion_forward"):
+                probs, embeddings = self.backend.forward(inputs)
+        except Exception as e:
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+
+        for (_, fut), row, embedding in zip(batch, probs, embeddings):
+            fut.set_result({"probs": row, "embedding": embedding})
@@ -1,23 +1,41 @@
-from collections import deque
+import asyncio
+
+from agents.session_store import create_session_store
 
 class EmotionSmoother:
-    def __init__(self, window=3):
+    def __init__(self, window=3, store=None):
         self.window = window
-        self.sessions = {}  # 세션별 smoothing 저장
+        # 세션별 smoothing 저장 (TTL / 최대 개수 제한이 있는 저장소, 기본은 프로세스 메모리)
+        self.store = store if store is not None else create_session_store()
 
     def add_score(self, session_id: str, score: float) -> float:
         """
         특정 session_id의 감정 점수를 업데이트
         """
-        if session_id not in self.sessions:
-            self.sessions[session_id] = deque(maxlen=self.window)
+        history = self.store.append(session_id, score, self.window)
         """
         average로 누적 평균 매김.
         """
-        history = self.sessions[session_id]
-        history.append(score)
         return sum(history) / len(history)
 
+    async def aadd_score(self, session_id: str, score: float) -> float:
+        """
+        async 엔드포인트용: 파일 기반 저장소(sqlite)면 스레드에서 실행해서 이벤트 루프를 막지 않음
+        """
+        if self.store.blocking:
+            return await asyncio.to_thread(self.add_score, session_id, score)
+        return self.add_score(session_id, score)
+
     def reset(self, session_id: str):
-        if session_id in self.sessions:
-            del self.sessions[session_id]
+        self.store.reset(session_id)
+
+    async def areset(self, session_id: str):
+        if self.store.blocking:
+            await asyncio.to_thread(self.reset, session_id)
+        else:
+            self.reset(session_id)
+
+    def start_cleanup(self):
+        # 저장소가 주기적 정리를 지원하면 시작 (sqlite)
+        start = getattr(self.store, "start_cleanup", None)
+        return start() if start is not None else None
@@ -0,0 +1,66 @@
+# server/agents/fast_path.py
+import os
+import json
+
+from agents.response_cache import normalize_text
+from agents.intent_classifier import EXAMPLES_PATH
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAST_PATH_CONFIG = os.path.join(BASE_DIR, "config", "fast_path.json")
+
+
+class FastPath:
+    """
+    인삿말 / 맞장구 같은 정형 발화는 LLM을 거치지 않고 미리 준비된 안내문으로 바로 응답하는 테이블
+    (config/fast_path.json)
+
+    - patterns: 정규화된 발화에 포함되어야 하는 문구
+    - max_extra_chars: 패턴 외에 허용하는 글자 수 ("안녕하세요 환불이 안 돼요"처럼
+      용건이 붙은 발화는 fast path에서 제외)
+    - 패턴 밖 글자에 intent 키워드(config/intent_examples.json)가 있으면 짧아도 제외
+      ("환불 때문에 전화드렸습니다", "안녕하세요 환불" → intent 분류 / LLM 단계로)
+    - require_neutral: KoBERT 감정이 neutral일 때만 적용
+    """
+
+    def __init__(self, config_path: str = FAST_PATH_CONFIG, examples_path: str = EXAMPLES_PATH):
+        with open(config_path, encoding="utf-8") as f:
+            config = json.load(f)
+        with open(examples_path, encoding="utf-8") as f:
+            examples = json.load(f)
+
+        self.intent_keywords = sorted({
+            normalize_text(k) for spec in examples.values() for k in spec.get("keywords", [])
+        } - {""})
+
+        self.enabled = config.get("enabled", True) and os.getenv("FAST_PATH", "1") == "1"
+        self.entries = []
+        for entry in config.get("entries", []):
+            entry = dict(entry)
+            # 긴 패턴부터 비교해야 "도와주셔서 감사합니다"가 "감사합니다"보다 먼저 잡힘
+            entry["patterns"] = sorted(
+                (normalize_text(p) for p in entry["patterns"]), key=len, reverse=True
+            )
+            self.entries.append(entry)
+
+    def match(self, text: str):
+        """
+        텍스트만으로 매칭되는 entry (감정 조건은 accepts로 따로 확인), 없으면 None
+        """
+        if not self.enabled:
+            return None
+
+        normalized = normalize_text(text)
+        for entry in self.entries:
+            for pattern in entry["patterns"]:
+                if pattern in normalized and len(normalized) - len(pattern) <= entry.get("max_extra_chars", 0):
+                    if self._has_intent(normalized.replace(pattern, "", 1)):
+                        # 인삿말 + 용건 → 정형 발화가 아님
+                        return None
+                    return entry
+        return None
+
+    def _has_intent(self, extra: str) -> bool:
+        return any(keyword in extra for keyword in self.intent_keywords)
+
+    def accepts(self, entry, emotion_label: str) -> bool:
+        return not entry.get("require_neutral", False) or emotion_label == "neutral"
@@ -1,26 +1,68 @@
 from langchain.prompts import PromptTemplate
 from langchain.chains import LLMChain
-from langchain_openai import ChatOpenAI
-from agents.policy_rag import POLICY_RETRIEVER
+from agents.policy_rag import get_policy_retriever
 from agents.calm_agent import CalmAgent
+from agents.request_context import RequestContext
+from agents.action_planner import ActionPlanner
+from agents.metrics import span, record_usage, TokenUsageCallback, COMBINED_FALLBACKS
+from agents import llm_provider, singleflight
+from agents.response_cache import normalize_text, emotion_bucket
+import openai
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
 import os
 import json
+from contextlib import aclosing
+
+
+# 대응문 + 상담사 피드백 1회 생성(combined) 결과 검증용
+class CombinedSections(BaseModel):
+    model_config = ConfigDict(str_strip_whitespace=True, extra="forbid")
+
+    calm: str = Field(min_length=1)    # 상담사만을 위한 감정 안정 피드백
+    reply: str = Field(min_length=1)   # 고객에게 전달할 대응문
+
+
+COMBINED_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "call_guide",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "calm": {"type": "string"},
+                "reply": {"type": "string"},
+            },
+            "required": ["calm", "reply"],
+            "additionalProperties": False,
+        },
+    },
+}
+
 
 class GuideAgent:
-    def __init__(self, model_name="gpt-4o-mini"):
+    def __init__(self, model_name="gpt-4o-mini", calm_agent=None):
         api_key = os.getenv("OPENAI_API_KEY")
+        self.model_name = model_name
 
-        self.llm = ChatOpenAI(
+        # 공용 커넥션 풀을 쓰는 ChatOpenAI (재시도 / timeout은 llm_provider에서 처리)
+        self.llm = llm_provider.chat_model(
             model=model_name,
             temperature=0.2,
-            openai_api_key=api_key
+            openai_api_key=api_key,
+            callbacks=[TokenUsageCallback("guide")]
         )
 
-        # CalmAgent 인스턴스
-        self.calm_agent = CalmAgent()
+        # CalmAgent 인스턴스 (라우터와 같은 인스턴스를 넘겨받으면 클라이언트를 공유)
+        self.calm_agent = calm_agent or CalmAgent()
 
         # ---------------------------------------
-        #  "AI Agent의 계획 능력"을 담당하는 프롬프트
+        #  규칙 기반 Action 플래너 (config/planner_rules.json)
+        # ---------------------------------------
+        self.planner = ActionPlanner()
+
+        # ---------------------------------------
+        #  규칙으로 결정되지 않을 때만 쓰는 LLM 플래너 (llm_fallback 옵션)
         # ---------------------------------------
         self.planner_prompt = PromptTemplate(
             input_variables=["intent", "emotion_label", "emotion_score"],
@@ -95,57 +137,321 @@ JSON만 출력하라.
 
         self.chain = LLMChain(llm=self.llm, prompt=self.template)
 
-    # =====================================================================
-    # 실제 실행: LLM이 'actions'를 계획하고 → Tool들을 실행하는 반자율 구조
-    # =====================================================================
-    def generate(self, system_prompt, user_text, intent, emotion_label, emotion_score):
+        # -------------------------------------------------
+        # Combined 템플릿: 대응문 + 상담사 피드백을 JSON 1개로 생성
+        # (CalmAgent 프롬프트의 출력 형식 / 주의 사항을 calm 섹션에 그대로 적용)
+        # -------------------------------------------------
+        self.combined_template = PromptTemplate(
+            input_variables=[
+                "system_prompt",
+                "user_text",
+                "policy_context",
+                "intent",
+                "emotion_label",
+                "emotion_score"
+            ],
+            template="""
+{system_prompt}
 
-        # 1) LLM에게 어떤 행동(Action)을 할지 PLAN 결정 요청
-        raw_plan = self.planner_chain.run(
-            intent=intent,
-            emotion_label=emotion_label,
-            emotion_score=emotion_score
+[정책 정보 참고]
+{policy_context}
+
+[고객 발화]
+{user_text}
+
+[고객 감정 분석]
+- 감정 레이블: {emotion_label}
+- 감정 강도(확률): {emotion_score}
+
+[고객 의도]
+{intent}
+
+==================================================
+아래 두 섹션을 JSON으로 작성하라: {{"calm": "...", "reply": "..."}}
+
+calm (상담사만 보는 감정 안정 피드백)
+- 상담사가 스스로 안정할 수 있는 팁 1개
+- 고객 감정을 다루는 상담 전략 1개
+- 각 항목은 "- "로 시작하는 한 줄, 고객에게 말하는 문장은 절대 쓰지 말 것
+
+reply (고객에게 전달할 대응문)
+- 문제 요약 → 조치 안내 순서
+- 정책 정보(policy_context) 적용
+- 고객에게 전달하는 말만 작성 (상담사 안정 문장 금지)
+- 전체는 2~4문장, 상담사 톤
+==================================================
+"""
         )
 
+    # =====================================================================
+    # 실제 실행: 플래너가 'actions'를 계획하고 → Tool들을 실행하는 반자율 구조
+    # =====================================================================
+    def _parse_plan(self, raw_plan):
         try:
             plan = json.loads(raw_plan)
-            actions = plan.get("actions", [])
+            return plan.get("actions", [])
         except:
             # 실패 시 기본 행동
-            actions = ["policy", "basic"]
+            return ["policy", "basic"]
+
+    @staticmethod
+    def _timed(chain, timeout):
+        # 호출마다 남은 deadline을 요청 timeout으로 (LLMChain.llm_kwargs → ChatOpenAI → openai 요청 인자)
+        return LLMChain(llm=chain.llm, prompt=chain.prompt, llm_kwargs={"timeout": timeout})
+
+    def _query_embedding(self, ctx):
+        # 라우터가 감정 분석 때 받아 둔 문장 임베딩 (있으면 로컬 hybrid 검색에 재사용)
+        return (ctx.get("emotion") or {}).get("embedding")
+
+    def _plan(self, intent, emotion_label, emotion_score):
+        with span("planner_rules"):
+            actions = self.planner.plan(intent, emotion_label, emotion_score)
+        if actions is not None:
+            return actions
+
+        if not self.planner.llm_fallback:
+            return self.planner.default_actions
+
+        with span("planner_llm"):
+            raw_plan = llm_provider.call("planner", lambda timeout: self._timed(self.planner_chain, timeout).run(
+                intent=intent,
+                emotion_label=emotion_label,
+                emotion_score=emotion_score
+            ))
+        return self._parse_plan(raw_plan)
+
+    async def _aplan(self, intent, emotion_label, emotion_score):
+        with span("planner_rules"):
+            actions = self.planner.plan(intent, emotion_label, emotion_score)
+        if actions is not None:
+            return actions
+
+        if not self.planner.llm_fallback:
+            return self.planner.default_actions
+
+        with span("planner_llm"):
+            raw_plan = await llm_provider.acall("planner", lambda timeout: self._timed(self.planner_chain, timeout).arun(
+                intent=intent,
+                emotion_label=emotion_label,
+                emotion_score=emotion_score
+            ))
+        return self._parse_plan(raw_plan)
+
+    def generate(self, system_prompt, user_text, intent, emotion_label, emotion_score, ctx=None):
+        # ctx: 요청 단위 결과 공유 (calm / policy 결과를 다른 stage와 공유)
+        ctx = ctx if ctx is not None else RequestContext()
+
+        # 1) 어떤 행동(Action)을 할지 PLAN 결정 (규칙 기반, 필요 시 LLM fallback)
+        actions = self._plan(intent, emotion_label, emotion_score)
 
         # ------------------------------
         # 2) PLAN 기반 실행
+        #    → 결과는 ctx에 저장되어, 같은 요청 안에서 다시 계산하지 않음
         # ------------------------------
         policy_context = ""
-        calm_message = ""
 
         for act in actions:
             if act == "calm":
-                calm_message = self.calm_agent.generate(
+                ctx.compute("calm", lambda: self.calm_agent.generate(
                     emotion_label=emotion_label,
                     emotion_score=emotion_score
-                )
+                ))
 
             elif act == "policy":
-                docs = POLICY_RETRIEVER.get_relevant_documents(user_text)
-                policy_context = "\n".join(doc.page_content for doc in docs)
+                def run_policy():
+                    with span("policy_retrieval"):
+                        docs = get_policy_retriever().search(
+                            user_text, intent=intent, embedding=self._query_embedding(ctx)
+                        )
+                    return "\n".join(doc.page_content for doc in docs)
+
+                policy_context = ctx.compute("policy", run_policy)
 
         # ------------------------------
         # 3) 고객 대응문 생성
         # ------------------------------
-        guide_reply = self.chain.run(
+        with span("guide_llm"):
+            guide_reply = llm_provider.call("guide", lambda timeout: self._timed(self.chain, timeout).run(
+                system_prompt=system_prompt,
+                user_text=user_text,
+                policy_context=policy_context,
+                intent=intent,
+                emotion_label=emotion_label,
+                emotion_score=emotion_score
+            )).strip()
+
+        # ------------------------------
+        # 4) 최종 response_text 조합
+        #    → LLM이 섞지 못하게 "고정 문자열"로 조립
+        # ------------------------------
+        ctx.set("guide", guide_reply)
+
+        return guide_reply
+
+    # =====================================================================
+    # async 버전
+    # - calm 결과는 대응문 프롬프트에 쓰이지 않으므로 ctx에서 "시작"만 하고 기다리지 않음
+    #   (라우터가 이미 시작했다면 같은 Task를 재사용 → CalmAgent 호출은 요청당 1번)
+    # - policy 검색은 ctx를 통해 1번만 수행
+    # =====================================================================
+    async def _aprepare(self, user_text, intent, emotion_label, emotion_score, ctx, start_calm=True):
+        """
+        PLAN 결정 + Action 실행 → 대응문 프롬프트에 넣을 policy_context 반환
+        start_calm=False: combined 생성처럼 피드백을 따로 만들지 않을 때
+        """
+        # 1) PLAN 결정
+        actions = await self._aplan(intent, emotion_label, emotion_score)
+
+        # 2) PLAN 기반 실행
+        async def run_calm():
+            return await self.calm_agent.agenerate(
+                emotion_label=emotion_label,
+                emotion_score=emotion_score
+            )
+
+        async def run_policy():
+            with span("policy_retrieval"):
+                docs = await get_policy_retriever().asearch(
+                    user_text, intent=intent, embedding=self._query_embedding(ctx)
+                )
+            return "\n".join(doc.page_content for doc in docs)
+
+        if "calm" in actions and start_calm:
+            ctx.start("calm", run_calm)
+
+        policy_context = ""
+        if "policy" in actions:
+            policy_context = await ctx.acompute("policy", run_policy)
+
+        return policy_context
+
+    # =====================================================================
+    # combined 버전: 대응문 + 상담사 피드백을 JSON schema 응답 1번으로 생성
+    # - 검증에 실패하면 None → 호출한 쪽이 기존 2회 호출(agenerate + CalmAgent)로 fallback
+    # =====================================================================
+    async def agenerate_combined(self, system_prompt, user_text, intent, emotion_label, emotion_score, ctx=None):
+        """
+        반환: (calm, reply) 또는 None (검증 실패)
+        """
+        ctx = ctx if ctx is not None else RequestContext()
+
+        policy_context = await self._aprepare(
+            user_text, intent, emotion_label, emotion_score, ctx, start_calm=False
+        )
+        prompt = self.combined_template.format(
             system_prompt=system_prompt,
             user_text=user_text,
             policy_context=policy_context,
             intent=intent,
             emotion_label=emotion_label,
             emotion_score=emotion_score
-        ).strip()
+        )
 
-        # ------------------------------
-        # 4) 최종 response_text 조합
-        #    → LLM이 섞지 못하게 "고정 문자열"로 조립
-        # ------------------------------
+        client = llm_provider.async_openai_client()
+
+        async def call_llm():
+            try:
+                res = await llm_provider.acall("combined", lambda timeout: client.chat.completions.create(
+                    model=self.model_name,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.2,
+                    response_format=COMBINED_RESPONSE_FORMAT,
+                    timeout=timeout,
+                ))
+            except openai.BadRequestError as e:
+                # json_schema를 지원하지 않는 모델 등
+                print(f"[GuideAgent] combined 요청 거부 → 2회 호출로 fallback: {e}")
+                COMBINED_FALLBACKS.inc()
+                return None
+            record_usage("combined", res.usage)
+
+            try:
+                return CombinedSections.model_validate_json(res.choices[0].message.content or "")
+            except ValidationError as e:
+                print(f"[GuideAgent] combined 응답 검증 실패 → 2회 호출로 fallback: {e.errors()[0]['msg']}")
+                COMBINED_FALLBACKS.inc()
+                return None
+
+        with span("combined_llm"):
+            sections = await singleflight.flight("combined").do(
+                self._flight_key(system_prompt, user_text, intent, emotion_label, emotion_score, policy_context),
+                call_llm,
+            )
+        if sections is None:
+            return None
+
+        ctx.set("guide", sections.reply)
+        return sections.calm, sections.reply
+
+    def _flight_key(self, system_prompt, user_text, intent, emotion_label, emotion_score, policy_context):
+        """
+        동시 요청 coalescing key: 대응문 캐시와 같은 기준(정규화 텍스트 / intent / 감정 구간) + 검색된 정책
+        (감정 점수는 구간이 같으면 같은 대응문으로 봄 → 먼저 들어온 요청의 점수로 생성)
+        """
+        return (
+            self.model_name,
+            system_prompt,
+            normalize_text(user_text),
+            intent,
+            emotion_bucket(emotion_label, emotion_score),
+            policy_context,
+        )
+
+    async def agenerate(self, system_prompt, user_text, intent, emotion_label, emotion_score, ctx=None):
+        ctx = ctx if ctx is not None else RequestContext()
+
+        # 1) ~ 2) PLAN 결정 및 실행
+        policy_context = await self._aprepare(user_text, intent, emotion_label, emotion_score, ctx)
+
+        # 3) 고객 대응문 생성 (같은 입력으로 동시에 들어온 요청은 LLM 호출 1번을 공유)
+        async def call_llm():
+            reply = await llm_provider.acall("guide", lambda timeout: self._timed(self.chain, timeout).arun(
+                system_prompt=system_prompt,
+                user_text=user_text,
+                policy_context=policy_context,
+                intent=intent,
+                emotion_label=emotion_label,
+                emotion_score=emotion_score
+            ))
+            return reply.strip()
+
+        with span("guide_llm"):
+            guide_reply = await singleflight.flight("guide").do(
+                self._flight_key(system_prompt, user_text, intent, emotion_label, emotion_score, policy_context),
+                call_llm,
+            )
+
+        ctx.set("guide", guide_reply)
+        return guide_reply
+
+    # =====================================================================
+    # streaming 버전: 대응문을 LLM이 생성하는 대로 토큰 단위로 yield
+    # =====================================================================
+    async def astream(self, system_prompt, user_text, intent, emotion_label, emotion_score, ctx=None):
+        ctx = ctx if ctx is not None else RequestContext()
+
+        policy_context = await self._aprepare(user_text, intent, emotion_label, emotion_score, ctx)
+
+        prompt = self.template.format(
+            system_prompt=system_prompt,
+            user_text=user_text,
+            policy_context=policy_context,
+            intent=intent,
+            emotion_label=emotion_label,
+            emotion_score=emotion_score
+        )
+
+        async def open_stream(timeout):
+            return self.llm.astream(prompt, timeout=timeout)
+
+        # provider slot / deadline / 연결 재시도는 llm_provider.astream에서 처리
+        parts = []
+        stream = llm_provider.astream("guide", open_stream)
+        with span("guide_llm"):
+            async with aclosing(stream):
+                async for chunk in stream:
+                    if chunk.content:
+                        parts.append(chunk.content)
+                        yield chunk.content
 
-        return guide_reply
\ No newline at end of file
+        ctx.set("guide", "".join(parts).strip())
@@ -1,7 +1,10 @@
 from typing import List
-from openai import OpenAI
 import os
 
+from agents import llm_provider, singleflight
+from agents.metrics import span, record_usage
+from agents.response_cache import normalize_text
+
 INTENT_LABELS = [
     "환불요청",
     "배송문의",
@@ -11,14 +14,42 @@ INTENT_LABELS = [
     "일반문의",
 ]
 
+# 로컬 분류기 확신도가 이 값보다 낮으면 LLM으로 fallback
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.6"))
+
 class IntentAgent:
-    def __init__(self, model_name="gpt-4o-mini"):
-        api_key = os.getenv("OPENAI_API_KEY")
-        self.client = OpenAI(api_key=api_key)
+    def __init__(self, model_name="gpt-4o-mini", classifier=None,
+                 confidence_threshold=INTENT_CONFIDENCE_THRESHOLD):
+        # 공용 커넥션 풀을 쓰는 클라이언트 (다른 에이전트와 공유)
+        self.client = llm_provider.openai_client()
+        self.async_client = llm_provider.async_openai_client()
         self.model_name = model_name
 
-    def classify_intent(self, text: str) -> str:
-        prompt = f"""
+        # 로컬 intent 분류기 (IntentClassifier, 없으면 항상 LLM 사용)
+        self.classifier = classifier
+        self.confidence_threshold = confidence_threshold
+
+    def _classify_local(self, text: str, embedding=None):
+        """
+        로컬 분류 결과가 충분히 확실하면 label, 아니면 None (→ LLM fallback)
+        """
+        if self.classifier is None:
+            return None
+        with span("intent_local"):
+            label, confidence = self.classifier.classify(text, embedding)
+        return label if confidence >= self.confidence_threshold else None
+
+    def fallback_intent(self, text: str, embedding=None) -> str:
+        """
+        LLM을 기다릴 수 없을 때: 확신도와 상관없이 로컬 분류 결과 (분류기가 없으면 일반문의)
+        """
+        if self.classifier is None:
+            return "일반문의"
+        label, _ = self.classifier.classify(text, embedding)
+        return label
+
+    def _build_prompt(self, text: str) -> str:
+        return f"""
 다음 고객 발화의 의도를 아래 라벨 중 하나로 분류하세요.
 
 가능한 라벨: {INTENT_LABELS}
@@ -28,11 +59,44 @@ class IntentAgent:
 라벨만 출력하세요.
 """
 
-        response = self.client.chat.completions.create(
-            model=self.model_name,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.0,
-        )
-
+    def _parse_label(self, response) -> str:
         label = response.choices[0].message.content.strip()
         return label if label in INTENT_LABELS else "일반문의"
+
+    def classify_intent(self, text: str, embedding=None) -> str:
+        label = self._classify_local(text, embedding)
+        if label is not None:
+            return label
+
+        with span("intent_llm"):
+            response = llm_provider.call("intent", lambda timeout: self.client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": self._build_prompt(text)}],
+                temperature=0.0,
+                timeout=timeout,
+            ))
+        record_usage("intent", response.usage)
+        return self._parse_label(response)
+
+    async def aclassify_intent(self, text: str, embedding=None) -> str:
+        """
+        classify_intent의 async 버전 (이벤트 루프를 막지 않음)
+        embedding: EmotionAgent forward에서 나온 문장 임베딩 (있으면 로컬 분류에 사용)
+        """
+        label = self._classify_local(text, embedding)
+        if label is not None:
+            return label
+
+        async def call_llm():
+            response = await llm_provider.acall("intent", lambda timeout: self.async_client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": self._build_prompt(text)}],
+                temperature=0.0,
+                timeout=timeout,
+            ))
+            record_usage("intent", response.usage)
+            return self._parse_label(response)
+
+        # 같은 발화로 동시에 들어온 요청은 LLM 호출 1번을 공유
+        with span("intent_llm"):
+            return await singleflight.flight("intent").do((self.model_name, normalize_text(text)), call_llm)
@@ -0,0 +1,76 @@
+# server/agents/intent_classifier.py
+import os
+import json
+
+import numpy as np
+
+from agents.response_cache import normalize_text
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+EXAMPLES_PATH = os.path.join(BASE_DIR, "config", "intent_examples.json")
+
+# 키워드 1개 label에만 걸리면 이 확신도로 바로 결정
+KEYWORD_CONFIDENCE = 0.9
+
+
+class IntentClassifier:
+    """
+    LLM 없이 동작하는 로컬 intent 분류기 (config/intent_examples.json)
+
+    1) 키워드: 한 label의 키워드만 걸리면 그 label
+    2) 임베딩 최근접: 감정 분석과 같은 KoBERT forward에서 나온 문장 임베딩을
+       label별 예시 문장 임베딩 평균(prototype)과 cosine 비교
+    반환하는 confidence가 낮으면 호출한 쪽(IntentAgent)이 LLM으로 fallback
+    """
+
+    def __init__(self, encode_many, examples_path: str = EXAMPLES_PATH, temperature: float = 0.05):
+        with open(examples_path, encoding="utf-8") as f:
+            config = json.load(f)
+
+        self.labels = list(config.keys())
+        self.temperature = temperature
+        self.keywords = {
+            label: [normalize_text(k) for k in spec.get("keywords", [])]
+            for label, spec in config.items()
+        }
+
+        # label별 예시 문장 임베딩 평균 → prototype (L2 정규화)
+        examples = [(label, text) for label, spec in config.items() for text in spec.get("examples", [])]
+        vectors = np.asarray(encode_many([text for _, text in examples]), dtype="float32")
+
+        prototypes = []
+        for label in self.labels:
+            rows = [vectors[i] for i, (l, _) in enumerate(examples) if l == label]
+            proto = np.mean(rows, axis=0)
+            prototypes.append(proto / (np.linalg.norm(proto) or 1.0))
+        self.prototypes = np.stack(prototypes)
+
+    def classify(self, text: str, embedding=None):
+        """
+        반환: (label, confidence 0~1)
+        """
+        normalized = normalize_text(text)
+
+        # 1) 키워드
+        hits = {
+            label: sum(1 for k in keywords if k and k in normalized)
+            for label, keywords in self.keywords.items()
+        }
+        best_hit = max(hits.values())
+        candidates = [label for label, n in hits.items() if n == best_hit] if best_hit else self.labels
+
+        if len(candidates) == 1:
+            return candidates[0], KEYWORD_CONFIDENCE
+
+        if embedding is None:
+            return "일반문의", 0.0
+
+        # 2) 임베딩 최근접 (키워드가 여러 label에 걸렸으면 그 후보 안에서만)
+        idx = [self.labels.index(label) for label in candidates]
+        sims = self.prototypes[idx] @ np.asarray(embedding, dtype="float32")
+        logits = sims / self.temperature
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+
+        best = int(np.argmax(probs))
+        return candidates[best], float(probs[best])
@@ -0,0 +1,370 @@
+# server/agents/llm_provider.py
+import os
+import time
+import random
+import asyncio
+import threading
+from contextvars import ContextVar
+
+import httpx
+import openai
+from openai import OpenAI, AsyncOpenAI
+
+from agents.metrics import LLM_RETRIES
+from agents.admission import AdmissionGate
+
+# ✅ 공용 HTTP 커넥션 풀 / timeout / 재시도 설정 (환경변수로 조정 가능)
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "100"))
+LLM_MAX_KEEPALIVE = int(os.getenv("LLM_MAX_KEEPALIVE", "20"))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+LLM_HTTP2 = os.getenv("LLM_HTTP2", "1") == "1"           # h2 패키지가 있을 때만 적용
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))       # 호출 1번의 최대 시간
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_RETRY_BASE_MS = float(os.getenv("LLM_RETRY_BASE_MS", "200"))
+LLM_RETRY_MAX_MS = float(os.getenv("LLM_RETRY_MAX_MS", "2000"))
+# 남은 예산이 (backoff + 이 값)보다 적으면 재시도하지 않음
+LLM_MIN_ATTEMPT_SECONDS = float(os.getenv("LLM_MIN_ATTEMPT_SECONDS", "0.5"))
+
+# ✅ provider별 동시 LLM 호출 slot (rate limit 보호) - LLM_MAX_IN_FLIGHT_OPENAI처럼 provider별 지정 가능
+LLM_MAX_IN_FLIGHT = int(os.getenv("LLM_MAX_IN_FLIGHT", "64"))
+LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "256"))
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "2.0"))   # 남은 deadline이 더 짧으면 그만큼만
+
+UPSTAGE_BASE_URL = "https://api.upstage.ai/v1"
+
+# 재시도해도 되는 오류 (연결 실패 / timeout / 429 / 5xx)
+RETRYABLE_ERRORS = (
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+    asyncio.TimeoutError,   # python 3.10: wait_for timeout (3.11부터는 TimeoutError와 같음)
+    TimeoutError,
+)
+
+
+class DeadlineExceeded(TimeoutError):
+    """
+    요청 전체 deadline이 지나서 LLM 호출을 시작하지 않음
+    """
+
+
+# ==========================
+# 요청 deadline
+# ==========================
+# 요청 1건 안에서 만든 Task들도 같은 deadline을 공유 (contextvars)
+_deadline = ContextVar("llm_deadline", default=None)
+_budget = ContextVar("llm_budget", default=None)   # (요청 시작 시각, 전체 예산 초)
+
+
+def start_deadline(seconds: float) -> float:
+    """
+    현재 요청의 deadline 설정 → 이후 LLM 호출 timeout / 재시도가 남은 시간 안에서만 동작
+    """
+    started = time.monotonic()
+    deadline = started + seconds
+    _deadline.set(deadline)
+    _budget.set((started, seconds))
+    return deadline
+
+
+def remaining() -> float:
+    deadline = _deadline.get()
+    return float("inf") if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout() -> float:
+    return min(LLM_TIMEOUT, remaining())
+
+
+def stage_remaining(fraction: float) -> float:
+    """
+    stage 예산: 요청 시작 후 (전체 예산 × fraction) 시점까지 남은 시간
+    예) fraction=0.3 → intent는 전체 예산의 앞 30% 안에 끝나야 함
+    """
+    budget = _budget.get()
+    if budget is None:
+        return float("inf")
+    started, seconds = budget
+    return started + seconds * fraction - time.monotonic()
+
+
+def _backoff(attempt: int) -> float:
+    # full jitter: 0 ~ min(max, base * 2^attempt)
+    cap = min(LLM_RETRY_MAX_MS, LLM_RETRY_BASE_MS * (2 ** attempt))
+    return random.uniform(0, cap) / 1000
+
+
+def _next_delay(name: str, attempt: int, error: Exception):
+    """
+    재시도할 수 있으면 대기 시간, 아니면 None
+    """
+    if attempt > LLM_MAX_RETRIES:
+        return None
+    delay = _backoff(attempt)
+    if remaining() < delay + LLM_MIN_ATTEMPT_SECONDS:
+        return None
+    LLM_RETRIES.labels(name).inc()
+    print(f"[LLMProvider] {name} 재시도 {attempt}/{LLM_MAX_RETRIES} ({delay:.2f}s 후): {error!r}")
+    return delay
+
+
+# ==========================
+# provider별 동시 호출 slot
+# ==========================
+_provider_gates = {}
+
+
+def provider_gate(provider: str) -> AdmissionGate:
+    if provider not in _provider_gates:
+        key = provider.upper()
+        _provider_gates[provider] = AdmissionGate(
+            f"llm_{provider}",
+            limit=int(os.getenv(f"LLM_MAX_IN_FLIGHT_{key}", LLM_MAX_IN_FLIGHT)),
+            max_queue=int(os.getenv(f"LLM_MAX_QUEUE_{key}", LLM_MAX_QUEUE)),
+            max_wait=LLM_MAX_QUEUE_WAIT,
+        )
+    return _provider_gates[provider]
+
+
+def gate_stats() -> dict:
+    return {gate.name: gate.stats() for gate in _provider_gates.values()}
+
+
+async def acall(name: str, factory, provider: str = "openai"):
+    """
+    factory(timeout) → awaitable. 남은 deadline 안에서 timeout을 걸고, 일시 오류는 jitter 재시도
+    시도마다 provider slot을 확보 (slot이 안 나면 admission.Overloaded)
+    """
+    gate = provider_gate(provider)
+    attempt = 0
+    while True:
+        timeout = call_timeout()
+        if timeout <= 0:
+            raise DeadlineExceeded(f"{name}: 요청 deadline 초과")
+        try:
+            async with gate.slot(timeout):
+                # slot을 기다린 만큼 남은 시간이 줄어듦
+                timeout = call_timeout()
+                if timeout <= 0:
+                    raise DeadlineExceeded(f"{name}: 요청 deadline 초과")
+                return await asyncio.wait_for(factory(timeout), timeout)
+        except RETRYABLE_ERRORS as e:
+            attempt += 1
+            delay = _next_delay(name, attempt, e)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+
+
+async def astream(name: str, factory, provider: str = "openai"):
+    """
+    streaming 호출: factory(timeout) → awaitable(async iterable)
+    - provider slot은 stream이 끝날 때까지 유지 (토큰을 받는 동안에도 upstream 동시 호출 수에 포함)
+    - stream 열기 ~ 첫 chunk까지는 acall처럼 deadline 안에서 재시도
+    - 이후 chunk는 남은 deadline(LLM_TIMEOUT 이하) 안에 와야 함 → 넘기면 DeadlineExceeded
+      (토큰을 보내기 시작한 뒤에는 재시도하지 않음)
+    """
+    gate = provider_gate(provider)
+    attempt = 0
+    while True:
+        timeout = call_timeout()
+        if timeout <= 0:
+            raise DeadlineExceeded(f"{name}: 요청 deadline 초과")
+        ticket = await gate.admit(timeout)
+        stream = iterator = None
+        try:
+            timeout = call_timeout()
+            if timeout <= 0:
+                raise DeadlineExceeded(f"{name}: 요청 deadline 초과")
+
+            async def open_stream():
+                nonlocal stream, iterator
+                stream = await factory(timeout)
+                iterator = stream.__aiter__()
+                return await iterator.__anext__()
+
+            first = await asyncio.wait_for(open_stream(), timeout)
+            break
+        except StopAsyncIteration:
+            ticket.release()
+            return
+        except RETRYABLE_ERRORS as e:
+            ticket.release()
+            await _aclose(iterator, stream)
+            attempt += 1
+            delay = _next_delay(name, attempt, e)
+            if delay is None:
+                raise
+            await asyncio.sleep(delay)
+        except BaseException:
+            ticket.release()
+            await _aclose(iterator, stream)
+            raise
+
+    try:
+        chunk = first
+        while True:
+            yield chunk
+            timeout = call_timeout()
+            if timeout <= 0:
+                raise DeadlineExceeded(f"{name}: streaming 중 요청 deadline 초과")
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded(f"{name}: streaming 중 요청 deadline 초과")
+    finally:
+        ticket.release()
+        await _aclose(iterator, stream)
+
+
+async def _aclose(*streams):
+    # 중간에 끝난 stream의 HTTP 응답 정리 (openai AsyncStream.close / async generator.aclose)
+    for stream in streams:
+        close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+        if close is None:
+            continue
+        try:
+            await close()
+        except Exception:
+            pass
+
+
+def call(name: str, factory):
+    """
+    acall의 sync 버전 (timeout은 factory가 클라이언트 호출에 넘겨서 적용)
+    """
+    attempt = 0
+    while True:
+        timeout = call_timeout()
+        if timeout <= 0:
+            raise DeadlineExceeded(f"{name}: 요청 deadline 초과")
+        try:
+            return factory(timeout)
+        except RETRYABLE_ERRORS as e:
+            attempt += 1
+            delay = _next_delay(name, attempt, e)
+            if delay is None:
+                raise
+            time.sleep(delay)
+
+
+# ==========================
+# 공용 HTTP 클라이언트 (프로세스당 sync 1개 + async 1개)
+# ==========================
+_lock = threading.RLock()   # _cached_openai 안에서 http_client()를 다시 잡음
+_http_client = None
+_async_http_client = None
+_openai_clients = {}
+
+
+def _http2_enabled() -> bool:
+    if not LLM_HTTP2:
+        return False
+    try:
+        import h2  # noqa: F401  (선택 의존성: httpx[http2])
+        return True
+    except ImportError:
+        return False
+
+
+def _client_options() -> dict:
+    return {
+        "http2": _http2_enabled(),
+        "limits": httpx.Limits(
+            max_connections=LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_MAX_KEEPALIVE,
+            keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+    }
+
+
+def http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None:
+        with _lock:
+            if _http_client is None:
+                _http_client = httpx.Client(**_client_options())
+    return _http_client
+
+
+def async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    if _async_http_client is None:
+        with _lock:
+            if _async_http_client is None:
+                _async_http_client = httpx.AsyncClient(**_client_options())
+    return _async_http_client
+
+
+def openai_client(api_key: str = None, base_url: str = None) -> OpenAI:
+    """
+    같은 (api_key, base_url)이면 같은 OpenAI 인스턴스 (재시도는 call()에서 처리)
+    """
+    return _cached_openai(OpenAI, http_client, api_key, base_url)
+
+
+def async_openai_client(api_key: str = None, base_url: str = None) -> AsyncOpenAI:
+    return _cached_openai(AsyncOpenAI, async_http_client, api_key, base_url)
+
+
+def _cached_openai(cls, http_client_factory, api_key, base_url):
+    key = (cls, api_key, base_url)
+    if key not in _openai_clients:
+        with _lock:
+            if key not in _openai_clients:
+                _openai_clients[key] = cls(
+                    api_key=api_key or os.getenv("OPENAI_API_KEY"),
+                    base_url=base_url,
+                    http_client=http_client_factory(),
+                    max_retries=0,
+                    timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                )
+    return _openai_clients[key]
+
+
+# ==========================
+# LangChain 모델
+# ==========================
+def chat_model(**kwargs):
+    """
+    공용 커넥션 풀을 쓰는 ChatOpenAI (재시도는 acall / call에서 처리)
+    """
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(
+        http_client=http_client(),
+        http_async_client=async_http_client(),
+        max_retries=0,
+        **kwargs,
+    )
+
+
+def embeddings_model(**kwargs):
+    """
+    공용 커넥션 풀을 쓰는 OpenAIEmbeddings
+    (인덱스 빌드 등 요청 밖에서도 쓰이므로 LangChain 기본 재시도 유지)
+    """
+    from langchain_openai import OpenAIEmbeddings
+
+    return OpenAIEmbeddings(
+        http_client=http_client(),
+        http_async_client=async_http_client(),
+        **kwargs,
+    )
+
+
+async def aclose():
+    """
+    서버 종료 시 커넥션 정리
+    """
+    global _http_client, _async_http_client
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+    _http_client = _async_http_client = None
+    _openai_clients.clear()
@@ -0,0 +1,164 @@
+# server/agents/local_retriever.py
+import os
+import re
+import json
+import math
+import asyncio
+from collections import Counter
+
+import numpy as np
+
+from agents.response_cache import ResponseCache, normalize_text
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+POLICY_ROUTES_PATH = os.path.join(BASE_DIR, "config", "policy_routes.json")
+
+# ✅ hybrid 점수 = (1 - alpha) × BM25(정규화) + alpha × cosine (dense 사용 시)
+RETRIEVER_ALPHA = float(os.getenv("POLICY_RETRIEVER_ALPHA", "0.3"))
+RETRIEVER_TOP_K = int(os.getenv("POLICY_RETRIEVER_TOP_K", "4"))
+QUERY_CACHE_SIZE = int(os.getenv("POLICY_QUERY_CACHE_SIZE", "1024"))
+
+_WORD_RE = re.compile(r"[0-9a-zA-Z가-힣]+")
+
+
+def tokenize(text: str) -> list:
+    """
+    BM25용 토큰: 어절 + 글자 bigram
+    (조사가 붙어도 "환불은" / "환불이" 가 "환불" bigram으로 매칭됨)
+    """
+    tokens = []
+    for word in _WORD_RE.findall(text.lower()):
+        tokens.append(word)
+        if len(word) > 2:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
+
+
+class LocalPolicyRetriever:
+    """
+    정책 chunk 로컬 검색 (질의마다 임베딩 API를 호출하지 않음)
+
+    - BM25: 어절 + bigram 토큰
+    - dense (선택): encode_many(KoBERT mean-pooled 임베딩 등)로 chunk 벡터를 미리 계산,
+      질의 벡터는 감정 분석 forward에서 나온 임베딩을 그대로 쓰거나 캐시에서 재사용
+    - intent prefilter: config/policy_routes.json에 있는 intent면 해당 정책 파일 chunk만 검색
+    """
+
+    def __init__(self, documents, encode_many=None, routes_path: str = POLICY_ROUTES_PATH,
+                 alpha: float = RETRIEVER_ALPHA, k: int = RETRIEVER_TOP_K, k1: float = 1.5, b: float = 0.75):
+        self.documents = list(documents)
+        self.alpha = alpha
+        self.k = k
+        self.k1 = k1
+        self.b = b
+
+        with open(routes_path, encoding="utf-8") as f:
+            self.routes = json.load(f)
+
+        # BM25 통계
+        self.term_freqs = [Counter(tokenize(doc.page_content)) for doc in self.documents]
+        self.doc_lens = np.asarray([sum(tf.values()) for tf in self.term_freqs], dtype="float32")
+        self.avg_len = float(self.doc_lens.mean()) if len(self.documents) else 0.0
+        doc_freq = Counter(term for tf in self.term_freqs for term in tf)
+        n = len(self.documents)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()
+        }
+
+        # dense (선택)
+        self.encode_many = encode_many
+        self.vectors = None
+        self.query_cache = None
+        if encode_many is not None and self.documents:
+            self.vectors = np.asarray(
+                encode_many([doc.page_content for doc in self.documents]), dtype="float32"
+            )
+            self.query_cache = ResponseCache(
+                "policy_query", max_size=QUERY_CACHE_SIZE, ttl_seconds=float("inf")
+            )
+
+    @property
+    def dense(self) -> bool:
+        return self.vectors is not None
+
+    # -----------------------------
+    # 검색
+    # -----------------------------
+    def _candidates(self, intent):
+        sources = self.routes.get(intent) if intent else None
+        if not sources:
+            return list(range(len(self.documents)))
+        idx = [i for i, doc in enumerate(self.documents) if doc.metadata.get("source") in sources]
+        return idx or list(range(len(self.documents)))
+
+    def _bm25(self, query: str, idx: list) -> np.ndarray:
+        scores = np.zeros(len(idx), dtype="float32")
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for j, i in enumerate(idx):
+                tf = self.term_freqs[i].get(term, 0)
+                if tf:
+                    norm = self.k1 * (1 - self.b + self.b * self.doc_lens[i] / self.avg_len)
+                    scores[j] += idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def _cached_query_vector(self, query: str):
+        return self.query_cache.get((normalize_text(query),))
+
+    def _encode_query(self, query: str):
+        vector = np.asarray(self.encode_many([query])[0], dtype="float32")
+        self.query_cache.set((normalize_text(query),), vector)
+        return vector
+
+    def _rank(self, query: str, intent, embedding, k):
+        idx = self._candidates(intent)
+        if not idx:
+            # 정책 chunk가 하나도 없으면 (빈 policies/ 등) 검색 결과 없음
+            return []
+        scores = self._bm25(query, idx)
+        if scores.max() > 0:
+            scores /= scores.max()
+
+        if self.dense and embedding is not None:
+            sims = self.vectors[idx] @ np.asarray(embedding, dtype="float32")
+            scores = (1 - self.alpha) * scores + self.alpha * np.clip(sims, 0.0, 1.0)
+
+        order = np.argsort(-scores, kind="stable")[: k or self.k]
+        return [self.documents[idx[j]] for j in order]
+
+    def search(self, query: str, intent: str = None, embedding=None, k: int = None) -> list:
+        """
+        embedding: 질의 문장 임베딩 (감정 분석 forward 결과, 없으면 캐시 → encode_many)
+        """
+        if self.dense and embedding is None:
+            embedding = self._cached_query_vector(query)
+            if embedding is None:
+                embedding = self._encode_query(query)
+        return self._rank(query, intent, embedding, k)
+
+    async def asearch(self, query: str, intent: str = None, embedding=None, k: int = None) -> list:
+        if self.dense and embedding is None:
+            embedding = self._cached_query_vector(query)
+            if embedding is None:
+                # 배치 엔진 결과를 기다리는 동안 이벤트 루프를 막지 않음
+                embedding = await asyncio.to_thread(self._encode_query, query)
+        return self._rank(query, intent, embedding, k)
+
+
+class FaissPolicyRetriever:
+    """
+    기존 OpenAI 임베딩 + FAISS 검색 (POLICY_RETRIEVER=faiss)
+    LocalPolicyRetriever와 같은 search / asearch 인터페이스 (intent / embedding / k는 사용하지 않음)
+    """
+
+    def __init__(self, vectordb, k: int = RETRIEVER_TOP_K):
+        self.vectordb = vectordb
+        self.retriever = vectordb.as_retriever(search_kwargs={"k": k})
+
+    def search(self, query: str, intent: str = None, embedding=None, k: int = None) -> list:
+        return self.retriever.get_relevant_documents(query)
+
+    async def asearch(self, query: str, intent: str = None, embedding=None, k: int = None) -> list:
+        return await self.retriever.aget_relevant_documents(query)
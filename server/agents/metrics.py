@@ -0,0 +1,215 @@
+# server/agents/metrics.py
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+# 🔹 1이면 응답에 X-Timing 헤더로 stage별 소요 시간(ms) 첨부 (디버깅용)
+TIMING_HEADER = os.getenv("TIMING_HEADER", "0") == "1"
+
+# 🔹 gunicorn 등 멀티 워커면 PROMETHEUS_MULTIPROC_DIR를 지정해야 워커 합산 값이 나옴
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+
+# ==========================
+# 메트릭 정의
+# ==========================
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_SECONDS = Histogram(
+    "ai_stage_seconds",
+    "Agent stage별 소요 시간 (emotion_forward, intent_llm, guide_llm, calm_llm ...)",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "ai_request_seconds",
+    "HTTP 요청 처리 시간 (streaming은 헤더 전송까지)",
+    ["path"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_FLIGHT = Gauge(
+    "ai_in_flight_requests",
+    "처리 중인 HTTP 요청 수",
+    multiprocess_mode="livesum",
+)
+LLM_TOKENS = Counter(
+    "ai_llm_tokens_total",
+    "LLM 토큰 사용량",
+    ["agent", "kind"],   # kind: prompt | completion
+)
+LLM_RETRIES = Counter(
+    "ai_llm_retries_total",
+    "일시 오류로 재시도한 LLM 호출 수",
+    ["agent"],
+)
+DEGRADED_STAGES = Counter(
+    "ai_degraded_stages_total",
+    "시간 예산 초과 / 실패로 템플릿 응답으로 대체된 stage 수",
+    ["stage"],
+)
+COMBINED_FALLBACKS = Counter(
+    "ai_combined_fallbacks_total",
+    "combined(대응문 + 피드백 1회) 응답 검증 실패로 2회 호출로 돌아간 수",
+)
+LIVE_CALLS = Gauge(
+    "ai_live_calls",
+    "연결 중인 /ws/call WebSocket 수",
+    multiprocess_mode="livesum",
+)
+LIVE_TURNS = Counter(
+    "ai_live_turns_total",
+    "/ws/call 발화 처리 결과",
+    ["result"],   # result: done | superseded | error | shed
+)
+SINGLEFLIGHT_CALLS = Counter(
+    "ai_singleflight_calls_total",
+    "동일 입력 LLM 호출 coalescing 결과",
+    ["flight", "role"],   # role: leader (실제 호출) | follower (진행 중인 호출 결과 공유)
+)
+SINGLEFLIGHT_IN_FLIGHT = Gauge(
+    "ai_singleflight_in_flight",
+    "진행 중인 고유 LLM 호출 수",
+    ["flight"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_ACTIVE = Gauge(
+    "ai_admission_active",
+    "gate별 실행 중인 작업 수 (request / llm_<provider>)",
+    ["gate"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "ai_admission_queue_depth",
+    "gate별 대기열 길이 (emotion은 KoBERT 배치 큐)",
+    ["gate"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "ai_admission_wait_seconds",
+    "gate별 대기열에서 기다린 시간",
+    ["gate"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_SHED = Counter(
+    "ai_admission_shed_total",
+    "과부하로 거절한 요청 수",
+    ["gate", "reason"],   # reason: queue_full | wait_timeout
+)
+COMPONENT_RELOADS = Counter(
+    "ai_component_reloads_total",
+    "모델 / 정책 인덱스 hot reload 결과",
+    ["component", "result"],   # result: swapped | failed
+)
+CACHE_LOOKUPS = Counter(
+    "ai_cache_lookups_total",
+    "ResponseCache 조회 결과",
+    ["cache", "result"],   # result: hit | semantic_hit | miss
+)
+EMOTION_BATCH_SIZE = Histogram(
+    "ai_emotion_batch_size",
+    "KoBERT forward 1번에 묶인 요청 수",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+
+
+# ==========================
+# Stage span
+# ==========================
+# 요청 단위 stage 시간 모음 (X-Timing 헤더용, 요청 밖에서는 None)
+_timings = ContextVar("stage_timings", default=None)
+
+
+def observe(stage: str, seconds: float):
+    STAGE_SECONDS.labels(stage).observe(seconds)
+    timings = _timings.get()
+    if timings is not None:
+        # 배치 요청처럼 같은 stage가 여러 번 돌면 합산
+        timings[stage] = timings.get(stage, 0.0) + seconds
+
+
+@contextmanager
+def span(stage: str):
+    """
+    with span("guide_llm"): ...  → 소요 시간을 히스토그램 + 현재 요청의 timing에 기록
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def start_timing() -> dict:
+    """
+    요청 시작 시 호출: 이후 같은 컨텍스트(및 그 안에서 만든 Task)의 span이 이 dict에 모임
+    """
+    timings = {}
+    _timings.set(timings)
+    return timings
+
+
+def format_timings(timings: dict) -> str:
+    # 예: "emotion;dur=12.3, intent_llm;dur=410.2, total;dur=980.5"
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in timings.items())
+
+
+# ==========================
+# 토큰 / 캐시
+# ==========================
+def record_usage(agent: str, usage):
+    """
+    usage: OpenAI 응답의 usage 객체 또는 {"prompt_tokens", "completion_tokens"} dict
+    """
+    if not usage:
+        return
+    if not isinstance(usage, dict):
+        usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+    for kind in ("prompt", "completion"):
+        tokens = usage.get(f"{kind}_tokens")
+        if tokens:
+            LLM_TOKENS.labels(agent, kind).inc(tokens)
+
+
+class TokenUsageCallback(BaseCallbackHandler):
+    """
+    LangChain LLM(ChatOpenAI) 호출의 토큰 사용량을 LLM_TOKENS에 기록
+    (streaming 호출은 llm_output에 usage가 없어서 집계되지 않음)
+    """
+
+    def __init__(self, agent: str):
+        self.agent = agent
+
+    def on_llm_end(self, response, **kwargs):
+        record_usage(self.agent, (response.llm_output or {}).get("token_usage"))
+
+
+def record_cache_lookup(cache: str, result: str):
+    CACHE_LOOKUPS.labels(cache, result).inc()
+
+
+# ==========================
+# /metrics 출력
+# ==========================
+def render_latest():
+    """
+    반환: (본문 bytes, content-type)
+    """
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -1,33 +1,285 @@
 import os
+import json
+import fcntl
+import hashlib
+import threading
+from contextlib import contextmanager
+
+import faiss
+import numpy as np
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_community.vectorstores import FAISS
-from langchain_openai import OpenAIEmbeddings
-from langchain_community.document_loaders import TextLoader
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_core.documents import Document
+from agents import llm_provider
+from agents.local_retriever import LocalPolicyRetriever, FaissPolicyRetriever
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 POLICY_DIR = os.path.join(BASE_DIR, "..", "policies")
 
-def build_retriever():
-    # 1) 문서 로드
-    docs = []
-    for filename in os.listdir(POLICY_DIR):
+# 🔹 임베딩/인덱스 저장 위치 (워커가 시작할 때마다 다시 임베딩하지 않도록 디스크에 보관)
+INDEX_DIR = os.getenv(
+    "POLICY_INDEX_DIR", os.path.join(BASE_DIR, "..", ".cache", "policy_index")
+)
+CHUNK_DIR = os.path.join(INDEX_DIR, "chunks")
+
+# 🔹 검색 엔진: local (BM25 + 선택적 KoBERT dense, 기본) | faiss (OpenAI 임베딩)
+POLICY_RETRIEVER = os.getenv("POLICY_RETRIEVER", "local")
+# 🔹 local 검색에서 KoBERT 문장 임베딩 점수도 섞을지
+POLICY_RETRIEVER_DENSE = os.getenv("POLICY_RETRIEVER_DENSE", "0") == "1"
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _policy_files():
+    """
+    (파일명, 내용, 내용 hash) 리스트 (파일명 순 정렬 → hash가 항상 같게)
+    """
+    files = []
+    for filename in sorted(os.listdir(POLICY_DIR)):
         if filename.endswith(".txt"):
-            loader = TextLoader(os.path.join(POLICY_DIR, filename), encoding="utf-8")
-            docs.extend(loader.load())
+            with open(os.path.join(POLICY_DIR, filename), "rb") as f:
+                raw = f.read()
+            files.append((filename, raw.decode("utf-8"), _sha256(raw)))
+    return files
+
+
+def policy_fingerprint() -> str:
+    """
+    정책 파일(이름, 크기, 수정 시각) hash - 내용을 읽지 않고 변경 여부만 빠르게 확인 (hot reload 감시용)
+    """
+    files = []
+    for filename in sorted(os.listdir(POLICY_DIR)):
+        if filename.endswith(".txt"):
+            stat = os.stat(os.path.join(POLICY_DIR, filename))
+            files.append([filename, stat.st_size, stat.st_mtime_ns])
+    return _sha256(json.dumps(files).encode("utf-8"))[:12]
+
+
+def _load_or_embed_file(filename, text, file_key, splitter, embeddings):
+    """
+    파일 1개의 chunk + 임베딩을 캐시에서 읽고, 없으면(=내용이 바뀐 파일) 새로 임베딩 후 저장
+    """
+    chunk_path = os.path.join(CHUNK_DIR, f"{file_key}.json")
+    vector_path = os.path.join(CHUNK_DIR, f"{file_key}.npy")
+
+    if os.path.exists(chunk_path) and os.path.exists(vector_path):
+        with open(chunk_path, encoding="utf-8") as f:
+            chunks = json.load(f)
+        vectors = np.load(vector_path, mmap_mode="r")
+        return chunks, vectors
+
+    print(f"[PolicyRAG] 정책 파일 임베딩: {filename}")
+    docs = splitter.split_documents(
+        [Document(page_content=text, metadata={"source": filename})]
+    )
+    chunks = [{"page_content": d.page_content, "metadata": d.metadata} for d in docs]
+    vectors = np.asarray(
+        embeddings.embed_documents([c["page_content"] for c in chunks]),
+        dtype="float32",
+    )
+
+    # tmp에 쓴 뒤 os.replace → 다른 워커가 반쯤 쓰인 파일을 읽지 않음
+    # (vector를 먼저 두고 chunk json을 마지막에 두므로 json이 보이면 npy도 완성된 상태)
+    os.makedirs(CHUNK_DIR, exist_ok=True)
+    tmp_suffix = f".{os.getpid()}.tmp"
+    with open(vector_path + tmp_suffix, "wb") as f:
+        np.save(f, vectors)
+    os.replace(vector_path + tmp_suffix, vector_path)
+    with open(chunk_path + tmp_suffix, "w", encoding="utf-8") as f:
+        json.dump(chunks, f, ensure_ascii=False)
+    os.replace(chunk_path + tmp_suffix, chunk_path)
+
+    return chunks, vectors
+
+
+@contextmanager
+def _index_lock():
+    """
+    INDEX_DIR 파일 lock (워커 간)
+    캐시를 읽고 / 임베딩하고 / 이전 버전을 지우는 동안 다른 워커가 지울 파일을 읽지 않도록 직렬화
+    (같은 파일을 여러 워커가 동시에 임베딩하는 중복 API 호출도 막음)
+    """
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    with open(os.path.join(INDEX_DIR, ".lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
 
-    # 2) chunk
-    splitter = RecursiveCharacterTextSplitter(
+def _read_index(index_path):
+    # 가능하면 mmap으로 읽어서 워커 간 page cache 공유
+    try:
+        return faiss.read_index(index_path, faiss.IO_FLAG_MMAP)
+    except RuntimeError:
+        return faiss.read_index(index_path)
+
+
+def _splitter():
+    return RecursiveCharacterTextSplitter(
         chunk_size=500,
         chunk_overlap=100,
     )
-    split_docs = splitter.split_documents(docs)
 
-    # 3) Embeddings
-    embeddings = OpenAIEmbeddings()
 
-    # 4) Vector DB: FAISS 사용
-    vectordb = FAISS.from_documents(split_docs, embeddings)
+def build_local_index(encode_many=None):
+    """
+    로컬 검색 인덱스 (chunk 분할만 하므로 임베딩 API 호출 없음)
+    encode_many: 주면 chunk 문장 임베딩을 계산해서 hybrid 검색
+    반환: (LocalPolicyRetriever, 인덱스 버전 hash)
+    """
+    splitter = _splitter()
+    docs, file_hashes = [], []
+    for filename, text, content_hash in _policy_files():
+        docs.extend(splitter.split_documents(
+            [Document(page_content=text, metadata={"source": filename})]
+        ))
+        file_hashes.append(content_hash)
+
+    mode = "hybrid" if encode_many is not None else "bm25"
+    settings_key = f"local:{mode}:{splitter._chunk_size}:{splitter._chunk_overlap}"
+    version = _sha256(f"{settings_key}:{':'.join(file_hashes)}".encode())[:16]
+
+    print(f"[PolicyRAG] 로컬 검색 인덱스 ({mode}): chunk {len(docs)}개")
+    return LocalPolicyRetriever(docs, encode_many=encode_many), version
+
+
+def build_index():
+    """
+    정책 FAISS 인덱스를 로드 (없거나 정책 파일이 바뀌었으면 바뀐 파일만 다시 임베딩 후 저장)
+    반환: (FAISS vectorstore, 인덱스 버전 hash)
+    """
+    # 1) 설정
+    splitter = _splitter()
+    embeddings = get_embeddings()
+
+    # 임베딩 모델 / chunk 설정이 바뀌면 캐시도 무효
+    settings_key = f"{embeddings.model}:{splitter._chunk_size}:{splitter._chunk_overlap}"
+
+    # 2) 파일별 chunk + 임베딩 (바뀐 파일만 새로 임베딩) → 전체 인덱스 (워커 간 lock)
+    files = _policy_files()
+    with _index_lock():
+        all_chunks, index, version = _load_or_build_index(files, settings_key, splitter, embeddings)
+
+    # 3) Vector DB: FAISS 사용
+    docstore = InMemoryDocstore({
+        str(i): Document(page_content=c["page_content"], metadata=c["metadata"])
+        for i, c in enumerate(all_chunks)
+    })
+    vectordb = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id={i: str(i) for i in range(len(all_chunks))},
+    )
+
+    return vectordb, version
+
+
+def _load_or_build_index(files, settings_key, splitter, embeddings):
+    """
+    (_index_lock 안에서 호출) 반환: (전체 chunk, FAISS index, 인덱스 버전 hash)
+    """
+    all_chunks, all_vectors, file_keys = [], [], []
+    for filename, text, content_hash in files:
+        file_key = _sha256(f"{settings_key}:{content_hash}".encode())
+        chunks, vectors = _load_or_embed_file(filename, text, file_key, splitter, embeddings)
+        all_chunks.extend(chunks)
+        all_vectors.append(vectors)
+        file_keys.append(file_key)
+
+    # 전체 인덱스: 파일 hash 조합이 같으면 저장된 인덱스를 그대로 사용
+    version = _sha256(":".join(file_keys).encode())[:16]
+    index_path = os.path.join(INDEX_DIR, f"{version}.faiss")
+
+    if os.path.exists(index_path):
+        index = _read_index(index_path)
+    else:
+        vectors = np.concatenate(all_vectors).astype("float32")
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+
+        os.makedirs(INDEX_DIR, exist_ok=True)
+        tmp_path = f"{index_path}.{os.getpid()}.tmp"
+        faiss.write_index(index, tmp_path)
+        os.replace(tmp_path, index_path)  # 다른 워커가 쓰는 중인 파일을 읽지 않도록 atomic 교체
+
+        # 이전 버전 인덱스 / 더 이상 없는 파일의 chunk 캐시 정리 (lock 안이므로 읽는 중인 워커 없음,
+        # 이미 mmap으로 연 워커는 파일이 지워져도 계속 읽을 수 있음)
+        for name in os.listdir(INDEX_DIR):
+            if name.endswith(".faiss") and name != os.path.basename(index_path):
+                os.remove(os.path.join(INDEX_DIR, name))
+        for name in os.listdir(CHUNK_DIR):
+            if name.split(".")[0] not in file_keys:
+                os.remove(os.path.join(CHUNK_DIR, name))
+
+    return all_chunks, index, version
+
+
+def build_retriever(encode_many=None):
+    """
+    POLICY_RETRIEVER 설정에 맞는 검색기 → (search / asearch 지원 검색기, 인덱스 버전)
+    """
+    if POLICY_RETRIEVER == "local":
+        return build_local_index(encode_many if POLICY_RETRIEVER_DENSE else None)
+    if POLICY_RETRIEVER == "faiss":
+        vectordb, version = build_index()
+        return FaissPolicyRetriever(vectordb), f"faiss:{version}"
+    raise ValueError(f"지원하지 않는 POLICY_RETRIEVER: {POLICY_RETRIEVER}")
+
+
+# 🔹 import 시점이 아니라 처음 필요할 때 1번만 로딩
+_policy_index = None
+_policy_index_lock = threading.Lock()
+_embeddings = None
+
+
+def get_embeddings():
+    """
+    OpenAI 임베딩 (faiss 검색 / semantic 응답 캐시용) - 프로세스당 1개
+    """
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = llm_provider.embeddings_model()
+    return _embeddings
+
+
+def get_policy_index(encode_many=None):
+    """
+    (정책 검색기, 인덱스 버전) - 프로세스당 1번만 로딩
+    encode_many: POLICY_RETRIEVER_DENSE=1일 때 chunk / 질의 임베딩에 사용 (처음 로딩할 때만 반영)
+    """
+    global _policy_index
+    if _policy_index is None:
+        with _policy_index_lock:
+            if _policy_index is None:
+                _policy_index = build_retriever(encode_many)
+    return _policy_index
+
+
+def set_policy_index(policy_index):
+    """
+    registry가 새 버전 인덱스로 교체할 때 호출 (이미 검색 중인 요청은 이전 검색기로 끝남)
+    """
+    global _policy_index
+    with _policy_index_lock:
+        _policy_index = policy_index
+
+
+def get_policy_retriever():
+    retriever, _ = get_policy_index()
+    return retriever
+
+
+def get_policy_index_version() -> str:
+    _, version = get_policy_index()
+    return version
 
-    return vectordb.as_retriever()
 
-POLICY_RETRIEVER = build_retriever()
+if __name__ == "__main__":
+    # 배포 전 빌드 단계: python -m agents.policy_rag
+    print(f"[PolicyRAG] 인덱스 준비 완료: {INDEX_DIR} (version={get_policy_index_version()})")
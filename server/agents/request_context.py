@@ -0,0 +1,88 @@
+# server/agents/request_context.py
+import asyncio
+
+
+class RequestContext:
+    """
+    요청 1건 동안 여러 에이전트(stage)가 함께 읽고 쓰는 결과 저장소.
+    같은 key("calm", "policy", "intent" ...)의 결과는 요청당 최대 1번만 계산된다.
+    """
+
+    def __init__(self):
+        self._values = {}  # key -> 완료된 결과
+        self._tasks = {}   # key -> 진행 중인 asyncio.Task
+
+    def __contains__(self, key):
+        return key in self._values or key in self._tasks
+
+    def get(self, key, default=None):
+        return self._values.get(key, default)
+
+    def set(self, key, value):
+        self._values[key] = value
+
+    # -----------------------------
+    # sync: 없으면 계산 후 저장
+    # -----------------------------
+    def compute(self, key, fn):
+        if key not in self._values:
+            self._values[key] = fn()
+        return self._values[key]
+
+    # -----------------------------
+    # async: 결과를 기다리지 않고 계산만 시작 (이미 시작됐으면 그대로 재사용)
+    # -----------------------------
+    def start(self, key, factory):
+        task = self._tasks.get(key)
+        if task is not None and _failed(task):
+            # 실패/취소된 결과는 재사용하지 않고 다시 계산
+            task = None
+        if task is None and key not in self._values:
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(_consume_exception)
+            self._tasks[key] = task
+        return task
+
+    def attach(self, key, task):
+        """
+        다른 컨텍스트에서 이미 시작한 Task를 같은 key로 공유 (배치 처리 등)
+        """
+        if key not in self:
+            self._tasks[key] = task
+
+    # -----------------------------
+    # async: 없으면 계산하고, 진행 중이면 그 결과를 함께 기다림
+    # -----------------------------
+    async def acompute(self, key, factory):
+        if key in self._values:
+            return self._values[key]
+
+        task = self.start(key, factory)
+        try:
+            # 기다리던 쪽이 stage 예산 초과(wait_for)로 취소돼도 같은 key를 기다리는 다른 stage의 Task는 유지
+            # (끝나지 않은 Task는 요청이 끝날 때 cancel_pending에서 정리)
+            value = await asyncio.shield(task)
+        except BaseException:
+            if _failed(task) and self._tasks.get(key) is task:
+                del self._tasks[key]
+            raise
+        self._values[key] = value
+        return value
+
+    def cancel_pending(self):
+        """
+        요청이 실패/취소됐을 때 아직 끝나지 않은 stage 정리
+        """
+        for task in self._tasks.values():
+            if not task.done():
+                task.cancel()
+
+
+def _failed(task) -> bool:
+    return task.done() and (task.cancelled() or task.exception() is not None)
+
+
+def _consume_exception(task):
+    # shield로 기다리던 쪽이 먼저 빠져도 "exception was never retrieved" 경고가 나지 않도록
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,174 @@
+# server/agents/response_cache.py
+import re
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from agents.metrics import record_cache_lookup
+
+# 🔹 정규화 시 제거할 문장부호 / 반복 공백
+_PUNCT_RE = re.compile(r"[\s\.,!?~…·'\"“”‘’]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    캐시 key용 정규화: 공백/문장부호 제거 + 소문자
+    ("배송이 언제 오나요?" == "배송이 언제 오나요")
+    """
+    return _PUNCT_RE.sub("", text).lower()
+
+
+def emotion_bucket(emotion_label: str, emotion_score: float) -> str:
+    """
+    감정 점수를 그대로 key에 넣으면 hit가 거의 없으므로 planner 기준(0.6)으로 구간화
+    """
+    level = "high" if emotion_score >= 0.6 else "low"
+    return f"{emotion_label}:{level}"
+
+
+class ResponseCache:
+    """
+    LLM 응답 캐시 (LRU + TTL)
+
+    - key: (정규화 텍스트, *scope) 튜플. scope는 intent / 감정 구간 등
+    - version: 정책 인덱스 버전 등, 바뀌면 전체 무효화
+    - embeddings_factory를 주면 정확히 같은 key가 없을 때 같은 scope 안에서
+      임베딩 cosine 유사도로 비슷한 발화를 찾는다 (semantic lookup)
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_size: int = 2048,
+        ttl_seconds: float = 3600,
+        embeddings_factory=None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.embeddings_factory = embeddings_factory
+        self.similarity_threshold = similarity_threshold
+
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._vectors = {}             # key -> 정규화된 임베딩 (semantic lookup용)
+        self._lock = threading.Lock()
+        self._version = None
+
+        # metrics
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # -----------------------------
+    # 기본 LRU + TTL
+    # -----------------------------
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    record_cache_lookup(self.name, "hit")
+                    return value
+                self._remove(key)
+            self.misses += 1
+        # semantic 캐시는 alookup에서 유사 발화 검색까지 끝난 뒤 최종 결과로 집계
+        if not self.semantic:
+            record_cache_lookup(self.name, "miss")
+        return None
+
+    def set(self, key, value, vector=None):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            if vector is not None:
+                self._vectors[key] = vector
+
+            while len(self._entries) > self.max_size:
+                oldest, _ = self._entries.popitem(last=False)
+                self._vectors.pop(oldest, None)
+                self.evictions += 1
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        self._vectors.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._vectors.clear()
+
+    def check_version(self, version):
+        """
+        정책 파일 등 응답에 영향을 주는 데이터가 바뀌면 전체 무효화
+        """
+        if version == self._version:
+            return
+        with self._lock:
+            if version != self._version:
+                if self._version is not None:
+                    self.invalidations += 1
+                self._entries.clear()
+                self._vectors.clear()
+                self._version = version
+
+    # -----------------------------
+    # semantic lookup (옵션)
+    # -----------------------------
+    @property
+    def semantic(self) -> bool:
+        return self.embeddings_factory is not None
+
+    async def alookup(self, key, text: str):
+        """
+        정확히 같은 key → 없으면 (semantic이 켜져 있을 때) 같은 scope의 유사 발화 검색
+        반환: (value 또는 None, 저장할 때 넘길 vector 또는 None)
+        """
+        value = self.get(key)
+        if value is not None or not self.semantic:
+            return value, None
+
+        embeddings = self.embeddings_factory()
+        vector = np.asarray(await embeddings.aembed_query(text), dtype="float32")
+        vector /= np.linalg.norm(vector) or 1.0
+
+        scope = key[1:]
+        now = time.monotonic()
+        best_key, best_sim = None, self.similarity_threshold
+        with self._lock:
+            for other_key, other_vector in self._vectors.items():
+                if other_key[1:] != scope or self._entries[other_key][1] <= now:
+                    continue
+                sim = float(np.dot(vector, other_vector))
+                if sim >= best_sim:
+                    best_key, best_sim = other_key, sim
+
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                # get()에서 miss로 집계된 것을 semantic hit로 정정
+                self.misses -= 1
+                self.semantic_hits += 1
+                record_cache_lookup(self.name, "semantic_hit")
+                return self._entries[best_key][0], vector
+
+        record_cache_lookup(self.name, "miss")
+        return None, vector
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.semantic_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.semantic_hits) / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
@@ -0,0 +1,183 @@
+# server/agents/session_store.py
+import os
+import time
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+
+# ✅ 세션 정리 기준 (환경변수로 조정 가능)
+SESSION_IDLE_TTL = float(os.getenv("EMOTION_SESSION_TTL", "1800"))      # 마지막 발화 후 30분
+SESSION_MAX_SIZE = int(os.getenv("EMOTION_SESSION_MAX_SIZE", "10000"))  # 최대 세션 수
+SESSION_CLEANUP_SECONDS = float(os.getenv("EMOTION_SESSION_CLEANUP_SECONDS", "60"))  # sqlite 만료 정리 주기
+
+
+class MemorySessionStore:
+    """
+    프로세스 내부 세션 저장소 (기본값)
+    - 세션별 점수 window를 array('f')로 보관 (float 4byte)
+    - idle TTL이 지났거나 max_size를 넘으면 오래된 세션부터 제거 (LRU)
+    """
+
+    # 메모리 연산만 하므로 이벤트 루프에서 바로 호출
+    blocking = False
+
+    def __init__(self, idle_ttl: float = SESSION_IDLE_TTL, max_size: int = SESSION_MAX_SIZE):
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self._sessions = OrderedDict()  # session_id -> (scores, last_seen)
+        self._lock = threading.Lock()
+
+    def append(self, session_id: str, score: float, window: int) -> list:
+        """
+        점수를 추가하고 최근 window개의 점수 리스트 반환
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            scores = entry[0] if entry is not None and now - entry[1] <= self.idle_ttl else array("f")
+
+            scores.append(score)
+            if len(scores) > window:
+                del scores[: len(scores) - window]
+
+            self._sessions[session_id] = (scores, now)
+            self._evict(now)
+            return scores.tolist()
+
+    def _evict(self, now):
+        # 가장 오래 전에 쓰인 세션부터 확인 (OrderedDict 앞쪽)
+        while self._sessions:
+            oldest_id, (_, last_seen) = next(iter(self._sessions.items()))
+            if len(self._sessions) > self.max_size or now - last_seen > self.idle_ttl:
+                del self._sessions[oldest_id]
+            else:
+                break
+
+    def reset(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SQLiteSessionStore:
+    """
+    여러 uvicorn 워커가 같은 세션 window를 공유하기 위한 파일 기반 저장소
+    (같은 호스트 안의 워커 간 공유용. 점수는 float32 bytes로 저장)
+    - 파일 I/O + 락 대기가 있으므로 async 코드에서는 스레드에서 호출 (EmotionSmoother.aadd_score)
+    - 만료 / max_size 정리는 요청 경로가 아니라 cleanup 스레드에서 주기적으로 수행
+    """
+
+    blocking = True
+
+    def __init__(self, path: str, idle_ttl: float = SESSION_IDLE_TTL, max_size: int = SESSION_MAX_SIZE):
+        self.path = path
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self._local = threading.local()
+        self._cleaner = None
+
+        with self._conn() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS emotion_sessions ("
+                " session_id TEXT PRIMARY KEY, scores BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_emotion_sessions_updated"
+                " ON emotion_sessions (updated_at)"
+            )
+
+    def _conn(self):
+        # sqlite connection은 스레드 간 공유하지 않음
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def append(self, session_id: str, score: float, window: int) -> list:
+        now = time.time()
+        conn = self._conn()
+
+        # 워커 간 동시 업데이트가 섞이지 않도록 쓰기 트랜잭션으로 읽기-수정-쓰기
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT scores, updated_at FROM emotion_sessions WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+
+            scores = array("f")
+            if row is not None and now - row[1] <= self.idle_ttl:
+                scores.frombytes(row[0])
+
+            scores.append(score)
+            if len(scores) > window:
+                del scores[: len(scores) - window]
+
+            conn.execute(
+                "INSERT OR REPLACE INTO emotion_sessions (session_id, scores, updated_at)"
+                " VALUES (?, ?, ?)",
+                (session_id, scores.tobytes(), now),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+        return scores.tolist()
+
+    def cleanup(self):
+        """
+        idle TTL이 지난 세션과 max_size를 넘는 오래된 세션 삭제
+        (만료된 행은 append에서도 읽을 때 무시하므로 정리가 늦어도 결과는 같음)
+        """
+        conn = self._conn()
+        conn.execute(
+            "DELETE FROM emotion_sessions WHERE updated_at < ?", (time.time() - self.idle_ttl,)
+        )
+        conn.execute(
+            "DELETE FROM emotion_sessions WHERE session_id IN ("
+            " SELECT session_id FROM emotion_sessions ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_size,),
+        )
+
+    def start_cleanup(self, interval: float = SESSION_CLEANUP_SECONDS):
+        if interval <= 0 or self._cleaner is not None:
+            return None
+        self._cleaner = threading.Thread(
+            target=self._cleanup_loop, args=(interval,), name="session-cleanup", daemon=True
+        )
+        self._cleaner.start()
+        return self._cleaner
+
+    def _cleanup_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.cleanup()
+            except sqlite3.Error as e:
+                # 다른 워커가 쓰기 락을 오래 잡고 있으면 다음 주기에 다시 시도
+                print(f"[SessionStore] 만료 세션 정리 실패: {e!r}")
+
+    def reset(self, session_id: str):
+        self._conn().execute("DELETE FROM emotion_sessions WHERE session_id = ?", (session_id,))
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM emotion_sessions").fetchone()[0]
+
+
+def create_session_store():
+    """
+    EMOTION_SESSION_BACKEND=memory (기본) | sqlite
+    sqlite 사용 시 EMOTION_SESSION_DB 경로의 파일을 워커들이 공유
+    """
+    backend = os.getenv("EMOTION_SESSION_BACKEND", "memory")
+    if backend == "memory":
+        return MemorySessionStore()
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("EMOTION_SESSION_DB", "emotion_sessions.db"))
+    raise ValueError(f"지원하지 않는 EMOTION_SESSION_BACKEND: {backend}")
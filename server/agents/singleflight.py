@@ -0,0 +1,100 @@
+# server/agents/singleflight.py
+import os
+import asyncio
+import hashlib
+from collections import OrderedDict
+
+from agents.metrics import SINGLEFLIGHT_CALLS, SINGLEFLIGHT_IN_FLIGHT
+
+# 🔹 0이면 coalescing 없이 호출마다 LLM 요청
+SINGLEFLIGHT_ENABLED = os.getenv("SINGLEFLIGHT", "1") == "1"
+# 🔹 /api/cache/stats에 보여줄 공유 횟수 상위 key 개수 (메모리는 이 개수 × 4까지만 사용)
+SINGLEFLIGHT_TOP_KEYS = int(os.getenv("SINGLEFLIGHT_TOP_KEYS", "20"))
+
+
+class _Call:
+    def __init__(self, task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    같은 key로 동시에 들어온 호출은 진행 중인 1개의 결과를 함께 기다림 (in-flight 중복 제거)
+    - 완료된 결과는 저장하지 않음 (완료 후 재사용은 ResponseCache 담당)
+    - 기다리던 요청이 모두 취소되면 공유 Task도 취소
+    - 공유 Task는 처음 호출한 요청(leader)의 contextvars(deadline 등)로 실행
+    """
+
+    def __init__(self, name: str, top_keys: int = SINGLEFLIGHT_TOP_KEYS):
+        self.name = name
+        self.top_keys = top_keys
+        self._calls = {}                 # key -> _Call
+        self._shared = OrderedDict()     # key hash -> 공유된 횟수 (최근 사용 순, 크기 제한)
+        self.leaders = 0
+        self.followers = 0
+
+    async def do(self, key, factory):
+        if not SINGLEFLIGHT_ENABLED:
+            return await factory()
+
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(factory()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+            SINGLEFLIGHT_IN_FLIGHT.labels(self.name).inc()
+            self.leaders += 1
+            SINGLEFLIGHT_CALLS.labels(self.name, "leader").inc()
+        else:
+            self.followers += 1
+            SINGLEFLIGHT_CALLS.labels(self.name, "follower").inc()
+            self._record_shared(key)
+
+        call.waiters += 1
+        try:
+            # 한 요청이 취소돼도 공유 Task는 계속 (shield)
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                call.task.cancel()
+
+    def _finish(self, key, call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        SINGLEFLIGHT_IN_FLIGHT.labels(self.name).dec()
+        if not call.task.cancelled():
+            call.task.exception()   # 기다리는 쪽이 없어도 "never retrieved" 경고가 나지 않도록
+
+    def _record_shared(self, key):
+        # key에는 고객 발화 / 프롬프트가 들어 있으므로 짧은 hash만 보관 (/api/cache/stats는 인증 없음)
+        key = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+        self._shared[key] = self._shared.pop(key, 0) + 1
+        if len(self._shared) > self.top_keys * 4:
+            self._shared.popitem(last=False)
+
+    def stats(self) -> dict:
+        top = sorted(self._shared.items(), key=lambda item: item[1], reverse=True)[: self.top_keys]
+        return {
+            "in_flight": len(self._calls),
+            "leaders": self.leaders,
+            "followers": self.followers,
+            "top_shared_keys": [{"kind": self.name, "key": key, "followers": count} for key, count in top],
+        }
+
+
+# ==========================
+# agent별 SingleFlight (프로세스당 1개씩)
+# ==========================
+_flights = {}
+
+
+def flight(name: str) -> SingleFlight:
+    if name not in _flights:
+        _flights[name] = SingleFlight(name)
+    return _flights[name]
+
+
+def stats() -> dict:
+    return {name: sf.stats() for name, sf in _flights.items()}
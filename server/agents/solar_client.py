@@ -1,14 +1,16 @@
 # agents/solar_client.py
 import os
 from dotenv import load_dotenv
-from openai import OpenAI
+
+from agents import llm_provider
 
 load_dotenv()
 
 # Upstage 공식 가이드: base_url="https://api.upstage.ai/v1" :contentReference[oaicite:0]{index=0}
-client = OpenAI(
+# (OpenAI 에이전트들과 같은 커넥션 풀 사용)
+client = llm_provider.openai_client(
     api_key=os.getenv("UPSTAGE_API_KEY"),
-    base_url="https://api.upstage.ai/v1",
+    base_url=llm_provider.UPSTAGE_BASE_URL,
 )
 
 def solar_chat(messages, model: str = "solar-1-mini-chat", **kwargs):
@@ -16,8 +18,9 @@ def solar_chat(messages, model: str = "solar-1-mini-chat", **kwargs):
     Upstage Solar용 chat 래퍼.
     messages: [{"role": "system"/"user"/"assistant", "content": "..."}]
     """
-    return client.chat.completions.create(
+    return llm_provider.call("solar", lambda timeout: client.chat.completions.create(
         model=model,
         messages=messages,
+        timeout=timeout,
         **kwargs,
-    )
+    ))
@@ -0,0 +1,207 @@
+# server/agents/stt.py
+import os
+import asyncio
+import threading
+import importlib.util
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from agents.audio_segmenter import SAMPLE_RATE, VoiceSegmenter, read_wav
+from agents.admission import AdmissionGate
+from agents.metrics import span
+
+# 🔹 STT 백엔드: whisper (faster-whisper, CPU) | stub (테스트 / 벤치마크용 고정 문장)
+STT_BACKEND = os.getenv("STT_BACKEND", "whisper")
+STT_MODEL = os.getenv("STT_MODEL", "small")
+STT_DEVICE = os.getenv("STT_DEVICE", "cpu")
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")   # CPU에서는 int8이 가장 빠름
+STT_LANGUAGE = os.getenv("STT_LANGUAGE", "ko")
+STT_BEAM_SIZE = int(os.getenv("STT_BEAM_SIZE", "1"))
+STT_CPU_THREADS = int(os.getenv("STT_CPU_THREADS", "2"))   # worker 1개가 쓰는 스레드 수
+# 🔹 STT worker 프로세스 수 (0이면 프로세스 없이 서버 안의 스레드에서 실행)
+STT_WORKERS = int(os.getenv("STT_WORKERS", "2"))
+STT_STUB_TEXT = os.getenv("STT_STUB_TEXT", "네 주문한 상품이 아직 안 왔어요")
+# 🔹 worker 수를 넘는 segment는 대기열에서 기다림 (가득 차거나 오래 기다리면 그 segment는 거절, 503)
+STT_MAX_QUEUE = int(os.getenv("STT_MAX_QUEUE", "32"))
+STT_MAX_QUEUE_WAIT = float(os.getenv("STT_MAX_QUEUE_WAIT", "10"))
+
+
+class StubSTT:
+    """
+    오디오 내용과 무관하게 고정 문장 반환 (모델 없이 파이프라인 / 부하 테스트)
+    """
+
+    name = "stub"
+
+    def transcribe(self, samples, sample_rate: int = SAMPLE_RATE) -> str:
+        return STT_STUB_TEXT
+
+
+class WhisperSTT:
+    """
+    faster-whisper (CTranslate2) CPU 추론
+    VAD는 audio_segmenter에서 이미 했으므로 segment 1개를 그대로 인식
+    """
+
+    name = "whisper"
+
+    def __init__(self, model: str = STT_MODEL, device: str = STT_DEVICE, compute_type: str = STT_COMPUTE_TYPE):
+        from faster_whisper import WhisperModel  # 선택 의존성: STT_BACKEND=whisper일 때만 필요
+
+        self.model = WhisperModel(model, device=device, compute_type=compute_type, cpu_threads=STT_CPU_THREADS)
+
+    def transcribe(self, samples, sample_rate: int = SAMPLE_RATE) -> str:
+        segments, _ = self.model.transcribe(
+            samples,
+            language=STT_LANGUAGE,
+            beam_size=STT_BEAM_SIZE,
+            vad_filter=False,
+            condition_on_previous_text=False,
+        )
+        return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+class STTUnavailable(RuntimeError):
+    """
+    STT 설정이 잘못됐거나 의존성이 없음 → 오디오 API만 503 (텍스트 / LLM API는 그대로 동작)
+    """
+
+
+def check_stt_backend(name: str = STT_BACKEND):
+    """
+    STT pool을 만들기 전에 설정 확인 (worker 초기화가 segment마다 실패하며 풀을 다시 만들지 않도록)
+    모델 로딩은 하지 않고, 백엔드 이름과 의존성 설치 여부만 확인
+    """
+    if name == "stub":
+        return
+    if name != "whisper":
+        raise STTUnavailable(f"지원하지 않는 STT_BACKEND: {name}")
+    if importlib.util.find_spec("faster_whisper") is None:
+        raise STTUnavailable(
+            "STT_BACKEND=whisper인데 faster-whisper가 설치되지 않음 "
+            "(pip install faster-whisper 또는 STT_BACKEND=stub)"
+        )
+
+
+def create_stt_backend(name: str = STT_BACKEND, **kwargs):
+    if name == "stub":
+        return StubSTT()
+    if name == "whisper":
+        return WhisperSTT(**kwargs)
+    raise ValueError(f"지원하지 않는 STT_BACKEND: {name}")
+
+
+# ==========================
+# STT worker 프로세스
+# ==========================
+# worker 프로세스마다 모델 1개 (initializer에서 로딩)
+_worker_backend = None
+
+
+def _init_worker(name: str):
+    global _worker_backend
+    _worker_backend = create_stt_backend(name)
+
+
+def _transcribe(samples) -> str:
+    return _worker_backend.transcribe(samples, SAMPLE_RATE)
+
+
+class STTPool:
+    """
+    STT는 CPU를 오래 쓰므로 별도 프로세스에서 실행 → 이벤트 루프 / KoBERT 배치 엔진과 GIL 경쟁 없음
+    (spawn으로 띄워서 서버 프로세스의 torch 스레드 상태를 물려받지 않음)
+    """
+
+    def __init__(self, backend: str = STT_BACKEND, workers: int = STT_WORKERS,
+                 max_queue: int = STT_MAX_QUEUE, max_wait: float = STT_MAX_QUEUE_WAIT):
+        self.backend_name = backend
+        self.workers = workers
+        self.executor = None
+        self.backend = None
+        # executor에 넘기는 작업은 worker 수까지만 (나머지는 제한된 대기열에서 기다리거나 거절)
+        self.gate = AdmissionGate("stt", limit=max(1, workers), max_queue=max_queue, max_wait=max_wait)
+        if workers > 0:
+            self.executor = self._create_executor()
+        else:
+            self.backend = create_stt_backend(backend)
+
+    def _create_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.backend_name,),
+        )
+
+    async def atranscribe(self, samples) -> str:
+        async with self.gate.slot():
+            return await self._atranscribe(samples)
+
+    async def _atranscribe(self, samples) -> str:
+        with span("stt"):
+            if self.executor is None:
+                return await asyncio.to_thread(self.backend.transcribe, samples, SAMPLE_RATE)
+            loop = asyncio.get_running_loop()
+            executor = self.executor
+            try:
+                return await loop.run_in_executor(executor, _transcribe, samples)
+            except BrokenProcessPool:
+                # worker가 죽으면(OOM / 모델 로딩 실패 등) 풀을 새로 만들고 이번 segment는 실패 처리
+                print("[STTPool] worker 프로세스 종료 → 풀 재생성")
+                if self.executor is executor:
+                    self.executor = self._create_executor()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+# 요청이 처음 들어올 때 생성 (gunicorn --preload면 fork 전에 만들지 않도록 registry에 등록하지 않음)
+_lock = threading.Lock()
+_pool = None
+
+
+def get_stt_pool() -> STTPool:
+    """
+    STT 설정에 문제가 있으면 STTUnavailable (첫 오디오 요청에서 확인, 서버 시작은 막지 않음)
+    """
+    global _pool
+    if _pool is None:
+        with _lock:
+            if _pool is None:
+                check_stt_backend()
+                _pool = STTPool()
+    return _pool
+
+
+def shutdown_stt_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+
+
+# ==========================
+# 파일 단위 STT (오프라인 스크립트용)
+# ==========================
+class STTAgent:
+    """
+    녹음 파일 1개 → 전체 텍스트 (VAD로 나눈 segment를 순서대로 인식해서 이어 붙임)
+    """
+
+    def __init__(self, backend: str = STT_BACKEND, device: str = STT_DEVICE):
+        kwargs = {"device": device} if backend == "whisper" else {}
+        self.backend = create_stt_backend(backend, **kwargs)
+
+    def run(self, audio_path: str) -> str:
+        segmenter = VoiceSegmenter()
+        segments = []
+        for samples in read_wav(audio_path):
+            segments.extend(segmenter.feed(samples))
+        segments.extend(segmenter.flush())
+        texts = [self.backend.transcribe(segment["samples"], SAMPLE_RATE) for segment in segments]
+        return " ".join(text for text in texts if text)
@@ -0,0 +1,81 @@
+# server/bench/common.py
+import os
+import sys
+import json
+import time
+import platform
+import subprocess
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE_DIR = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# 부하 테스트 / 마이크로 벤치마크 공용 입력 (감정 백엔드 검증용 발화 재사용)
+UTTERANCES_PATH = os.path.join(BASE_DIR, "config", "emotion_validation.txt")
+
+
+def load_utterances(path: str = UTTERANCES_PATH) -> list:
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def summarize(seconds: list) -> dict:
+    """
+    소요 시간(초) 리스트 → ms 단위 p50 / p95 / p99 / mean
+    """
+    if not seconds:
+        return {"count": 0}
+    ms = np.asarray(seconds, dtype="float64") * 1000
+    return {
+        "count": int(ms.size),
+        "mean_ms": round(float(ms.mean()), 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 2),
+        "p95_ms": round(float(np.percentile(ms, 95)), 2),
+        "p99_ms": round(float(np.percentile(ms, 99)), 2),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> dict:
+    """
+    결과를 비교할 때 같은 조건인지 확인하기 위한 실행 환경 정보
+    """
+    info = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+    try:
+        import torch
+        info["torch"] = torch.__version__
+        info["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return info
+
+
+def write_results(kind: str, payload: dict, output: str = None) -> str:
+    """
+    bench/results/{kind}-{시각}.json 으로 저장 (output을 주면 그 경로)
+    """
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+
+    result = {"kind": kind, "environment": environment(), **payload}
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"[Bench] 결과 저장: {output}")
+    return output
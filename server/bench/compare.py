@@ -0,0 +1,69 @@
+# server/bench/compare.py
+"""
+벤치마크 결과 JSON 2개 비교 (리뷰용)
+
+예: python -m bench.compare bench/results/load-before.json bench/results/load-after.json
+"""
+import json
+import argparse
+
+# 지연 시간 지표 (처리량 등 단일 값은 "value")
+LATENCY_KEYS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def _rows(result: dict) -> dict:
+    """
+    결과 종류별로 (행 이름 → {지표: 값}) 형태로 펼침
+    """
+    rows = {}
+    if result["kind"] == "load":
+        for level in result["levels"]:
+            prefix = f"c={level['concurrency']}"
+            rows[f"{prefix} throughput_rps"] = {"value": level["throughput_rps"]}
+            rows[f"{prefix} latency"] = level["latency"]
+            for stage, stats in level["stages"].items():
+                rows[f"{prefix} {stage}"] = stats
+    elif result["kind"] == "kobert":
+        for row in result["results"]:
+            prefix = f"{row['backend']} bs={row['batch_size']} len={row['seq_len']}"
+            rows[f"{prefix} forward"] = row["forward"]
+            rows[f"{prefix} samples_per_sec"] = {"value": row["samples_per_sec"]}
+    return rows
+
+
+def _delta(before, after) -> str:
+    if not before:
+        return "-"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def compare(before: dict, after: dict):
+    if before["kind"] != after["kind"]:
+        raise SystemExit(f"결과 종류가 다름: {before['kind']} vs {after['kind']}")
+
+    before_rows, after_rows = _rows(before), _rows(after)
+    for name in before_rows:
+        if name not in after_rows:
+            continue
+        b, a = before_rows[name], after_rows[name]
+        keys = ("value",) if "value" in b else LATENCY_KEYS
+        cells = [
+            f"{key}: {b.get(key)} → {a.get(key)} ({_delta(b.get(key), a.get(key))})"
+            for key in keys
+            if b.get(key) is not None and a.get(key) is not None
+        ]
+        if cells:
+            print(f"{name:<40} " + "  ".join(cells))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="벤치마크 결과 JSON 비교")
+    parser.add_argument("before")
+    parser.add_argument("after")
+    args = parser.parse_args()
+
+    with open(args.before, encoding="utf-8") as f:
+        before = json.load(f)
+    with open(args.after, encoding="utf-8") as f:
+        after = json.load(f)
+    compare(before, after)
@@ -0,0 +1,88 @@
+# server/bench/kobert_bench.py
+"""
+KoBERT 감정 모델 마이크로 벤치마크 (배치 크기 × 시퀀스 길이 × 백엔드)
+
+tokenize와 forward를 따로 측정 → EMOTION_MAX_BATCH_SIZE / 백엔드 선택 근거로 사용
+예: python -m bench.kobert_bench --backends torch,torch-int8 --batch-sizes 1,4,8,16,32 --seq-lens 16,32,64,128
+"""
+import time
+import argparse
+
+import torch
+
+from bench.common import load_utterances, summarize, write_results
+from agents.emotion_agent import MODEL_DIR, load_emotion_model
+from agents.emotion_backends import create_backend
+from agents.emotion_batcher import TORCH_THREADS
+
+
+def _timed(fn, repeats: int, warmup: int) -> list:
+    for _ in range(warmup):
+        fn()
+    seconds = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        fn()
+        seconds.append(time.perf_counter() - started)
+    return seconds
+
+
+def run(args) -> list:
+    if TORCH_THREADS > 0:
+        torch.set_num_threads(TORCH_THREADS)
+
+    utterances = load_utterances()
+    emotion_model = load_emotion_model(backend="torch")
+    tokenizer = emotion_model.tokenizer
+    backends = [
+        create_backend(name, emotion_model.model, MODEL_DIR, tokenizer)
+        for name in args.backends.split(",")
+    ]
+
+    rows = []
+    for seq_len in [int(n) for n in args.seq_lens.split(",")]:
+        for batch_size in [int(n) for n in args.batch_sizes.split(",")]:
+            texts = [utterances[i % len(utterances)] for i in range(batch_size)]
+
+            # 실제 배치 엔진과 달리 길이를 seq_len으로 고정해서 조건을 맞춤
+            def tokenize():
+                return tokenizer(
+                    texts,
+                    return_tensors="pt",
+                    truncation=True,
+                    padding="max_length",
+                    max_length=seq_len,
+                )
+
+            tokenize_stats = summarize(_timed(tokenize, args.repeats, 1))
+            inputs = tokenize()
+
+            for backend in backends:
+                forward_seconds = _timed(lambda: backend.forward(inputs), args.repeats, args.warmup)
+                forward_stats = summarize(forward_seconds)
+                mean = sum(forward_seconds) / len(forward_seconds)
+                rows.append({
+                    "backend": backend.name,
+                    "batch_size": batch_size,
+                    "seq_len": seq_len,
+                    "tokenize": tokenize_stats,
+                    "forward": forward_stats,
+                    "samples_per_sec": round(batch_size / mean, 2),
+                })
+                print(f"[Bench] {backend.name:<11} bs={batch_size:<3} len={seq_len:<4} "
+                      f"forward p50={forward_stats['p50_ms']}ms p95={forward_stats['p95_ms']}ms "
+                      f"({rows[-1]['samples_per_sec']} samples/s)")
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="KoBERT 감정 모델 마이크로 벤치마크")
+    parser.add_argument("--backends", default="torch", help="torch,torch-int8,onnx 중 쉼표로 구분")
+    parser.add_argument("--batch-sizes", default="1,4,8,16,32")
+    parser.add_argument("--seq-lens", default="16,32,64,128")
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: bench/results/kobert-<시각>.json)")
+    args = parser.parse_args()
+
+    write_results("kobert", {"config": vars(args), "results": run(args)}, args.output)
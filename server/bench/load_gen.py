@@ -0,0 +1,186 @@
+# server/bench/load_gen.py
+"""
+/api/analyze-solar 부하 테스트
+
+stub OpenAI 서버(bench.stub_openai)와 앱을 각각 uvicorn 프로세스로 띄운 뒤
+고정 동시성 단계별로 요청을 보내 처리량 / 전체 지연 / stage별 p50·p95·p99를 JSON으로 저장
+(stage별 시간은 앱의 X-Timing 헤더 기준)
+
+예: python -m bench.load_gen --concurrency 1,4,16 --requests 200
+"""
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import subprocess
+
+import httpx
+
+from bench.common import BASE_DIR, load_utterances, summarize, write_results
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_uvicorn(app: str, port: int, env: dict) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=BASE_DIR,
+        env=env,
+    )
+
+
+async def _wait_ready(url: str, timeout: float, process: subprocess.Popen):
+    """
+    /readyz가 200이 될 때까지 대기 (KoBERT / 정책 인덱스 로딩 포함)
+    """
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{url} 프로세스가 종료됨 (exit={process.returncode})")
+            try:
+                if (await client.get(url)).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"{url} 준비 시간 초과 ({timeout}s)")
+
+
+def parse_timing(header: str) -> dict:
+    """
+    "emotion;dur=12.3, guide_llm;dur=410.2" → {"emotion": 0.0123, "guide_llm": 0.4102}
+    """
+    timings = {}
+    for part in (header or "").split(","):
+        stage, _, dur = part.strip().partition(";dur=")
+        if stage and dur:
+            timings[stage] = float(dur) / 1000
+    return timings
+
+
+async def run_level(base_url: str, utterances: list, concurrency: int, total: int, timeout: float) -> dict:
+    """
+    concurrency개의 worker가 total개의 요청을 나눠서 연속으로 전송
+    """
+    latencies, stages, errors = [], {}, {}
+    next_index = 0
+
+    async def worker(client):
+        nonlocal next_index
+        while next_index < total:
+            i = next_index
+            next_index += 1
+            payload = {"session_id": f"bench-{i % 64}", "text": utterances[i % len(utterances)]}
+
+            started = time.perf_counter()
+            try:
+                response = await client.post("/api/analyze-solar", json=payload)
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            elapsed = time.perf_counter() - started
+
+            if response.status_code != 200:
+                errors[str(response.status_code)] = errors.get(str(response.status_code), 0) + 1
+                continue
+            latencies.append(elapsed)
+            for stage, seconds in parse_timing(response.headers.get("x-timing")).items():
+                stages.setdefault(stage, []).append(seconds)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "requests": total,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "latency": summarize(latencies),
+        "stages": {stage: summarize(values) for stage, values in sorted(stages.items())},
+    }
+
+
+async def main(args):
+    utterances = load_utterances(args.utterances) if args.utterances else load_utterances()
+    stub_port, app_port = _free_port(), _free_port()
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+
+    stub_env = dict(
+        os.environ,
+        STUB_TTFT_MS=str(args.ttft_ms),
+        STUB_TOKENS_PER_SEC=str(args.tokens_per_sec),
+        STUB_COMPLETION_TOKENS=str(args.completion_tokens),
+        STUB_EMBEDDING_MS=str(args.embedding_ms),
+    )
+    app_env = dict(
+        os.environ,
+        OPENAI_API_KEY="sk-bench",
+        OPENAI_BASE_URL=f"{stub_url}/v1",
+        OPENAI_API_BASE=f"{stub_url}/v1",
+        TIMING_HEADER="1",
+        # stub 임베딩으로 만든 인덱스가 실제 인덱스 캐시와 섞이지 않도록 분리
+        POLICY_INDEX_DIR=args.index_dir or tempfile.mkdtemp(prefix="bench-policy-index-"),
+    )
+    if not args.cache:
+        # 같은 발화가 반복되므로 캐시를 끄지 않으면 모델 / LLM 경로가 측정되지 않음
+        app_env.update(RESPONSE_CACHE_SIZE="0", EMOTION_CACHE_SIZE="0")
+
+    processes = [_start_uvicorn("bench.stub_openai:app", stub_port, stub_env)]
+    try:
+        await _wait_ready(f"{stub_url}/v1/models", 30, processes[0])
+        processes.append(_start_uvicorn("main:app", app_port, app_env))
+        await _wait_ready(f"{app_url}/readyz", args.ready_timeout, processes[1])
+
+        if args.warmup:
+            await run_level(app_url, utterances, 1, args.warmup, args.timeout)
+
+        levels = []
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            level = await run_level(app_url, utterances, concurrency, args.requests, args.timeout)
+            latency = level["latency"]
+            print(f"[Bench] c={concurrency:<3} rps={level['throughput_rps']:<8} "
+                  f"p50={latency.get('p50_ms')}ms p95={latency.get('p95_ms')}ms "
+                  f"p99={latency.get('p99_ms')}ms errors={level['errors']}")
+            levels.append(level)
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    write_results("load", {"config": vars(args), "levels": levels}, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/api/analyze-solar 부하 테스트 (stub LLM)")
+    parser.add_argument("--concurrency", default="1,4,16", help="쉼표로 구분한 동시성 단계")
+    parser.add_argument("--requests", type=int, default=200, help="단계별 요청 수")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-sec", type=float, default=60)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--embedding-ms", type=float, default=50)
+    parser.add_argument("--cache", action="store_true", help="응답 / 감정 캐시를 켠 채로 측정")
+    parser.add_argument("--utterances", help="한 줄에 발화 1개 (기본: config/emotion_validation.txt)")
+    parser.add_argument("--index-dir", help="stub 임베딩 정책 인덱스 위치 (기본: 임시 폴더)")
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--ready-timeout", type=float, default=600)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: bench/results/load-<시각>.json)")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,179 @@
+# server/bench/stub_openai.py
+"""
+벤치마크용 OpenAI 호환 stub 서버 (chat completions + embeddings)
+
+실제 API 대신 설정한 지연 시간 / 토큰 속도로 응답 → 네트워크·요금 없이 같은 조건으로 반복 측정
+  python -m uvicorn bench.stub_openai:app --port 8100
+
+환경변수
+- STUB_TTFT_MS            : 첫 토큰까지 지연 (기본 300ms)
+- STUB_TOKENS_PER_SEC     : 이후 토큰 생성 속도 (기본 60 tok/s)
+- STUB_COMPLETION_TOKENS  : 대응문 / 피드백 응답 길이 (기본 60 토큰)
+- STUB_EMBEDDING_MS       : embeddings 요청당 지연 (기본 50ms)
+- STUB_EMBEDDING_DIM      : 임베딩 차원 (기본 1536)
+"""
+import os
+import json
+import time
+import base64
+import asyncio
+import hashlib
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+TTFT_MS = float(os.getenv("STUB_TTFT_MS", "300"))
+TOKENS_PER_SEC = float(os.getenv("STUB_TOKENS_PER_SEC", "60"))
+COMPLETION_TOKENS = int(os.getenv("STUB_COMPLETION_TOKENS", "60"))
+EMBEDDING_MS = float(os.getenv("STUB_EMBEDDING_MS", "50"))
+EMBEDDING_DIM = int(os.getenv("STUB_EMBEDDING_DIM", "1536"))
+
+# 대응문 / 피드백용 토큰 (COMPLETION_TOKENS개가 될 때까지 반복)
+REPLY_TOKENS = ["고객님", ", ", "불편", "을 ", "드려", " 죄송", "합니다", ". ", "확인", " 후", " 안내", "드리겠습니다", ". "]
+
+app = FastAPI(title="OpenAI stub (bench)")
+
+
+def _completion_tokens(prompt: str) -> list:
+    """
+    프롬프트 종류에 맞춰 파싱 가능한 응답을 고름 (IntentAgent / LLM 플래너 / 나머지)
+    """
+    if "라벨만 출력" in prompt:
+        return ["배송문의"]
+    if "JSON만 출력" in prompt:
+        return ['{"actions": ', '["policy", "basic"]}']
+    return [REPLY_TOKENS[i % len(REPLY_TOKENS)] for i in range(COMPLETION_TOKENS)]
+
+
+def _prompt_text(body: dict) -> str:
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content or "")
+    return "\n".join(parts)
+
+
+def _usage(prompt: str, tokens: list) -> dict:
+    # 한국어 기준 대략 2글자당 1토큰
+    prompt_tokens = max(1, len(prompt) // 2)
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": len(tokens),
+        "total_tokens": prompt_tokens + len(tokens),
+    }
+
+
+def _structured_content(response_format, tokens) -> str:
+    """
+    response_format이 json_schema면 문자열 property마다 생성 토큰을 나눠 담은 JSON
+    (GuideAgent combined 생성 경로를 벤치마크에서 그대로 태우기 위함)
+    """
+    if not response_format or response_format.get("type") != "json_schema":
+        return "".join(tokens)
+    properties = response_format["json_schema"]["schema"].get("properties", {})
+    names = list(properties) or ["text"]
+    size = max(1, len(tokens) // len(names))
+    return json.dumps(
+        {name: "".join(tokens[i * size:(i + 1) * size]) or "stub" for i, name in enumerate(names)},
+        ensure_ascii=False,
+    )
+
+
+def _chunk(completion_id, model, delta, finish_reason=None):
+    return {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model", "stub")
+    prompt = _prompt_text(body)
+    tokens = _completion_tokens(prompt)
+    completion_id = f"chatcmpl-stub-{time.monotonic_ns()}"
+
+    if not body.get("stream"):
+        await asyncio.sleep(TTFT_MS / 1000 + len(tokens) / TOKENS_PER_SEC)
+        content = _structured_content(body.get("response_format"), tokens)
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": _usage(prompt, tokens),
+        }
+
+    include_usage = (body.get("stream_options") or {}).get("include_usage", False)
+
+    async def events():
+        await asyncio.sleep(TTFT_MS / 1000)
+        yield f"data: {json.dumps(_chunk(completion_id, model, {'role': 'assistant', 'content': ''}))}\n\n"
+        for i, token in enumerate(tokens):
+            if i:
+                await asyncio.sleep(1 / TOKENS_PER_SEC)
+            yield f"data: {json.dumps(_chunk(completion_id, model, {'content': token}), ensure_ascii=False)}\n\n"
+        yield f"data: {json.dumps(_chunk(completion_id, model, {}, 'stop'))}\n\n"
+        if include_usage:
+            usage_chunk = _chunk(completion_id, model, {})
+            usage_chunk["choices"] = []
+            usage_chunk["usage"] = _usage(prompt, tokens)
+            yield f"data: {json.dumps(usage_chunk)}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+def _embed(item) -> np.ndarray:
+    """
+    같은 입력 → 같은 벡터 (문자열 또는 tiktoken 토큰 id 리스트)
+    """
+    raw = item.encode("utf-8") if isinstance(item, str) else json.dumps(item).encode("utf-8")
+    seed = int.from_bytes(hashlib.sha256(raw).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(EMBEDDING_DIM).astype("float32")
+    return vector / np.linalg.norm(vector)
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    inputs = body.get("input")
+    # 단일 문자열 / 단일 토큰 리스트도 배치 1개로 취급
+    if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+        inputs = [inputs]
+
+    await asyncio.sleep(EMBEDDING_MS / 1000)
+
+    data = []
+    for i, item in enumerate(inputs):
+        vector = _embed(item)
+        if body.get("encoding_format") == "base64":
+            embedding = base64.b64encode(vector.tobytes()).decode("ascii")
+        else:
+            embedding = vector.tolist()
+        data.append({"object": "embedding", "index": i, "embedding": embedding})
+
+    tokens = sum(len(item) if isinstance(item, list) else max(1, len(item) // 2) for item in inputs)
+    return {
+        "object": "list",
+        "data": data,
+        "model": body.get("model", "stub"),
+        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+    }
+
+
+@app.get("/v1/models")
+def models():
+    return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "bench"}]}
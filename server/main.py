@@ -1,25 +1,136 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI
-from routers import process_audio   # ← 이걸로 수정!
+import gc
+import os
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from routers import process_audio, live_call, audio, admin   # ← 이걸로 수정!
+from registry import registry
+from agents import metrics, llm_provider, stt
+from agents.admission import Overloaded
+
+
+# -----------------------------
+# 모델 / 인덱스 로딩 방식
+# - PRELOAD_MODELS=1 : import 시점에 모델 가중치 / BM25 인덱스만 로딩 (gunicorn --preload 로 fork 전에 로딩 →
+#                      워커들이 읽기 전용 모델 가중치를 copy-on-write로 공유)
+#                      추론이 필요한 나머지는 fork 이후 lifespan에서 로딩
+# - 그 외            : 서버는 바로 뜨고, lifespan에서 백그라운드 병렬 로딩
+# -----------------------------
+PRELOAD_MODELS = os.environ.get("PRELOAD_MODELS", "0") == "1"
+
+# STT worker는 spawn으로 뜨면서 `python main.py`의 main 모듈을 __mp_main__으로 다시 import함
+# → worker마다 모델 전체를 로딩하지 않도록 제외
+if PRELOAD_MODELS and __name__ != "__mp_main__":
+    registry.preload()
+    # fork 이후 GC가 공유 객체를 건드려 페이지가 복사되는 것을 줄임
+    gc.freeze()
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if not registry.is_ready():
+        registry.start_background_loading()
+    # 모델 폴더 / 정책 파일이 바뀌면 재시작 없이 새 버전으로 교체 (RELOAD_POLL_SECONDS > 0일 때)
+    registry.start_watching()
+    # sqlite 세션 저장소의 만료 세션 정리 (요청 경로에서는 하지 않음)
+    process_audio.emotion_smoother.start_cleanup()
+    yield
+    # LLM / 임베딩 공용 커넥션 풀 정리
+    await llm_provider.aclose()
+    # STT worker 프로세스 정리
+    stt.shutdown_stt_pool()
 
-app = FastAPI(title="AI Customer Care Backend")
+
+app = FastAPI(title="AI Customer Care Backend", lifespan=lifespan)
 
 # /api/analyze_call
 app.include_router(process_audio.router, prefix="/api")
 
+# /api/analyze-audio (WAV 업로드 → STT + 감정)
+app.include_router(audio.router, prefix="/api")
+
+# /ws/call/{session_id} (통화 단위 WebSocket), /ws/audio/{session_id} (실시간 오디오)
+app.include_router(live_call.router)
+app.include_router(audio.ws_router)
+
+# /admin/versions, /admin/reload/{component} (모델 / 정책 인덱스 hot reload)
+app.include_router(admin.router, prefix="/admin", dependencies=[Depends(admin.require_admin)])
+
+
+# -----------------------------
+# 과부하 거절: 요청 대기열 초과 429 / 모델·LLM 대기열 초과 503 (+ Retry-After)
+# -----------------------------
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": str(exc), "stage": exc.stage, "reason": exc.reason},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+# -----------------------------
+# 요청 단위 메트릭 (in-flight / 처리 시간 / X-Timing 헤더)
+# -----------------------------
+@app.middleware("http")
+async def track_request(request: Request, call_next):
+    if request.url.path == "/metrics":
+        return await call_next(request)
+
+    timings = metrics.start_timing()
+    started = time.perf_counter()
+    metrics.IN_FLIGHT.inc()
+    try:
+        response = await call_next(request)
+    finally:
+        metrics.IN_FLIGHT.dec()
+
+    elapsed = time.perf_counter() - started
+    # 등록되지 않은 경로(404)는 label 하나로 묶어서 cardinality 제한
+    path = request.url.path if request.scope.get("endpoint") else "unmatched"
+    metrics.REQUEST_SECONDS.labels(path).observe(elapsed)
+
+    if metrics.TIMING_HEADER:
+        # streaming 응답은 헤더가 먼저 나가므로 그 시점까지의 stage만 포함
+        timings["total"] = elapsed
+        response.headers["X-Timing"] = metrics.format_timings(timings)
+    return response
+
 @app.get("/")
 def root():
     return {"message": "AI Customer Care Backend is running"}
 
 
+# liveness: 프로세스가 살아 있으면 항상 200
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+
+# Prometheus scrape
+@app.get("/metrics")
+def prometheus_metrics():
+    body, content_type = metrics.render_latest()
+    return Response(content=body, media_type=content_type)
+
+
+# readiness: 모델 / 인덱스 / 에이전트 로딩이 끝나야 200
+@app.get("/readyz")
+def readyz():
+    status = registry.status()
+    if not registry.is_ready():
+        return JSONResponse(status_code=503, content={"ready": False, "components": status})
+    return {"ready": True, "components": status}
+
+
 # -----------------------------
 # Render에서 필요한 실행 부분
 # -----------------------------
-import os
-
 port = int(os.environ.get("PORT", 8000))
 
 if __name__ == "__main__":
@@ -1,16 +1,18 @@
 # kobert_emotion_final/agents/final_agent.py
 
-from stt_agent import STTAgent
-from emotion_agent import EmotionAgent
+# server/ 에서 실행 (python -c "from kobert_emotion_final.agents.final_agent import ...")
+from agents.stt import STTAgent, STT_DEVICE
+from agents.emotion_agent import EmotionAgent
 
 import os
 
 class CallcenterAudioProcessor:
     """
     음성 파일을 입력받아 STT → 감정분석까지 한 번에 처리하는 최종 헬퍼 클래스.
+    (녹음 파일 일괄 처리용 - 통화 중 실시간 분석은 /api/analyze-audio, /ws/audio 사용)
     """
 
-    def __init__(self, stt_device="mps"):
+    def __init__(self, stt_device=STT_DEVICE):
         self.stt_agent = STTAgent(device=stt_device)
         self.emotion_agent = EmotionAgent()
 
@@ -0,0 +1,435 @@
+# server/registry.py
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi.concurrency import run_in_threadpool
+
+from agents.metrics import COMPONENT_RELOADS
+
+# 🔹 hot reload: 모델 폴더 / 정책 파일 변경 감시 주기(초). 0이면 감시하지 않음 (/admin/reload로만 교체)
+RELOAD_POLL_SECONDS = float(os.getenv("RELOAD_POLL_SECONDS", "0"))
+# 🔹 교체 후 이전 버전을 정리하기까지 기다리는 시간 (진행 중인 요청이 이전 버전으로 끝나도록)
+RELOAD_GRACE_SECONDS = float(os.getenv("RELOAD_GRACE_SECONDS", "30"))
+# 🔹 /admin/versions에 보여줄 이전 버전 개수
+RELOAD_HISTORY = int(os.getenv("RELOAD_HISTORY", "5"))
+
+# 🔹 agents.policy_rag와 같은 설정 (policy_rag는 faiss / langchain을 import하므로 여기서 직접 읽음)
+POLICY_RETRIEVER = os.getenv("POLICY_RETRIEVER", "local")
+POLICY_RETRIEVER_DENSE = os.getenv("POLICY_RETRIEVER_DENSE", "0") == "1"
+
+
+class ComponentRegistry:
+    """
+    무거운 리소스(KoBERT 모델, 정책 인덱스, LLM 에이전트)를 프로세스당 1번만 로딩하는 레지스트리.
+
+    - get(name): 처음 호출될 때 로딩 (lazy), 이후에는 같은 인스턴스 반환
+    - start_background_loading(): 서버 시작 직후 모든 컴포넌트를 백그라운드에서 병렬 로딩
+    - preload(): gunicorn --preload용, fork 전에 가중치 / 인덱스 파일만 로딩 (추론은 하지 않음)
+    - status(): readiness 체크용 로딩 상태
+    - reload(name): 새 버전을 백그라운드에서 만들고 warmup 후 교체 (hot reload)
+      · 의존하는 컴포넌트(예: KoBERT 임베딩을 쓰는 intent 분류기)도 새 버전으로 같이 만들어서 한 번에 교체
+      · 교체는 인스턴스 dict 참조 1개를 바꾸는 것 → 이미 인스턴스를 받아 간 요청은 이전 버전으로 끝남
+      · 만들기 / warmup이 실패하면 기존 버전을 그대로 사용
+    """
+
+    def __init__(self):
+        self._factories = {}
+        self._specs = {}
+        self._instances = {}     # 교체할 때마다 새 dict로 바꿈 (읽는 쪽은 lock 없이 참조)
+        self._errors = {}
+        self._load_seconds = {}
+        self._locks = {}
+        self._swap_lock = threading.Lock()
+
+        # 버전 관리
+        self._versions = {}      # name -> {"version", "generation", "loaded_at", "load_seconds"}
+        self._history = {}       # name -> 이전 버전 목록 (최근 RELOAD_HISTORY개)
+        self._fingerprints = {}  # name -> 로딩할 때의 파일 fingerprint
+        self._reload_errors = {}
+        self._reload_lock = threading.Lock()   # reload는 한 번에 1개씩
+        self._reloading = None
+        self._local = threading.local()        # reload 중인 스레드에서만 보이는 새 버전 (staged)
+        self._watcher = None
+
+    def register(self, name, factory, depends=(), version=None, warmup=None,
+                 activate=None, retire=None, fingerprint=None, preload=False):
+        """
+        preload:     fork 전에 로딩해도 되는지 (만들 때 추론 / 스레드 / 네트워크 연결이 없어야 함)
+        depends:     이 컴포넌트를 만들 때 쓰는 컴포넌트 (그쪽이 reload되면 같이 다시 만듦)
+        version:     인스턴스 → 버전 문자열 (없으면 generation 번호)
+        warmup:      교체 전에 새 인스턴스로 미리 실행해 볼 함수
+        activate:    인스턴스가 활성 버전이 될 때 호출 (모듈 전역 등을 새 버전으로 바꿀 때)
+        retire:      교체된 이전 인스턴스 정리 (RELOAD_GRACE_SECONDS 후)
+        fingerprint: 원본 파일 변경 확인 함수 (RELOAD_POLL_SECONDS 감시용)
+        """
+        self._factories[name] = factory
+        self._specs[name] = {
+            "depends": tuple(depends),
+            "version": version,
+            "warmup": warmup,
+            "activate": activate,
+            "retire": retire,
+            "fingerprint": fingerprint,
+            "preload": preload,
+        }
+        self._locks[name] = threading.Lock()
+
+    def __contains__(self, name):
+        return name in self._factories
+
+    def get(self, name):
+        staged = getattr(self._local, "staged", None)
+        if staged is not None and name in staged:
+            return staged[name]
+        if name in self._instances:
+            return self._instances[name]
+
+        with self._locks[name]:
+            if name not in self._instances:
+                fingerprint = self._fingerprint(name)
+                started = time.perf_counter()
+                try:
+                    instance = self._factories[name]()
+                except Exception as e:
+                    self._errors[name] = repr(e)
+                    raise
+                self._errors.pop(name, None)
+                self._swap({name: instance}, {name: time.perf_counter() - started}, {name: fingerprint})
+        return self._instances[name]
+
+    async def aget(self, name):
+        """
+        async 엔드포인트용: 아직 로딩 전이면 threadpool에서 로딩해서 이벤트 루프를 막지 않음
+        """
+        if name in self._instances:
+            return self._instances[name]
+        return await run_in_threadpool(self.get, name)
+
+    def snapshot(self, *names):
+        """
+        이미 로딩된 컴포넌트 여러 개를 같은 버전 묶음으로 반환 (reload 교체 도중에도 섞이지 않음)
+        """
+        instances = self._instances
+        return tuple(instances[name] for name in names)
+
+    def load_all(self, max_workers=4):
+        """
+        등록된 모든 컴포넌트를 병렬 로딩 (실패한 컴포넌트는 status()에 기록)
+        """
+        def load(name):
+            try:
+                self.get(name)
+            except Exception as e:
+                print(f"[Registry] {name} 로딩 실패: {e!r}")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            list(pool.map(load, self._factories))
+
+    def preload(self):
+        """
+        preload=True 컴포넌트만 순서대로 로딩 (스레드 없이)
+        fork 전에 배치 worker 스레드를 띄우거나 추론을 하면 자식 프로세스에서 멈추므로
+        나머지(intent 예시 임베딩, LLM 클라이언트 등)는 fork 이후 각 워커의 lifespan에서 로딩
+        """
+        for name, spec in self._specs.items():
+            if spec["preload"]:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"[Registry] {name} preload 실패: {e!r}")
+
+    def start_background_loading(self):
+        thread = threading.Thread(target=self.load_all, name="registry-loader", daemon=True)
+        thread.start()
+        return thread
+
+    def is_ready(self) -> bool:
+        return all(name in self._instances for name in self._factories)
+
+    def status(self) -> dict:
+        return {
+            name: {
+                "loaded": name in self._instances,
+                "load_seconds": self._load_seconds.get(name),
+                "error": self._errors.get(name),
+            }
+            for name in self._factories
+        }
+
+    # -----------------------------
+    # 버전 교체
+    # -----------------------------
+    def _fingerprint(self, name):
+        fingerprint = self._specs[name]["fingerprint"]
+        if fingerprint is None:
+            return None
+        try:
+            return fingerprint()
+        except Exception as e:
+            print(f"[Registry] {name} fingerprint 확인 실패: {e!r}")
+            return None
+
+    def _swap(self, staged: dict, seconds: dict, fingerprints: dict) -> dict:
+        """
+        staged 인스턴스를 한 번에 활성 버전으로 교체 → 교체된 이전 인스턴스 dict
+        """
+        with self._swap_lock:
+            previous = {name: self._instances[name] for name in staged if name in self._instances}
+            instances = dict(self._instances)
+            instances.update(staged)
+            self._instances = instances
+
+            for name, instance in staged.items():
+                current = self._versions.get(name)
+                if current is not None:
+                    history = self._history.setdefault(name, deque(maxlen=RELOAD_HISTORY))
+                    history.appendleft(current)
+                generation = current["generation"] + 1 if current else 1
+                version_fn = self._specs[name]["version"]
+                version = version_fn(instance) if version_fn else None
+                self._load_seconds[name] = round(seconds[name], 3)
+                self._fingerprints[name] = fingerprints.get(name)
+                self._versions[name] = {
+                    "version": str(generation) if version is None else str(version),
+                    "generation": generation,
+                    "loaded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                    "load_seconds": self._load_seconds[name],
+                }
+
+        for name, instance in staged.items():
+            activate = self._specs[name]["activate"]
+            if activate is not None:
+                activate(instance)
+        return previous
+
+    def dependents(self, name) -> list:
+        """
+        name + name에 (간접적으로) 의존하는 컴포넌트 (등록 순서 = 만드는 순서)
+        """
+        names = [name]
+        for other in self._factories:
+            if other not in names and any(dep in names for dep in self._specs[other]["depends"]):
+                names.append(other)
+        return names
+
+    def reload(self, name, reason="manual") -> bool:
+        """
+        새 버전으로 교체 (현재 스레드에서 실행). 다른 reload가 진행 중이면 바로 False
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        return self._run_reload(name, reason)
+
+    def start_reload(self, name, reason="admin") -> bool:
+        """
+        백그라운드 스레드에서 reload 시작. 다른 reload가 진행 중이면 False
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False
+        threading.Thread(
+            target=self._run_reload, args=(name, reason), name="registry-reload", daemon=True
+        ).start()
+        return True
+
+    def _run_reload(self, name, reason) -> bool:
+        # _reload_lock을 잡은 상태로 호출 → 끝나면 반납
+        try:
+            names = self.dependents(name)
+            self._reloading = {"components": names, "reason": reason, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+            print(f"[Registry] reload 시작 ({reason}): {', '.join(names)}")
+
+            staged, seconds, fingerprints = {}, {}, {}
+            self._local.staged = staged
+            try:
+                for component in names:
+                    fingerprints[component] = self._fingerprint(component)
+                    started = time.perf_counter()
+                    # factory 안의 registry.get()은 staged(새 버전) 의존 컴포넌트를 받음
+                    instance = self._factories[component]()
+                    staged[component] = instance
+                    warmup = self._specs[component]["warmup"]
+                    if warmup is not None:
+                        warmup(instance)
+                    seconds[component] = time.perf_counter() - started
+            except Exception as e:
+                print(f"[Registry] {name} reload 실패 → 기존 버전 유지: {e!r}")
+                self._reload_errors[name] = {"error": repr(e), "fingerprint": fingerprints.get(name)}
+                COMPONENT_RELOADS.labels(name, "failed").inc()
+                # 만들다 만 새 버전 정리
+                self._retire(staged)
+                return False
+            finally:
+                self._local.staged = None
+
+            previous = self._swap(staged, seconds, fingerprints)
+            self._reload_errors.pop(name, None)
+            for component in names:
+                COMPONENT_RELOADS.labels(component, "swapped").inc()
+            print("[Registry] reload 완료: " + ", ".join(
+                f"{component}={self._versions[component]['version']}" for component in names
+            ))
+
+            # 이전 버전은 진행 중인 요청이 끝날 시간을 준 뒤 정리
+            if previous:
+                timer = threading.Timer(RELOAD_GRACE_SECONDS, self._retire, (previous,))
+                timer.daemon = True
+                timer.start()
+            return True
+        finally:
+            self._reloading = None
+            self._reload_lock.release()
+
+    def _retire(self, instances: dict):
+        for name, instance in instances.items():
+            retire = self._specs[name]["retire"]
+            if retire is None:
+                continue
+            try:
+                retire(instance)
+            except Exception as e:
+                print(f"[Registry] {name} 이전 버전 정리 실패: {e!r}")
+
+    def generation(self, name):
+        """
+        활성 인스턴스가 몇 번째로 로딩된 것인지 (reload마다 증가, 로딩 전이면 None)
+        모듈 전역 캐시처럼 컴포넌트 결과를 저장해 두는 쪽에서 무효화 기준으로 사용
+        """
+        return self._versions.get(name, {}).get("generation")
+
+    def versions(self) -> dict:
+        return {
+            "reloading": self._reloading,
+            "components": {
+                name: {
+                    "loaded": name in self._instances,
+                    **self._versions.get(name, {}),
+                    "previous": [item["version"] for item in self._history.get(name, ())],
+                    "reload_error": self._reload_errors.get(name, {}).get("error"),
+                }
+                for name in self._factories
+            },
+        }
+
+    # -----------------------------
+    # 파일 변경 감시 (워커 프로세스마다 1개)
+    # -----------------------------
+    def start_watching(self, interval=RELOAD_POLL_SECONDS):
+        if interval <= 0 or self._watcher is not None:
+            return None
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="registry-watcher", daemon=True
+        )
+        self._watcher.start()
+        return self._watcher
+
+    def _watch(self, interval):
+        pending = {}   # name -> 바뀐 것을 처음 본 fingerprint
+        while True:
+            time.sleep(interval)
+            for name, spec in self._specs.items():
+                if spec["fingerprint"] is None or name not in self._instances:
+                    continue
+                current = self._fingerprint(name)
+                failed = self._reload_errors.get(name, {}).get("fingerprint")
+                if current is None or current in (self._fingerprints.get(name), failed):
+                    pending.pop(name, None)
+                    continue
+                # 파일을 복사하는 중일 수 있으므로 두 번 연속 같은 값이 나와야 reload
+                if pending.get(name) != current:
+                    pending[name] = current
+                    continue
+                pending.pop(name, None)
+                self.reload(name, reason="file_changed")
+
+
+registry = ComponentRegistry()
+
+
+# ==========================
+# 컴포넌트 등록
+# (무거운 모듈은 factory 안에서 import → 서버 import 시간에는 로딩하지 않음)
+# ==========================
+def _emotion_agent():
+    from agents.emotion_agent import EmotionAgent, load_emotion_model
+    # 모델 가중치만 로딩 (배치 worker 스레드는 첫 추론 때 시작 → preload해도 fork 전에 스레드 없음)
+    return EmotionAgent(emotion_model=load_emotion_model())
+
+
+def _emotion_fingerprint():
+    from agents.emotion_agent import model_fingerprint
+    return model_fingerprint()
+
+
+def _policy_index():
+    from agents.policy_rag import build_retriever
+
+    # 로컬 hybrid 검색: KoBERT 문장 임베딩을 쓰므로 emotion_agent 로딩 후 생성
+    encode_many = registry.get("emotion_agent").encode_many if POLICY_RETRIEVER_DENSE else None
+    return build_retriever(encode_many)
+
+
+def _activate_policy_index(policy_index):
+    # GuideAgent는 검색할 때마다 policy_rag.get_policy_retriever()로 현재 인덱스를 사용
+    from agents.policy_rag import set_policy_index
+    set_policy_index(policy_index)
+
+
+def _warm_policy_index(policy_index):
+    retriever, _ = policy_index
+    retriever.search("환불은 언제 되나요?", intent="환불요청")
+
+
+def _policy_fingerprint():
+    from agents.policy_rag import policy_fingerprint
+    return policy_fingerprint()
+
+
+def _intent_agent():
+    from agents.intent_agent import IntentAgent
+    from agents.intent_classifier import IntentClassifier
+
+    # 로컬 intent 분류기: KoBERT 문장 임베딩을 쓰므로 emotion_agent 로딩 후 생성
+    classifier = None
+    if os.getenv("INTENT_LOCAL", "1") == "1":
+        classifier = IntentClassifier(registry.get("emotion_agent").encode_many)
+    return IntentAgent(classifier=classifier)
+
+
+def _calm_agent():
+    from agents.calm_agent import CalmAgent
+    return CalmAgent()
+
+
+def _guide_agent():
+    from agents.guide_agent import GuideAgent
+    # CalmAgent는 라우터와 같은 인스턴스를 공유
+    return GuideAgent(calm_agent=registry.get("calm_agent"))
+
+
+registry.register(
+    "emotion_agent",
+    _emotion_agent,
+    version=lambda agent: agent.emotion_model.version,
+    warmup=lambda agent: agent.warmup(),
+    retire=lambda agent: agent.close(),
+    fingerprint=_emotion_fingerprint,
+    preload=True,
+)
+registry.register(
+    "policy_index",
+    _policy_index,
+    # dense 검색이면 chunk 임베딩이 KoBERT 버전에 묶이므로 모델이 바뀌면 같이 다시 만듦
+    depends=("emotion_agent",) if POLICY_RETRIEVER_DENSE else (),
+    version=lambda policy_index: policy_index[1],
+    warmup=_warm_policy_index,
+    activate=_activate_policy_index,
+    fingerprint=_policy_fingerprint,
+    # BM25 인덱스는 파일만 읽음 (dense / faiss는 임베딩 추론·API 호출이 필요하므로 fork 이후)
+    preload=POLICY_RETRIEVER == "local" and not POLICY_RETRIEVER_DENSE,
+)
+registry.register("intent_agent", _intent_agent, depends=("emotion_agent",))
+registry.register("calm_agent", _calm_agent)
+registry.register("guide_agent", _guide_agent, depends=("calm_agent",))
@@ -0,0 +1,37 @@
+# server/routers/admin.py
+import os
+import hmac
+
+from fastapi import APIRouter, Header, HTTPException
+
+from registry import registry
+
+router = APIRouter()   # /admin prefix
+
+# 🔹 X-Admin-Token 헤더가 같아야 /admin 사용 가능 (설정하지 않으면 /admin 전체 비활성화, 403)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: str = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN이 설정되지 않아 관리자 API가 비활성화되어 있습니다.")
+    if not hmac.compare_digest((x_admin_token or "").encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="관리자 토큰이 필요합니다.")
+
+
+# 이 워커 프로세스의 활성 버전 (gunicorn 워커별로 다를 수 있으므로 pid 포함)
+#   components: {name: {loaded, version, generation, loaded_at, load_seconds, previous, reload_error}}
+@router.get("/versions")
+def versions():
+    return {"pid": os.getpid(), **registry.versions()}
+
+
+# 새 버전을 백그라운드에서 로딩 → warmup → 교체 (요청을 받은 워커 1개만 해당)
+# 모든 워커에 반영하려면 RELOAD_POLL_SECONDS로 파일 변경 감시를 켜 둠
+@router.post("/reload/{component}", status_code=202)
+def reload_component(component: str):
+    if component not in registry:
+        raise HTTPException(status_code=404, detail=f"알 수 없는 컴포넌트: {component}")
+    if not registry.start_reload(component, reason="admin"):
+        raise HTTPException(status_code=409, detail="다른 reload가 진행 중입니다.")
+    return {"pid": os.getpid(), "reloading": registry.dependents(component)}
@@ -0,0 +1,188 @@
+# server/routers/audio.py
+import io
+import json
+import wave
+import asyncio
+import itertools
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from agents.admission import Overloaded, request_gate
+from agents.audio_pipeline import AudioPipeline
+from agents.audio_segmenter import SAMPLE_RATE, read_wav
+from agents.stt import STTUnavailable, get_stt_pool
+from routers.process_audio import emotion_smoother, sse_event
+from registry import registry
+
+router = APIRouter()      # /api prefix
+ws_router = APIRouter()   # WebSocket (prefix 없음, /ws/call과 같은 위치)
+
+
+async def segment_payload(session_id: str, result: dict) -> dict:
+    # 세션 감정 window는 텍스트 발화와 같은 EmotionSmoother를 공유
+    if "emotion_score" in result:
+        result["smoothed_score"] = await emotion_smoother.aadd_score(session_id, result["emotion_score"])
+    return result
+
+
+def stt_pool_or_503():
+    try:
+        return get_stt_pool()
+    except STTUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+# ==========================
+# /api/analyze-audio (WAV 업로드 → segment별 SSE)
+# ==========================
+# 이벤트: segment (인식이 끝난 발화 구간마다, 순서대로) → done
+#   segment: {index, start, end, text, emotion_label, emotion_score, smoothed_score, (emotion_proba)}
+#            STT / 감정 대기열 초과로 거절된 segment는 {index, start, end, text: "", error: {stage, message, retry_after}}
+@router.post("/analyze-audio")
+async def analyze_audio(
+    session_id: str = Form(...),
+    file: UploadFile = File(...),
+    include_proba: bool = Form(False),
+):
+    # UploadFile은 응답 streaming 전에 닫히므로 메모리로 옮겨서 chunk 단위로 읽음
+    chunks = read_wav(io.BytesIO(await file.read()))
+    try:
+        first = next(chunks, None)
+    except (wave.Error, EOFError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"WAV 파일을 읽을 수 없음: {e or type(e).__name__}")
+
+    stt_pool = stt_pool_or_503()
+
+    # slot은 본문 전송이 끝날 때 반납 (/analyze-solar/stream과 같은 방식)
+    ticket = await request_gate.admit()
+    try:
+        emotion_agent = await registry.aget("emotion_agent")
+    except BaseException:
+        ticket.release()
+        raise
+    pipeline = AudioPipeline(stt_pool, emotion_agent, include_proba=include_proba)
+    samples = itertools.chain([first] if first is not None else [], chunks)
+
+    return StreamingResponse(
+        audio_events(pipeline, samples, session_id, ticket=ticket),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
+
+
+async def audio_events(pipeline: AudioPipeline, samples, session_id: str, ticket=None):
+    async def produce():
+        try:
+            for chunk in samples:
+                pipeline.feed(chunk)
+                # chunk마다 양보 → 끝난 segment의 STT가 나머지 파일을 읽는 동안 시작됨
+                await asyncio.sleep(0)
+        finally:
+            pipeline.close()
+
+    producer = asyncio.ensure_future(produce())
+    try:
+        async for result in pipeline.results():
+            yield sse_event("segment", await segment_payload(session_id, result))
+        await producer
+        yield sse_event("done", {"segments": pipeline.count})
+    except (wave.Error, EOFError, ValueError) as e:
+        # 파일 중간이 깨진 경우: 그때까지의 segment는 이미 전송됨
+        yield sse_event("error", {"stage": "audio", "message": str(e)})
+    except Exception as e:
+        print(f"[AudioPipeline] {session_id} 분석 실패: {e!r}")
+        yield sse_event("error", {"stage": "analysis", "message": str(e)})
+    finally:
+        producer.cancel()
+        pipeline.cancel()
+        if ticket is not None:
+            ticket.release()
+
+
+# ==========================
+# /ws/audio/{session_id} (실시간 오디오 chunk)
+# ==========================
+# 🔹 /ws/audio에서 받는 PCM 형식 범위 (0 등 잘못된 값은 pipeline을 만들기 전에 거절)
+WS_SAMPLE_RATE_RANGE = (8000, 48000)
+WS_CHANNELS = (1, 2)
+
+
+def _invalid_format(sample_rate: int, channels: int):
+    low, high = WS_SAMPLE_RATE_RANGE
+    if not low <= sample_rate <= high:
+        return f"sample_rate는 {low}~{high} 사이여야 합니다: {sample_rate}"
+    if channels not in WS_CHANNELS:
+        return f"channels는 1 또는 2여야 합니다: {channels}"
+    return None
+
+
+def _is_end(text: str) -> bool:
+    try:
+        return json.loads(text).get("type") == "end"
+    except (ValueError, AttributeError):
+        return False
+
+
+# 클라이언트 → 서버
+#   binary frame      : 16-bit little-endian PCM (?sample_rate=16000&channels=1)
+#   {"type": "end"}   : 입력 종료 → 남은 segment까지 전송 후 done
+# 서버 → 클라이언트 (JSON)
+#   {"type": "segment", ...} (segment 순서대로) → {"type": "done", "segments": n}
+@ws_router.websocket("/ws/audio/{session_id}")
+async def audio_stream(websocket: WebSocket, session_id: str, sample_rate: int = SAMPLE_RATE, channels: int = 1):
+    await websocket.accept()
+    error = _invalid_format(sample_rate, channels)
+    if error is not None:
+        await websocket.send_json({"type": "error", "stage": "audio", "message": error})
+        await websocket.close(code=1003)   # 1003: 받을 수 없는 데이터 형식
+        return
+    # 연결 1개 = 요청 slot 1개 (통화가 끝날 때 반납). 과부하면 error 후 1013(Try Again Later)로 종료
+    try:
+        ticket = await request_gate.admit()
+    except Overloaded as e:
+        await websocket.send_json({"type": "error", "stage": e.stage, "message": str(e), "retry_after": e.retry_after})
+        await websocket.close(code=1013)
+        return
+    try:
+        await _audio_stream(websocket, session_id, sample_rate, channels)
+    finally:
+        ticket.release()
+
+
+async def _audio_stream(websocket: WebSocket, session_id: str, sample_rate: int, channels: int):
+    try:
+        stt_pool = get_stt_pool()
+    except STTUnavailable as e:
+        await websocket.send_json({"type": "error", "stage": "stt", "message": str(e)})
+        await websocket.close(code=1011)
+        return
+    emotion_agent = await registry.aget("emotion_agent")
+    pipeline = AudioPipeline(stt_pool, emotion_agent, sample_rate=sample_rate)
+
+    async def send_results():
+        async for result in pipeline.results():
+            await websocket.send_json({"type": "segment", **(await segment_payload(session_id, result))})
+        await websocket.send_json({"type": "done", "segments": pipeline.count})
+
+    sender = asyncio.ensure_future(send_results())
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                pipeline.feed_pcm(message["bytes"], channels)
+            elif message.get("text") and _is_end(message["text"]):
+                break
+
+        pipeline.close()
+        await sender
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        sender.cancel()
+        pipeline.cancel()
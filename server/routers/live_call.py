@@ -0,0 +1,152 @@
+# server/routers/live_call.py
+import json
+import asyncio
+from contextlib import aclosing
+from typing import Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from agents.metrics import LIVE_CALLS, LIVE_TURNS
+from agents.admission import Overloaded, request_gate
+from routers.process_audio import (
+    SolarCallInput,
+    analysis_events,
+    emotion_smoother,
+    get_agents,
+)
+
+router = APIRouter()
+
+
+# ==========================
+# /ws/call/{session_id}
+# ==========================
+# 통화 1건 동안 연결을 유지하고 발화를 받는 대로 분석 결과를 push
+#
+# 클라이언트 → 서버 (JSON)
+#   {"text": "...", "utterance_id": "u1", "include_proba": false}   발화 (utterance_id 생략 시 순번)
+#   {"type": "end"}                                                 통화 종료 (감정 window 초기화)
+#
+# 서버 → 클라이언트 (JSON, 모든 메시지에 type / utterance_id)
+#   emotion → intent → calm / reply (delta) → done       : /analyze-solar/stream과 같은 순서
+#   superseded : 다음 발화가 먼저 도착해서 이 발화의 남은 분석(LLM 호출)을 취소
+#   error      : 실패한 stage (done 없음)
+class LiveUtterance(BaseModel):
+    text: str
+    utterance_id: Optional[str] = None
+    include_proba: bool = False
+
+
+class LiveCall:
+    """
+    통화 1건의 상태: 진행 중인 발화는 최대 1개 (새 발화가 오면 이전 발화 취소)
+    """
+
+    def __init__(self, websocket: WebSocket, session_id: str):
+        self.websocket = websocket
+        self.session_id = session_id
+        self.turn = None        # 진행 중인 asyncio.Task
+        self.turn_id = None
+        self.count = 0
+
+    async def send(self, event: str, utterance_id, payload: dict = None):
+        await self.websocket.send_json({"type": event, "utterance_id": utterance_id, **(payload or {})})
+
+    async def supersede(self):
+        """
+        진행 중인 발화가 있으면 취소하고 정리가 끝날 때까지 대기
+        (analysis_events의 finally에서 남은 LLM Task까지 취소됨)
+        """
+        turn, turn_id = self.turn, self.turn_id
+        self.turn = self.turn_id = None
+        if turn is None or turn.done():
+            return
+        turn.cancel()
+        try:
+            await turn
+        except asyncio.CancelledError:
+            pass
+        LIVE_TURNS.labels("superseded").inc()
+        await self.send("superseded", turn_id)
+
+    def start(self, utterance: LiveUtterance):
+        self.count += 1
+        self.turn_id = utterance.utterance_id or str(self.count)
+        self.turn = asyncio.ensure_future(self.run(utterance, self.turn_id))
+
+    async def run(self, utterance: LiveUtterance, utterance_id):
+        data = SolarCallInput(
+            session_id=self.session_id,
+            text=utterance.text,
+            include_proba=utterance.include_proba,
+        )
+        result = "done"
+        try:
+            async with request_gate.slot():
+                events = analysis_events(data, *await get_agents())
+                async with aclosing(events):
+                    async for event, payload in events:
+                        if event == "error":
+                            result = "error"
+                        await self.send(event, utterance_id, payload)
+        except asyncio.CancelledError:
+            raise
+        except Overloaded as e:
+            # 과부하: 이 발화는 건너뜀 (클라이언트는 retry_after 후 다음 발화부터 정상 처리)
+            result = "shed"
+            await self.send("error", utterance_id, {
+                "stage": e.stage, "message": str(e), "retry_after": e.retry_after,
+            })
+        except Exception as e:
+            # stage 밖(감정 분석 등)에서 난 오류도 같은 형식으로 전달
+            result = "error"
+            print(f"[LiveCall] {self.session_id} 발화 처리 실패: {e!r}")
+            await self.send("error", utterance_id, {"stage": "analysis", "message": str(e)})
+        LIVE_TURNS.labels(result).inc()
+
+    async def close(self):
+        """
+        연결 종료: 진행 중인 발화 취소 (끊긴 연결로 send하다 난 오류는 무시)
+        """
+        if self.turn is None:
+            return
+        self.turn.cancel()
+        try:
+            await self.turn
+        except (asyncio.CancelledError, Exception):
+            pass
+
+
+@router.websocket("/ws/call/{session_id}")
+async def live_call(websocket: WebSocket, session_id: str):
+    await websocket.accept()
+    call = LiveCall(websocket, session_id)
+    LIVE_CALLS.inc()
+    ended = False
+    try:
+        while not ended:
+            try:
+                message = json.loads(await websocket.receive_text())
+                if message.get("type") == "end":
+                    ended = True
+                    continue
+                utterance = LiveUtterance.model_validate(message)
+            except (ValueError, AttributeError) as e:
+                # JSON 형식 오류 / 필드 누락 (ValidationError도 ValueError)
+                await call.send("error", None, {"stage": "input", "message": str(e)})
+                continue
+
+            # 고객이 계속 말하면 이전 발화의 남은 분석은 상담사가 볼 일이 없으므로 취소
+            await call.supersede()
+            call.start(utterance)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await call.close()
+        LIVE_CALLS.dec()
+
+    if ended:
+        # 통화 종료 → 다음 통화가 같은 session_id를 써도 감정 window가 섞이지 않도록
+        await emotion_smoother.areset(session_id)
+        await websocket.close()
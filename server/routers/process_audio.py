@@ -1,25 +1,179 @@
 # server/routers/process_audio.py
 
+import os
+import json
+import math
+import asyncio
+from contextlib import aclosing
+from typing import List
+
+import openai
 from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 
-from schemas import CallAnalysisResult, ResponseGuide
-from agents.intent_agent import IntentAgent
-from agents.guide_agent import GuideAgent
-from agents.calm_agent import CalmAgent
+from schemas import CallAnalysisResult, ResponseGuide, BatchAnalysisResult
 from agents.emotion_smoothing import EmotionSmoother
-from agents.emotion_agent import EmotionAgent
+from agents.request_context import RequestContext
+from agents.response_cache import ResponseCache, normalize_text, emotion_bucket
+from agents.fast_path import FastPath
+from agents.metrics import span, DEGRADED_STAGES
+from agents.degraded import DegradedResponder
+from agents import llm_provider, singleflight
+from agents.admission import Overloaded, admitted, request_gate
+from registry import registry, POLICY_RETRIEVER_DENSE
 
 router = APIRouter()
 
 # ==========================
 # Initialize Agents
+# (무거운 에이전트는 registry에서 lazy / 백그라운드 로딩)
 # ==========================
-intent_agent = IntentAgent()
-guide_agent = GuideAgent()
-calm_agent = CalmAgent()
 emotion_smoother = EmotionSmoother(window=3)
-emotion_agent = EmotionAgent()
+
+# 인삿말 / 맞장구는 LLM 없이 준비된 안내문으로 응답
+fast_path = FastPath()
+
+
+AGENT_NAMES = ("emotion_agent", "intent_agent", "guide_agent", "calm_agent")
+
+
+async def get_agents():
+    # GuideAgent가 쓰는 정책 인덱스도 이벤트 루프 밖에서 로딩되도록 먼저 확보
+    await registry.aget("policy_index")
+    for name in AGENT_NAMES:
+        await registry.aget(name)
+    # hot reload 교체 도중이어도 한 요청은 같은 버전 묶음(감정 모델 ↔ intent 분류기)을 사용
+    return registry.snapshot(*AGENT_NAMES)
+
+
+# 요청 1건이 LLM 호출(재시도 포함)에 쓸 수 있는 전체 시간 (상담 화면 SLA)
+REQUEST_DEADLINE_SECONDS = float(os.getenv("REQUEST_DEADLINE_SECONDS", "8"))
+# /analyze-batch: 기본 예산 + 고유 발화 수에 비례한 예산 (LLM 동시 호출 slot 1개가 발화 1건에 쓰는 시간 기준)
+BATCH_DEADLINE_SECONDS = float(os.getenv("BATCH_DEADLINE_SECONDS", "120"))
+BATCH_DEADLINE_PER_UTTERANCE = float(os.getenv("BATCH_DEADLINE_PER_UTTERANCE", "4"))
+
+# /analyze-solar stage별 예산: 요청 시작 후 전체 예산의 몇 % 시점까지 끝나야 하는지
+# (넘기면 그 stage는 템플릿 응답으로 대체하고 degraded=True로 응답)
+STAGE_BUDGET_INTENT = float(os.getenv("STAGE_BUDGET_INTENT", "0.3"))
+STAGE_BUDGET_GUIDE = float(os.getenv("STAGE_BUDGET_GUIDE", "0.9"))
+STAGE_BUDGET_CALM = float(os.getenv("STAGE_BUDGET_CALM", "0.9"))
+
+# 시간 초과 / 재시도 후에도 실패한 provider 오류 / LLM slot 부족은 템플릿으로 대체
+DEGRADABLE_ERRORS = (asyncio.TimeoutError, TimeoutError, openai.APIError, Overloaded)
+
+degraded_responder = DegradedResponder()
+
+
+# 1이면 /analyze-solar에서 대응문 + 상담사 피드백을 LLM 1회(JSON schema)로 생성
+# (검증 실패 / 대응문 캐시 hit 시에는 기존처럼 CalmAgent를 따로 호출)
+COMBINED_GENERATION = os.getenv("COMBINED_GENERATION", "0") == "1"
+
+
+# 고객 대응문 생성용 시스템 프롬프트
+CUSTOMER_SYSTEM_PROMPT = """
+당신은 고객센터 상담사입니다.
+고객에게 전달할 실제 대응문만 생성하세요.
+'감정 안정', '심호흡', '상담사 교육' 같은 문구는 절대 생성하지 마세요.
+"""
+
+
+# ==========================
+# Response Cache (자주 반복되는 발화의 Intent / 대응문 재사용)
+# ==========================
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+RESPONSE_CACHE_SEMANTIC = os.getenv("RESPONSE_CACHE_SEMANTIC", "0") == "1"
+RESPONSE_CACHE_SIMILARITY = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+
+def _cache_embeddings():
+    # 정책 인덱스(faiss)와 같은 OpenAI 임베딩 모델을 semantic lookup에 재사용
+    from agents.policy_rag import get_embeddings
+    return get_embeddings()
+
+
+intent_cache = ResponseCache(
+    "intent", max_size=RESPONSE_CACHE_SIZE, ttl_seconds=RESPONSE_CACHE_TTL
+)
+guide_cache = ResponseCache(
+    "guide",
+    max_size=RESPONSE_CACHE_SIZE,
+    ttl_seconds=RESPONSE_CACHE_TTL,
+    embeddings_factory=_cache_embeddings if RESPONSE_CACHE_SEMANTIC else None,
+    similarity_threshold=RESPONSE_CACHE_SIMILARITY,
+)
+
+
+async def cached_intent(intent_agent, text, embedding=None):
+    # 로컬 intent 분류기는 감정 모델 임베딩을 쓰므로 emotion_agent / intent_agent 중 하나라도
+    # reload되면 캐시된 intent는 모두 무효
+    intent_cache.check_version((registry.generation("emotion_agent"), registry.generation("intent_agent")))
+    key = (normalize_text(text),)
+    intent = intent_cache.get(key)
+    if intent is None:
+        intent = await intent_agent.aclassify_intent(text, embedding)
+        intent_cache.set(key, intent)
+    return intent
+
+
+async def cached_guide(guide_agent, text, intent, emotion_label, emotion_score, ctx, combined=False):
+    # 정책 파일이 바뀌어 인덱스 버전이 달라지면 캐시된 대응문은 모두 무효
+    _, policy_version = await registry.aget("policy_index")
+    guide_cache.check_version(policy_version)
+
+    key = (normalize_text(text), intent, emotion_bucket(emotion_label, emotion_score))
+    reply, vector = await guide_cache.alookup(key, text)
+    if reply is not None:
+        return reply
+
+    # combined: 상담사 피드백도 같은 응답에서 받아 ctx에 저장 (CalmAgent 호출 생략)
+    sections = None
+    if combined and "calm" not in ctx:
+        sections = await guide_agent.agenerate_combined(
+            system_prompt=CUSTOMER_SYSTEM_PROMPT,
+            user_text=text,
+            intent=intent,
+            emotion_label=emotion_label,
+            emotion_score=emotion_score,
+            ctx=ctx,
+        )
+
+    if sections is not None:
+        calm, reply = sections
+        ctx.set("calm", calm)
+    else:
+        reply = await guide_agent.agenerate(
+            system_prompt=CUSTOMER_SYSTEM_PROMPT,
+            user_text=text,
+            intent=intent,
+            emotion_label=emotion_label,
+            emotion_score=emotion_score,
+            ctx=ctx,
+        )
+    guide_cache.set(key, reply, vector)
+    return reply
+
+
+@router.get("/cache/stats")
+async def cache_stats():
+    emotion_agent = await registry.aget("emotion_agent")
+    return {
+        "emotion": emotion_agent.cache.stats(),
+        "intent": intent_cache.stats(),
+        "guide": guide_cache.stats(),
+        # 진행 중인 동일 LLM 호출 공유 (agent별 leader / follower 수, 많이 공유된 key)
+        "singleflight": singleflight.stats(),
+    }
+
+
+@router.get("/admission/stats")
+async def admission_stats():
+    return {
+        "request": request_gate.stats(),
+        **llm_provider.gate_stats(),
+    }
 
 
 # ==========================
@@ -28,58 +182,480 @@ emotion_agent = EmotionAgent()
 class SolarCallInput(BaseModel):
     session_id: str
     text: str
+    include_proba: bool = False   # True면 감정 전체 분포(emotion_proba)도 반환 (그래프용)
+
+
+def package_response(agent_calm_message: str, customer_response: str) -> str:
+    """
+    상담사 안정 피드백 + 추천 대응문을 고정 템플릿으로 조립
+    """
+    return f"""
+### 🟩 상담사 안정 피드백
+{agent_calm_message}
+
+### 🟦 추천 대응문
+{customer_response}
+""".strip()
+
+
+def fast_path_result(entry, emotion_result, smoothed_score) -> ResponseGuide:
+    return ResponseGuide(
+        intent=entry["intent"],
+        emotion_label=emotion_result["emotion_label"],
+        emotion_score=smoothed_score,
+        response_text=package_response(entry["calm"], entry["reply"]),
+        emotion_proba=emotion_result.get("emotion_proba"),
+        fast_path=True,
+    )
+
+
+def needs_embedding(intent_agent, entry) -> bool:
+    # 문장 임베딩은 로컬 intent 분류 / 정책 hybrid 검색에 사용
+    if intent_agent.classifier is None and not POLICY_RETRIEVER_DENSE:
+        return False
+    # fast path로 끝날 발화는 intent / 정책 검색이 필요 없으므로 임베딩도 받지 않음
+    return entry is None or entry.get("require_neutral", False)
+
+
+async def within_budget(stage, fraction, factory, fallback, degraded_stages):
+    """
+    stage 예산 안에 끝나면 결과, 아니면 (진행 중인 작업을 취소하고) fallback() 결과
+    """
+    try:
+        timeout = llm_provider.stage_remaining(fraction)
+        if timeout <= 0:
+            raise llm_provider.DeadlineExceeded(f"{stage}: stage 예산 소진")
+        return await asyncio.wait_for(factory(), timeout)
+    except DEGRADABLE_ERRORS as e:
+        print(f"[Degraded] {stage} → 템플릿 응답으로 대체: {e!r}")
+        DEGRADED_STAGES.labels(stage).inc()
+        degraded_stages.append(stage)
+        return fallback()
 
 
 @router.post("/analyze-solar", response_model=CallAnalysisResult)
-def analyze_call_solar(data: SolarCallInput):
+@admitted
+async def analyze_call_solar(data: SolarCallInput):
+    llm_provider.start_deadline(REQUEST_DEADLINE_SECONDS)
+    emotion_agent, intent_agent, guide_agent, calm_agent = await get_agents()
+
+    # 요청 단위 결과 공유 컨텍스트 (각 stage 결과는 요청당 1번만 계산)
+    ctx = RequestContext()
+    fast_entry = fast_path.match(data.text)
 
-    # 0) KoBERT 감정 분석
-    emotion_result = emotion_agent.predict(data.text)
+    # 0) KoBERT 감정 분석 (배치 엔진에서 다른 요청과 함께 실행)
+    #    로컬 intent 분류기가 있으면 같은 forward의 문장 임베딩도 받아옴
+    with span("emotion"):
+        emotion_result = await emotion_agent.aanalyze(
+            data.text,
+            with_proba=data.include_proba,
+            with_embedding=needs_embedding(intent_agent, fast_entry),
+        )
     emotion_label = emotion_result["emotion_label"]
     raw_emotion_score = emotion_result["emotion_score"]
+    ctx.set("emotion", emotion_result)
 
-    # 1) Intent
-    intent = intent_agent.classify_intent(data.text)
-
-    # 2) Smooth emotion score
-    smoothed_score = emotion_smoother.add_score(
+    # 1) Smooth emotion score
+    smoothed_score = await emotion_smoother.aadd_score(
         data.session_id, raw_emotion_score
     )
+    ctx.set("emotion_score", smoothed_score)
 
-    # 3) 고객 대응문 생성 (GuideAgent)
-    customer_response = guide_agent.generate(
-        system_prompt="""
-당신은 고객센터 상담사입니다.
-고객에게 전달할 실제 대응문만 생성하세요.
-'감정 안정', '심호흡', '상담사 교육' 같은 문구는 절대 생성하지 마세요.
-""",
-        user_text=data.text,
-        intent=intent,
-        emotion_label=emotion_label,
-        emotion_score=smoothed_score,
-    )
+    # 1-1) Fast path: 인삿말 / 맞장구는 LLM 단계 없이 바로 응답
+    if fast_entry is not None and fast_path.accepts(fast_entry, emotion_label):
+        return CallAnalysisResult(
+            result=fast_path_result(fast_entry, emotion_result, smoothed_score)
+        )
 
-    # 4) 상담사 안정 피드백 (CalmAgent)
-    agent_calm_message = calm_agent.generate(
-        emotion_label=emotion_label,
-        emotion_score=smoothed_score  # calm_agent가 score 필요 없으면 무시해도 됨
-    )
+    # 2) 감정 결과가 나오면 바로 상담사 안정 피드백(CalmAgent) 시작
+    #    → Intent / GuideAgent와 서로 의존하지 않으므로 동시에 진행
+    #    → GuideAgent의 "calm" action도 ctx를 통해 이 결과를 공유
+    async def run_calm():
+        return await calm_agent.agenerate(
+            emotion_label=emotion_label,
+            emotion_score=smoothed_score  # calm_agent가 score 필요 없으면 무시해도 됨
+        )
 
-    # 5) 템플릿 패키징
-    final_text = f"""
-### 🟩 상담사 안정 피드백
-{agent_calm_message}
+    # combined 모드면 피드백은 대응문과 같은 LLM 호출에서 받으므로 미리 시작하지 않음
+    if not COMBINED_GENERATION:
+        ctx.start("calm", run_calm)
 
-### 🟦 추천 대응문
-{customer_response}
-""".strip()
+    # 각 stage는 예산(STAGE_BUDGET_*) 안에 끝나지 않으면 템플릿 응답으로 대체
+    degraded_stages = []
+    embedding = emotion_result.get("embedding")
+
+    try:
+        # 3) Intent (캐시 우선) → 예산 초과 시 로컬 분류 결과
+        intent = await within_budget(
+            "intent",
+            STAGE_BUDGET_INTENT,
+            lambda: ctx.acompute("intent", lambda: cached_intent(intent_agent, data.text, embedding)),
+            lambda: intent_agent.fallback_intent(data.text, embedding),
+            degraded_stages,
+        )
+
+        # 4) 고객 대응문 생성 (GuideAgent, 캐시 우선) - intent가 필요하므로 intent 이후 실행
+        #    → 예산 초과 시 intent별 템플릿 + (검색이 끝났다면) 정책 발췌
+        customer_response = await within_budget(
+            "guide",
+            STAGE_BUDGET_GUIDE,
+            lambda: cached_guide(
+                guide_agent, data.text, intent, emotion_label, smoothed_score, ctx,
+                combined=COMBINED_GENERATION,
+            ),
+            lambda: degraded_responder.reply(intent, ctx.get("policy")),
+            degraded_stages,
+        )
+
+        # 5) 상담사 안정 피드백 대기 → 예산 초과 시 감정별 템플릿 팁
+        agent_calm_message = await within_budget(
+            "calm",
+            STAGE_BUDGET_CALM,
+            lambda: ctx.acompute("calm", run_calm),
+            lambda: degraded_responder.calm(emotion_label),
+            degraded_stages,
+        )
+    finally:
+        # 실패 / 예산 초과로 끝나지 않은 stage 정리
+        ctx.cancel_pending()
 
-    # 6) 최종 응답
+    # 6) 템플릿 패키징
+    final_text = package_response(agent_calm_message, customer_response)
+
+    # 7) 최종 응답
     result = ResponseGuide(
         intent=intent,
         emotion_label=emotion_label,
         emotion_score=smoothed_score,
-        response_text=final_text
+        response_text=final_text,
+        emotion_proba=emotion_result.get("emotion_proba"),
+        degraded=bool(degraded_stages),
+        degraded_stages=degraded_stages,
     )
 
     return CallAnalysisResult(result=result)
+
+
+# ==========================
+# /api/analyze-solar/stream (Server-Sent Events)
+# ==========================
+# 이벤트 순서:
+#   emotion → intent → (calm / reply 토큰이 생성되는 대로 섞여서) → done
+#   실패한 stage가 있으면 error 이벤트 후 종료 (done 없음)
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@router.post("/analyze-solar/stream")
+async def analyze_call_solar_stream(data: SolarCallInput):
+    # slot은 본문 전송이 끝날 때 반납 (generator가 시작되기 전에 끊겨도 background에서 반납)
+    ticket = await request_gate.admit()
+    try:
+        agents = await get_agents()
+    except BaseException:
+        ticket.release()
+        raise
+    return StreamingResponse(
+        stream_analysis(data, *agents, ticket=ticket),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release),
+    )
+
+
+async def stream_analysis(data, emotion_agent, intent_agent, guide_agent, calm_agent, ticket=None):
+    # 연결이 끊기면 안쪽 generator도 바로 닫아서 남은 LLM 호출을 취소
+    events = analysis_events(data, emotion_agent, intent_agent, guide_agent, calm_agent)
+    try:
+        async with aclosing(events):
+            async for event, payload in events:
+                yield sse_event(event, payload)
+    except Overloaded as e:
+        # 헤더(200)는 이미 나갔으므로 error 이벤트로 전달
+        yield sse_event("error", {"stage": e.stage, "message": str(e), "retry_after": e.retry_after})
+    finally:
+        if ticket is not None:
+            ticket.release()
+
+
+async def analysis_events(data, emotion_agent, intent_agent, guide_agent, calm_agent):
+    """
+    발화 1건의 stage 결과를 (event, payload)로 생성 (SSE / WebSocket 공용)
+    """
+    llm_provider.start_deadline(REQUEST_DEADLINE_SECONDS)
+    ctx = RequestContext()
+    queue = asyncio.Queue()
+    fast_entry = fast_path.match(data.text)
+
+    # 0) KoBERT 감정 분석 → 바로 전송
+    with span("emotion"):
+        emotion_result = await emotion_agent.aanalyze(
+            data.text,
+            with_proba=data.include_proba,
+            with_embedding=needs_embedding(intent_agent, fast_entry),
+        )
+    emotion_label = emotion_result["emotion_label"]
+    ctx.set("emotion", emotion_result)
+
+    # 1) Smooth emotion score
+    smoothed_score = await emotion_smoother.aadd_score(
+        data.session_id, emotion_result["emotion_score"]
+    )
+    ctx.set("emotion_score", smoothed_score)
+
+    yield "emotion", {
+        "emotion_label": emotion_label,
+        "emotion_score": smoothed_score,
+        "emotion_proba": emotion_result.get("emotion_proba"),
+    }
+
+    # Fast path: 준비된 안내문을 한 번에 전송
+    if fast_entry is not None and fast_path.accepts(fast_entry, emotion_label):
+        result = fast_path_result(fast_entry, emotion_result, smoothed_score)
+        yield "intent", {"intent": result.intent}
+        yield "calm", {"delta": fast_entry["calm"]}
+        yield "reply", {"delta": fast_entry["reply"]}
+        yield "done", result.model_dump()
+        return
+
+    # 2) 상담사 안정 피드백: 토큰 단위 streaming
+    #    (GuideAgent의 calm action도 ctx를 통해 이 Task를 공유 → 중복 호출 없음)
+    async def stream_calm():
+        parts = []
+        async for delta in calm_agent.astream(emotion_label=emotion_label, emotion_score=smoothed_score):
+            parts.append(delta)
+            await queue.put(("calm", {"delta": delta}))
+        return "".join(parts).strip()
+
+    # 3) Intent → 추천 대응문 streaming (캐시 hit이면 한 번에 전송)
+    async def stream_reply():
+        intent = await ctx.acompute(
+            "intent",
+            lambda: cached_intent(intent_agent, data.text, emotion_result.get("embedding")),
+        )
+        await queue.put(("intent", {"intent": intent}))
+
+        _, policy_version = await registry.aget("policy_index")
+        guide_cache.check_version(policy_version)
+        key = (normalize_text(data.text), intent, emotion_bucket(emotion_label, smoothed_score))
+        reply, vector = await guide_cache.alookup(key, data.text)
+
+        if reply is None:
+            parts = []
+            async for delta in guide_agent.astream(
+                system_prompt=CUSTOMER_SYSTEM_PROMPT,
+                user_text=data.text,
+                intent=intent,
+                emotion_label=emotion_label,
+                emotion_score=smoothed_score,
+                ctx=ctx,
+            ):
+                parts.append(delta)
+                await queue.put(("reply", {"delta": delta}))
+            reply = "".join(parts).strip()
+            guide_cache.set(key, reply, vector)
+        else:
+            await queue.put(("reply", {"delta": reply}))
+
+        return intent, reply
+
+    async def run(stage, factory):
+        try:
+            return await factory()
+        except Exception as e:
+            await queue.put(("error", {"stage": stage, "message": str(e)}))
+            raise
+        finally:
+            await queue.put(("__end__", None))
+
+    calm_task = asyncio.ensure_future(run("calm", stream_calm))
+    ctx.attach("calm", calm_task)
+    reply_task = asyncio.ensure_future(run("reply", stream_reply))
+
+    try:
+        failed = False
+        pending = 2
+        while pending:
+            event, payload = await queue.get()
+            if event == "__end__":
+                pending -= 1
+                continue
+            failed = failed or event == "error"
+            yield event, payload
+
+        if failed:
+            return
+
+        intent, customer_response = reply_task.result()
+        result = ResponseGuide(
+            intent=intent,
+            emotion_label=emotion_label,
+            emotion_score=smoothed_score,
+            response_text=package_response(calm_task.result(), customer_response),
+            emotion_proba=emotion_result.get("emotion_proba"),
+        )
+        yield "done", result.model_dump()
+    finally:
+        # 클라이언트가 연결을 끊거나 다음 발화로 대체되면 남은 LLM 호출 취소
+        for task in (calm_task, reply_task):
+            if not task.done():
+                task.cancel()
+            elif not task.cancelled():
+                task.exception()  # error 이벤트로 이미 전달됨
+        ctx.cancel_pending()
+
+
+# ==========================
+# /api/analyze-batch
+# ==========================
+# 배치 안에서 동시에 진행할 최대 LLM 호출 수
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+
+
+class BatchUtterance(BaseModel):
+    session_id: str
+    text: str
+
+
+class BatchCallInput(BaseModel):
+    utterances: List[BatchUtterance]   # 세션별로 발화 순서대로 정렬되어 있어야 함
+    include_proba: bool = False
+
+
+@router.post("/analyze-batch", response_model=BatchAnalysisResult)
+@admitted
+async def analyze_call_batch(data: BatchCallInput):
+    utterances = data.utterances
+    unique_texts = list(dict.fromkeys(u.text for u in utterances))
+    # 발화가 많을수록 LLM slot을 기다리는 시간이 길어지므로 예산도 비례해서 늘림
+    llm_rounds = math.ceil(len(unique_texts) / BATCH_LLM_CONCURRENCY)
+    llm_provider.start_deadline(BATCH_DEADLINE_SECONDS + BATCH_DEADLINE_PER_UTTERANCE * llm_rounds)
+    emotion_agent, intent_agent, guide_agent, calm_agent = await get_agents()
+
+    # 0) KoBERT 감정 분석: 고유 텍스트를 대기열 한도만큼씩 제출 → 배치 엔진이 묶어서 forward
+    #    (발화가 많아도 배치 요청이 자기 텍스트를 대기열 초과로 거절하지 않음)
+    #    시간 초과 등으로 실패한 텍스트만 neutral로 대체 (나머지 발화 결과는 그대로)
+    fast_entries = {text: fast_path.match(text) for text in unique_texts}
+    with span("emotion"):
+        emotion_results = await emotion_agent.aanalyze_many(
+            unique_texts,
+            with_proba=data.include_proba,
+            with_embedding=[needs_embedding(intent_agent, fast_entries[text]) for text in unique_texts],
+        )
+    emotions = {}
+    degraded_emotions = set()
+    for text, result in zip(unique_texts, emotion_results):
+        if isinstance(result, DEGRADABLE_ERRORS):
+            print(f"[Degraded] emotion → neutral로 대체: {result!r}")
+            DEGRADED_STAGES.labels("emotion").inc()
+            degraded_emotions.add(text)
+            result = {"emotion_label": "neutral", "emotion_score": 0.0}
+        emotions[text] = result
+
+    # 1) Smooth emotion score: 입력 순서대로 세션별 window 업데이트 (감정 분석이 실패한 발화는 제외)
+    smoothed_scores = [
+        await emotion_smoother.aadd_score(u.session_id, emotions[u.text]["emotion_score"])
+        if isinstance(emotions[u.text], dict) and u.text not in degraded_emotions else 0.0
+        for u in utterances
+    ]
+
+    # 2) 배치 전체에서 공유하는 결과 컨텍스트
+    #    - intent:<text>                     → 같은 텍스트는 IntentAgent 1번
+    #    - calm:<label>                      → CalmAgent는 감정 레이블만 쓰므로 레이블당 1번
+    #    - guide:<text>:<intent>:<label>     → 같은 입력의 대응문은 1번 (첫 발화의 score 사용)
+    shared = RequestContext()
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def limited(factory):
+        async with semaphore:
+            return await factory()
+
+    async def analyze_one(utterance: BatchUtterance, smoothed_score: float):
+        text = utterance.text
+        emotion = emotions[text]
+        if isinstance(emotion, BaseException):
+            raise emotion
+        emotion_label = emotion["emotion_label"]
+        degraded_stages = ["emotion"] if text in degraded_emotions else []
+
+        # Fast path: 인삿말 / 맞장구는 LLM 호출 없이 바로 응답
+        fast_entry = fast_entries[text]
+        if not degraded_stages and fast_entry is not None and fast_path.accepts(fast_entry, emotion_label):
+            return fast_path_result(fast_entry, emotion, smoothed_score)
+
+        calm_key = f"calm:{emotion_label}"
+
+        def run_calm():
+            return limited(lambda: calm_agent.agenerate(
+                emotion_label=emotion_label,
+                emotion_score=smoothed_score,
+            ))
+
+        calm_task = shared.start(calm_key, run_calm)
+        embedding = emotion.get("embedding")
+
+        # 각 stage가 실패하거나 배치 예산을 넘기면 이 발화만 템플릿 응답으로 대체
+        intent = await within_budget(
+            "intent",
+            1.0,
+            lambda: shared.acompute(
+                f"intent:{text}",
+                lambda: limited(lambda: cached_intent(intent_agent, text, embedding)),
+            ),
+            lambda: intent_agent.fallback_intent(text, embedding),
+            degraded_stages,
+        )
+
+        async def run_guide():
+            # GuideAgent의 calm action도 배치 공유 Task를 그대로 사용
+            ctx = RequestContext()
+            if calm_task is not None:
+                ctx.attach("calm", calm_task)
+            else:
+                # 다른 발화에서 이미 끝난 피드백
+                ctx.set("calm", shared.get(calm_key))
+            return await limited(lambda: cached_guide(
+                guide_agent, text, intent, emotion_label, smoothed_score, ctx
+            ))
+
+        customer_response = await within_budget(
+            "guide",
+            1.0,
+            lambda: shared.acompute(f"guide:{text}:{intent}:{emotion_label}", run_guide),
+            lambda: degraded_responder.reply(intent),
+            degraded_stages,
+        )
+        agent_calm_message = await within_budget(
+            "calm",
+            1.0,
+            lambda: shared.acompute(calm_key, run_calm),
+            lambda: degraded_responder.calm(emotion_label),
+            degraded_stages,
+        )
+
+        return ResponseGuide(
+            intent=intent,
+            emotion_label=emotion_label,
+            emotion_score=smoothed_score,
+            response_text=package_response(agent_calm_message, customer_response),
+            emotion_proba=emotion.get("emotion_proba"),
+            degraded=bool(degraded_stages),
+            degraded_stages=degraded_stages,
+        )
+
+    try:
+        results = await asyncio.gather(
+            *(analyze_one(u, score) for u, score in zip(utterances, smoothed_scores)),
+            return_exceptions=True,
+        )
+    finally:
+        shared.cancel_pending()
+
+    # 예상하지 못한 오류는 해당 발화만 error로 반환 (끝난 발화 결과는 그대로)
+    items = []
+    for utterance, result in zip(utterances, results):
+        if isinstance(result, BaseException):
+            print(f"[AnalyzeBatch] {utterance.session_id} 발화 분석 실패: {result!r}")
+            result = ResponseGuide(error=f"{type(result).__name__}: {result}")
+        items.append(result)
+    return BatchAnalysisResult(results=items)
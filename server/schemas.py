@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Literal
+from typing import Dict, List, Literal, Optional
 
 class CallInput(BaseModel):
     session_id: str
@@ -13,7 +13,16 @@ class ResponseGuide(BaseModel):
     emotion_label: str = ""
     emotion_score: float = 0.0
     response_text: str = ""   # 최종 패키징된 텍스트 (고객 대응 + 안정 피드백)
+    emotion_proba: Optional[Dict[str, float]] = None   # 감정 전체 분포 (include_proba 요청 시, 그래프용)
+    fast_path: bool = False   # LLM 없이 준비된 안내문(config/fast_path.json)으로 응답했는지
+    degraded: bool = False    # 시간 예산을 넘긴 stage를 템플릿 응답으로 대체했는지
+    degraded_stages: List[str] = []   # 대체된 stage (emotion / intent / guide / calm)
+    error: Optional[str] = None       # /analyze-batch에서 이 발화만 분석에 실패한 경우 오류 내용
 
 
 class CallAnalysisResult(BaseModel):
     result: ResponseGuide
+
+
+class BatchAnalysisResult(BaseModel):
+    results: List[ResponseGuide]   # 입력 utterances와 같은 순서
@@ -0,0 +1,6 @@
+# server/tests/conftest.py
+# 서버는 server/에서 실행되므로 (from agents... import) 테스트도 같은 기준으로 import
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+# server/tests/test_action_planner.py
+import json
+
+import pytest
+
+from agents.action_planner import ActionPlanner, _match
+
+
+def write_rules(tmp_path, rules, **extra):
+    path = tmp_path / "planner_rules.json"
+    path.write_text(json.dumps({"rules": rules, **extra}, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+def test_match_operators():
+    facts = {"intent": "환불요청", "emotion_label": "anger", "emotion_score": 0.7}
+    assert _match({"intent_in": ["환불요청", "배송문의"]}, facts)
+    assert _match({"emotion_score_gte": 0.6, "emotion_label_eq": "anger"}, facts)
+    assert not _match({"emotion_score_lte": 0.5}, facts)
+    # 모든 조건을 만족해야 함
+    assert not _match({"intent_in": ["환불요청"], "emotion_label_eq": "sad"}, facts)
+
+
+def test_match_missing_fact_is_false():
+    assert not _match({"emotion_score_gte": 0.6}, {"emotion_score": None})
+
+
+def test_match_unknown_operator_raises():
+    with pytest.raises(ValueError):
+        _match({"intent_like": "환불"}, {"intent": "환불요청"})
+
+
+def test_default_rules_plan_calm_and_policy():
+    planner = ActionPlanner()
+    assert planner.plan("환불요청", "anger", 0.8) == ["calm", "policy"]
+    assert planner.plan("결제문제", "neutral", 0.2) == ["policy"]
+    assert planner.plan("일반문의", "sad", 0.9) == ["calm"]
+
+
+def test_no_match_returns_none():
+    planner = ActionPlanner()
+    assert planner.plan("일반문의", "neutral", 0.1) is None
+
+
+def test_actions_are_deduplicated_in_rule_order(tmp_path):
+    path = write_rules(tmp_path, [
+        {"action": "policy", "when": {"intent_in": ["파손문의"]}},
+        {"action": "calm", "when": {"emotion_score_gte": 0.5}},
+        {"action": "policy", "when": {"emotion_label_eq": "anger"}},
+    ], default_actions=["basic"], llm_fallback=True)
+    planner = ActionPlanner(path)
+    assert planner.plan("파손문의", "anger", 0.9) == ["policy", "calm"]
+    assert planner.default_actions == ["basic"]
+    assert planner.llm_fallback is True
@@ -0,0 +1,21 @@
+# server/tests/test_admin.py
+import pytest
+from fastapi import HTTPException
+
+from routers import admin
+
+
+def test_admin_disabled_without_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    with pytest.raises(HTTPException) as excinfo:
+        admin.require_admin("anything")
+    assert excinfo.value.status_code == 403
+
+
+def test_admin_requires_matching_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    for token in (None, "", "wrong"):
+        with pytest.raises(HTTPException) as excinfo:
+            admin.require_admin(token)
+        assert excinfo.value.status_code == 401
+    admin.require_admin("secret")
@@ -0,0 +1,109 @@
+# server/tests/test_admission.py
+import asyncio
+
+import pytest
+
+from agents.admission import AdmissionGate, Overloaded
+
+
+def make_gate(**kwargs):
+    options = {"limit": 1, "max_queue": 2, "max_wait": 1.0}
+    options.update(kwargs)
+    return AdmissionGate("test", **options)
+
+
+def test_release_hands_slot_to_waiters_in_order():
+    async def run():
+        gate = make_gate()
+        first = await gate.admit()
+        order = []
+
+        async def wait(name):
+            ticket = await gate.admit()
+            order.append(name)
+            return ticket
+
+        a = asyncio.ensure_future(wait("a"))
+        b = asyncio.ensure_future(wait("b"))
+        await asyncio.sleep(0)
+        assert gate.stats()["queue_depth"] == 2
+
+        first.release()
+        ticket_a = await a
+        # slot을 넘겨받았으므로 active 수는 그대로
+        assert gate.stats()["active"] == 1
+        ticket_a.release()
+        ticket_b = await b
+        ticket_b.release()
+
+        assert order == ["a", "b"]
+        assert gate.stats()["active"] == 0
+        assert gate.stats()["queue_depth"] == 0
+
+    asyncio.run(run())
+
+
+def test_queue_full_sheds_immediately():
+    async def run():
+        gate = make_gate(max_queue=1)
+        ticket = await gate.admit()
+        waiter = asyncio.ensure_future(gate.admit())
+        await asyncio.sleep(0)
+
+        with pytest.raises(Overloaded) as excinfo:
+            await gate.admit()
+        assert excinfo.value.reason == "queue_full"
+        assert excinfo.value.retry_after >= 1
+
+        ticket.release()
+        (await waiter).release()
+
+    asyncio.run(run())
+
+
+def test_wait_timeout_sheds_and_leaves_queue():
+    async def run():
+        gate = make_gate(max_wait=0.05)
+        ticket = await gate.admit()
+
+        with pytest.raises(Overloaded) as excinfo:
+            await gate.admit()
+        assert excinfo.value.reason == "wait_timeout"
+        assert gate.stats()["queue_depth"] == 0
+
+        ticket.release()
+        assert gate.stats()["active"] == 0
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_leak_slot():
+    async def run():
+        gate = make_gate()
+        ticket = await gate.admit()
+        waiter = asyncio.ensure_future(gate.admit())
+        await asyncio.sleep(0)
+
+        # slot을 넘겨받은 직후 취소돼도 slot은 반납돼야 함
+        ticket.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert gate.stats()["active"] == 0
+
+        async with gate.slot():
+            assert gate.stats()["active"] == 1
+        assert gate.stats()["active"] == 0
+
+    asyncio.run(run())
+
+
+def test_release_is_idempotent():
+    async def run():
+        gate = make_gate(limit=2)
+        ticket = await gate.admit()
+        ticket.release()
+        ticket.release()
+        assert gate.stats()["active"] == 0
+
+    asyncio.run(run())
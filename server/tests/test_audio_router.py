@@ -0,0 +1,14 @@
+# server/tests/test_audio_router.py
+import pytest
+
+from routers.audio import _invalid_format
+
+
+@pytest.mark.parametrize("sample_rate, channels", [(16000, 1), (8000, 2), (48000, 1)])
+def test_valid_format(sample_rate, channels):
+    assert _invalid_format(sample_rate, channels) is None
+
+
+@pytest.mark.parametrize("sample_rate, channels", [(0, 1), (-16000, 1), (96000, 1), (16000, 0), (16000, 3), (16000, -1)])
+def test_invalid_format(sample_rate, channels):
+    assert _invalid_format(sample_rate, channels) is not None
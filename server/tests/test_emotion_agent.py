@@ -0,0 +1,52 @@
+# server/tests/test_emotion_agent.py
+import time
+import asyncio
+
+import numpy as np
+
+from agents.admission import Overloaded
+from agents.emotion_agent import EmotionAgent, EmotionModel
+from agents.emotion_batcher import EmotionBatcher
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"texts": list(texts)}
+
+
+class SlowBackend:
+    # 배치 1번에 5ms (대기열이 쌓이도록)
+    def forward(self, inputs):
+        time.sleep(0.005)
+        texts = inputs["texts"]
+        return [[0.1, 0.1, 0.8] for _ in texts], [np.ones(4, dtype=np.float32) for _ in texts]
+
+
+def make_agent(max_queue=8):
+    model = EmotionModel(FakeTokenizer(), None, {0: "anger", 1: "sad", 2: "fear"}, SlowBackend())
+    model.batcher = EmotionBatcher(FakeTokenizer(), SlowBackend(), max_batch_size=4, max_wait_ms=1, max_queue=max_queue)
+    return EmotionAgent(model)
+
+
+def test_bounded_live_requests_shed_when_queue_full():
+    agent = make_agent()
+
+    async def run():
+        return await asyncio.gather(
+            *(agent.aanalyze(f"발화 {i}") for i in range(40)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    agent.close()
+    assert any(isinstance(r, Overloaded) for r in results)
+
+
+def test_analyze_many_does_not_shed_more_than_max_queue_texts():
+    agent = make_agent()
+    texts = [f"발화 {i}" for i in range(40)]
+
+    results = asyncio.run(agent.aanalyze_many(texts, with_proba=False, with_embedding=[True] * 40))
+    agent.close()
+    assert len(results) == 40
+    assert all(isinstance(r, dict) for r in results)
+    assert all(r["emotion_label"] == "fear" and "embedding" in r for r in results)
@@ -0,0 +1,104 @@
+# server/tests/test_emotion_batcher.py
+import os
+
+import numpy as np
+import pytest
+
+from agents.admission import Overloaded
+from agents.emotion_batcher import EmotionBatcher
+
+
+class FakeTokenizer:
+    def __call__(self, texts, **kwargs):
+        return {"texts": list(texts)}
+
+
+class FakeBackend:
+    # 문장 길이로 만든 고정 결과 (배치 크기만큼)
+    def forward(self, inputs):
+        texts = inputs["texts"]
+        probs = [[0.2, 0.3, 0.5] for _ in texts]
+        embeddings = [np.full(4, len(text), dtype=np.float32) for text in texts]
+        return probs, embeddings
+
+
+class StuckBackend:
+    def __init__(self):
+        import threading
+        self.release = threading.Event()
+
+    def forward(self, inputs):
+        self.release.wait(5)
+        return FakeBackend().forward(inputs)
+
+
+def make_batcher(backend=None, **kwargs):
+    return EmotionBatcher(FakeTokenizer(), backend or FakeBackend(), max_wait_ms=1, **kwargs)
+
+
+def test_infer_returns_probs_and_embedding():
+    batcher = make_batcher()
+    output = batcher.infer("환불해 주세요")
+    assert output["probs"] == [0.2, 0.3, 0.5]
+    assert output["embedding"][0] == len("환불해 주세요")
+
+
+def test_stop_then_submit_restarts_worker():
+    batcher = make_batcher()
+    batcher.infer("a")
+    worker = batcher._worker
+    batcher.stop()
+    worker.join(2)
+    assert not worker.is_alive()
+    assert batcher.infer("bb")["embedding"][0] == 2
+
+
+def test_dead_worker_is_restarted():
+    batcher = make_batcher()
+    batcher.infer("a")
+    worker = batcher._worker
+    batcher.stop()
+    worker.join(2)
+    # fork된 자식처럼: Thread 객체는 남아 있지만 스레드는 없는 상태
+    batcher._worker = worker
+    assert batcher.infer("ccc")["embedding"][0] == 3
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork 필요")
+def test_submit_in_forked_child_does_not_hang():
+    batcher = make_batcher()
+    batcher.infer("parent")   # 부모에서 worker 시작 (--preload)
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            ok = batcher.infer("child", timeout=3)["embedding"][0] == len("child")
+            os._exit(0 if ok else 1)
+        except BaseException:
+            os._exit(2)
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+
+
+def test_bounded_submit_sheds_when_queue_full():
+    backend = StuckBackend()
+    batcher = make_batcher(backend, max_queue=1, max_batch_size=1)
+    try:
+        batcher.submit("first", bounded=True)     # worker가 forward 중
+        batcher.submit("second", bounded=True)    # 대기열 1개
+        with pytest.raises(Overloaded) as exc:
+            batcher.submit("third", bounded=True)
+        assert exc.value.reason == "queue_full"
+    finally:
+        backend.release.set()
+
+
+def test_infer_timeout_raises_overloaded():
+    backend = StuckBackend()
+    batcher = make_batcher(backend)
+    try:
+        with pytest.raises(Overloaded) as exc:
+            batcher.infer("slow", timeout=0.05)
+        assert exc.value.reason == "wait_timeout"
+    finally:
+        backend.release.set()
@@ -0,0 +1,67 @@
+# server/tests/test_fast_path.py
+import json
+
+import pytest
+
+from agents.fast_path import FastPath
+
+
+def write_config(tmp_path, entries, enabled=True):
+    path = tmp_path / "fast_path.json"
+    path.write_text(json.dumps({"enabled": enabled, "entries": entries}, ensure_ascii=False), encoding="utf-8")
+    return str(path)
+
+
+ENTRIES = [
+    {"name": "thanks", "patterns": ["감사합니다", "도와주셔서 감사합니다"], "max_extra_chars": 3},
+    {"name": "ack", "patterns": ["네 알겠습니다"], "max_extra_chars": 0, "require_neutral": True},
+]
+
+
+def test_shipped_config_matches_greeting():
+    fast_path = FastPath()
+    assert fast_path.match("안녕하세요!")["name"] == "greeting"
+    assert fast_path.match("안녕하세요 환불이 안 돼요") is None
+
+
+@pytest.mark.parametrize("text", [
+    "환불 때문에 전화드렸습니다",
+    "배송 문의드리려고요",
+    "결제 문의 드리려고요",
+    "파손 때문에 전화 드렸습니다",
+    "안녕하세요 환불",
+])
+def test_utterance_with_intent_keyword_does_not_match(text):
+    assert FastPath().match(text) is None
+
+
+def test_calling_without_intent_still_matches():
+    assert FastPath().match("네 전화드렸습니다")["name"] == "calling"
+
+
+def test_match_ignores_spaces_and_punctuation(tmp_path):
+    fast_path = FastPath(write_config(tmp_path, ENTRIES))
+    assert fast_path.match("네, 알겠습니다.")["name"] == "ack"
+
+
+def test_longer_pattern_wins_extra_char_budget(tmp_path):
+    fast_path = FastPath(write_config(tmp_path, ENTRIES))
+    # "감사합니다"만 보면 남는 글자가 많지만 긴 패턴을 먼저 비교하므로 매칭
+    assert fast_path.match("도와주셔서 감사합니다")["name"] == "thanks"
+    assert fast_path.match("정말 감사합니다")["name"] == "thanks"
+    assert fast_path.match("환불 처리 감사합니다") is None
+
+
+def test_require_neutral(tmp_path):
+    fast_path = FastPath(write_config(tmp_path, ENTRIES))
+    ack = fast_path.match("네 알겠습니다")
+    thanks = fast_path.match("감사합니다")
+    assert fast_path.accepts(ack, "neutral")
+    assert not fast_path.accepts(ack, "anger")
+    assert fast_path.accepts(thanks, "anger")
+
+
+def test_disabled_by_config_or_env(tmp_path, monkeypatch):
+    assert FastPath(write_config(tmp_path, ENTRIES, enabled=False)).match("감사합니다") is None
+    monkeypatch.setenv("FAST_PATH", "0")
+    assert FastPath(write_config(tmp_path, ENTRIES)).match("감사합니다") is None
@@ -0,0 +1,88 @@
+# server/tests/test_local_retriever.py
+import os
+import json
+
+import numpy as np
+
+from agents.local_retriever import LocalPolicyRetriever, tokenize, POLICY_ROUTES_PATH
+from agents.action_planner import RULES_PATH, ActionPlanner
+
+
+class Doc:
+    def __init__(self, text, source):
+        self.page_content = text
+        self.metadata = {"source": source}
+
+
+DOCS = [
+    Doc("환불은 상품 수령 후 7일 이내에 신청할 수 있습니다.", "refund_policy_summary.txt"),
+    Doc("배송은 결제 완료 후 1~3영업일 이내에 출고됩니다.", "shipping_policy_summary.txt"),
+    Doc("파손된 상품은 교환 또는 환불이 가능합니다.", "exchange_policy_summary.txt"),
+]
+
+
+def make_retriever(docs=DOCS, **kwargs):
+    return LocalPolicyRetriever(docs, **kwargs)
+
+
+def test_tokenize_adds_bigrams_for_particles():
+    tokens = tokenize("환불은 언제")
+    assert "환불은" in tokens and "환불" in tokens
+    assert "언제" in tokens
+
+
+def test_bm25_ranks_matching_chunk_first():
+    retriever = make_retriever(k=3)
+    assert retriever.search("배송이 언제 출고되나요")[0] is DOCS[1]
+    assert retriever.search("환불 신청 기간")[0] is DOCS[0]
+
+
+def test_intent_prefilter_limits_sources():
+    retriever = make_retriever(k=3)
+    results = retriever.search("상품", intent="배송문의")
+    assert results == [DOCS[1]]
+
+
+def test_unknown_intent_searches_everything():
+    retriever = make_retriever(k=3)
+    assert len(retriever.search("상품", intent="일반문의")) == 3
+
+
+def test_empty_corpus_returns_no_results():
+    retriever = make_retriever(docs=[])
+    assert retriever.search("환불", intent="환불요청") == []
+
+
+def test_dense_scores_are_mixed_in():
+    vectors = {doc.page_content: np.eye(3, dtype="float32")[i] for i, doc in enumerate(DOCS)}
+    retriever = make_retriever(encode_many=lambda texts: [vectors.get(t, np.zeros(3)) for t in texts], alpha=1.0, k=1)
+    # alpha=1이면 BM25와 무관하게 임베딩이 가장 가까운 chunk
+    assert retriever.search("환불", embedding=np.eye(3, dtype="float32")[2]) == [DOCS[2]]
+
+
+def test_routed_intents_are_planned_for_policy():
+    # policy_routes.json에 정책 파일이 있는 intent는 planner가 policy step을 계획해야 함
+    with open(POLICY_ROUTES_PATH, encoding="utf-8") as f:
+        routes = json.load(f)
+    with open(RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)["rules"]
+    planned = {
+        intent
+        for rule in rules if rule["action"] == "policy"
+        for intent in rule["when"].get("intent_in", [])
+    }
+    assert set(routes) <= planned
+
+
+def test_payment_intent_plans_policy_and_retrieves_refund_policy():
+    # 결제문제: planner가 policy step을 계획하고, 검색은 policy_routes.json대로 환불 정책만
+    assert "policy" in ActionPlanner().plan("결제문제", "neutral", 0.1)
+
+    policy_dir = os.path.join(os.path.dirname(RULES_PATH), "..", "policies")
+    docs = []
+    for name in sorted(os.listdir(policy_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(policy_dir, name), encoding="utf-8") as f:
+                docs.append(Doc(f.read(), name))
+    results = make_retriever(docs=docs, k=3).search("결제가 두 번 됐어요 환불되나요", intent="결제문제")
+    assert results and {doc.metadata["source"] for doc in results} == {"refund_policy_summary.txt"}
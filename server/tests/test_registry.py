@@ -0,0 +1,51 @@
+# server/tests/test_registry.py
+from registry import ComponentRegistry
+
+
+def make_registry(calls):
+    registry = ComponentRegistry()
+
+    def factory(name):
+        def build():
+            calls.append(name)
+            return {"name": name, "build": calls.count(name)}
+        return build
+
+    registry.register("model", factory("model"), preload=True)
+    registry.register("classifier", factory("classifier"), depends=("model",))
+    registry.register("client", factory("client"))
+    return registry
+
+
+def test_preload_only_loads_preload_components():
+    calls = []
+    registry = make_registry(calls)
+    registry.preload()
+    assert calls == ["model"]
+    assert not registry.is_ready()
+
+    registry.load_all()
+    assert sorted(calls) == ["classifier", "client", "model"]
+    assert registry.is_ready()
+
+
+def test_get_loads_once():
+    calls = []
+    registry = make_registry(calls)
+    first = registry.get("client")
+    assert registry.get("client") is first
+    assert calls == ["client"]
+
+
+def test_reload_bumps_generation_of_dependents():
+    calls = []
+    registry = make_registry(calls)
+    registry.load_all()
+    before = {name: registry.generation(name) for name in ("model", "classifier", "client")}
+
+    registry.reload("model", reason="test")
+    after = {name: registry.generation(name) for name in ("model", "classifier", "client")}
+    # classifier는 model에 의존하므로 같이 다시 만들어짐 (캐시 무효화 기준)
+    assert after["model"] != before["model"]
+    assert after["classifier"] != before["classifier"]
+    assert after["client"] == before["client"]
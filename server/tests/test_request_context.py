@@ -0,0 +1,93 @@
+# server/tests/test_request_context.py
+import asyncio
+
+import pytest
+
+from agents.request_context import RequestContext
+
+
+def test_acompute_runs_factory_once_for_concurrent_waiters():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "calm"
+
+    async def run():
+        ctx = RequestContext()
+        ctx.start("calm", work)
+        results = await asyncio.gather(ctx.acompute("calm", work), ctx.acompute("calm", work))
+        assert results == ["calm", "calm"]
+        assert ctx.get("calm") == "calm"
+
+    asyncio.run(run())
+    assert calls == [1]
+
+
+def test_waiter_timeout_does_not_cancel_shared_task():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "policy"
+
+    async def run():
+        ctx = RequestContext()
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(ctx.acompute("policy", work), 0.01)
+        # 다른 stage는 같은 Task 결과를 그대로 받음
+        assert await ctx.acompute("policy", work) == "policy"
+
+    asyncio.run(run())
+
+
+def test_failed_task_is_recomputed():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def run():
+        ctx = RequestContext()
+        with pytest.raises(RuntimeError):
+            await ctx.acompute("intent", flaky)
+        assert "intent" not in ctx
+        assert await ctx.acompute("intent", flaky) == "ok"
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_cancelled_task_is_recomputed():
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "ok"
+
+    async def run():
+        ctx = RequestContext()
+        task = ctx.start("calm", slow)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await ctx.acompute("calm", slow)
+        assert await ctx.acompute("calm", fast) == "ok"
+
+    asyncio.run(run())
+
+
+def test_cancel_pending_stops_unfinished_tasks():
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def run():
+        ctx = RequestContext()
+        task = ctx.start("guide", slow)
+        await asyncio.sleep(0)
+        ctx.cancel_pending()
+        await asyncio.sleep(0)
+        assert task.cancelled()
+
+    asyncio.run(run())
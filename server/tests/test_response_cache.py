@@ -0,0 +1,97 @@
+# server/tests/test_response_cache.py
+import asyncio
+
+import numpy as np
+
+from agents import response_cache
+from agents.response_cache import ResponseCache, emotion_bucket, normalize_text
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEmbeddings:
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    async def aembed_query(self, text):
+        return self.vectors[text]
+
+
+def test_normalize_text_ignores_spaces_and_punctuation():
+    assert normalize_text("배송이 언제 오나요?") == normalize_text("배송이언제 오나요")
+    assert emotion_bucket("anger", 0.61) == "anger:high"
+    assert emotion_bucket("anger", 0.2) == "anger:low"
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResponseCache("test", max_size=2)
+    cache.set(("a",), 1)
+    cache.set(("b",), 2)
+    assert cache.get(("a",)) == 1   # a가 최근 사용
+    cache.set(("c",), 3)
+
+    assert cache.get(("b",)) is None
+    assert cache.get(("a",)) == 1 and cache.get(("c",)) == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(response_cache.time, "monotonic", clock)
+    cache = ResponseCache("test", ttl_seconds=10)
+    cache.set(("a",), 1)
+
+    clock.now += 9
+    assert cache.get(("a",)) == 1
+    clock.now += 2
+    assert cache.get(("a",)) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_version_change_invalidates_everything():
+    cache = ResponseCache("test")
+    cache.check_version("v1")
+    cache.set(("a",), 1)
+    cache.check_version("v1")
+    assert cache.get(("a",)) == 1
+
+    cache.check_version("v2")
+    assert cache.get(("a",)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_stats_hit_ratio():
+    cache = ResponseCache("test")
+    cache.set(("a",), 1)
+    cache.get(("a",))
+    cache.get(("b",))
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_semantic_lookup_stays_in_scope():
+    vectors = {
+        "환불 언제 돼요": np.array([1.0, 0.0]),
+        "환불 언제 되나요": np.array([0.99, 0.05]),
+        "배송 언제 와요": np.array([0.0, 1.0]),
+    }
+    embeddings = FakeEmbeddings(vectors)
+    cache = ResponseCache("test", embeddings_factory=lambda: embeddings, similarity_threshold=0.95)
+
+    async def run():
+        _, vector = await cache.alookup(("환불언제돼요", "환불요청"), "환불 언제 돼요")
+        cache.set(("환불언제돼요", "환불요청"), "answer", vector)
+
+        hit, _ = await cache.alookup(("환불언제되나요", "환불요청"), "환불 언제 되나요")
+        other_scope, _ = await cache.alookup(("환불언제되나요", "배송문의"), "환불 언제 되나요")
+        far, _ = await cache.alookup(("배송언제와요", "환불요청"), "배송 언제 와요")
+        return hit, other_scope, far
+
+    assert asyncio.run(run()) == ("answer", None, None)
+    assert cache.stats()["semantic_hits"] == 1
@@ -0,0 +1,61 @@
+# server/tests/test_session_store.py
+import time
+import asyncio
+import threading
+
+from agents.emotion_smoothing import EmotionSmoother
+from agents.session_store import MemorySessionStore, SQLiteSessionStore
+
+
+def test_sqlite_append_keeps_window(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"))
+    for score in [0.1, 0.2, 0.3, 0.4]:
+        history = store.append("s1", score, window=3)
+    assert [round(v, 3) for v in history] == [0.2, 0.3, 0.4]
+
+
+def test_sqlite_expired_session_is_ignored_then_cleaned(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), idle_ttl=0.05)
+    store.append("old", 0.9, window=3)
+    time.sleep(0.1)
+
+    # 만료된 행은 cleanup 전이라도 이어 붙이지 않음
+    assert [round(v, 3) for v in store.append("old", 0.1, window=3)] == [0.1]
+    time.sleep(0.1)
+    store.append("new", 0.5, window=3)
+    store.cleanup()
+    assert len(store) == 1
+
+
+def test_sqlite_cleanup_trims_to_max_size(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), max_size=2)
+    for i in range(4):
+        store.append(f"s{i}", 0.5, window=3)
+    assert len(store) == 4
+    store.cleanup()
+    assert len(store) == 2
+
+
+def test_aadd_score_runs_sqlite_off_event_loop(tmp_path):
+    smoother = EmotionSmoother(window=2, store=SQLiteSessionStore(str(tmp_path / "sessions.db")))
+    threads = []
+
+    original = smoother.store.append
+
+    def append(*args):
+        threads.append(threading.current_thread())
+        return original(*args)
+
+    smoother.store.append = append
+
+    async def run():
+        await smoother.aadd_score("s1", 0.2)
+        return await smoother.aadd_score("s1", 0.4)
+
+    assert abs(asyncio.run(run()) - 0.3) < 1e-6
+    assert threading.main_thread() not in threads
+
+
+def test_memory_store_stays_on_event_loop():
+    smoother = EmotionSmoother(window=3, store=MemorySessionStore())
+    assert abs(asyncio.run(smoother.aadd_score("s1", 0.6)) - 0.6) < 1e-6
@@ -0,0 +1,133 @@
+# server/tests/test_singleflight.py
+import asyncio
+
+import pytest
+
+from agents import singleflight
+from agents.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_task():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "guide"
+
+    async def run():
+        sf = SingleFlight("test")
+        results = await asyncio.gather(*(sf.do("k", work) for _ in range(3)))
+        assert results == ["guide"] * 3
+        assert (sf.leaders, sf.followers) == (1, 2)
+        assert sf.stats()["in_flight"] == 0
+        [shared] = sf.stats()["top_shared_keys"]
+        assert shared["kind"] == "test" and shared["followers"] == 2
+
+    asyncio.run(run())
+    assert calls == [1]
+
+
+def test_stats_do_not_expose_raw_keys():
+    async def work():
+        await asyncio.sleep(0.01)
+
+    async def run():
+        sf = SingleFlight("guide")
+        key = ("system prompt", "환불해 주세요", "정책 내용")
+        await asyncio.gather(sf.do(key, work), sf.do(key, work))
+        return sf.stats()
+
+    stats = asyncio.run(run())
+    [shared] = stats["top_shared_keys"]
+    assert len(shared["key"]) == 12
+    assert "환불" not in str(stats) and "prompt" not in str(stats)
+
+
+def test_completed_result_is_not_reused():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        return len(calls)
+
+    async def run():
+        sf = SingleFlight("test")
+        return await sf.do("k", work), await sf.do("k", work)
+
+    assert asyncio.run(run()) == (1, 2)
+
+
+def test_exception_is_shared_then_retried():
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        await asyncio.sleep(0.01)
+        if len(attempts) == 1:
+            raise RuntimeError("boom")
+        return "ok"
+
+    async def run():
+        sf = SingleFlight("test")
+        results = await asyncio.gather(sf.do("k", flaky), sf.do("k", flaky), return_exceptions=True)
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert await sf.do("k", flaky) == "ok"
+
+    asyncio.run(run())
+    assert len(attempts) == 2
+
+
+def test_one_cancelled_waiter_keeps_shared_task():
+    async def work():
+        await asyncio.sleep(0.05)
+        return "calm"
+
+    async def run():
+        sf = SingleFlight("test")
+        leader = asyncio.ensure_future(sf.do("k", work))
+        follower = asyncio.ensure_future(sf.do("k", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        assert await follower == "calm"
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+
+    asyncio.run(run())
+
+
+def test_all_waiters_cancelled_cancels_shared_task():
+    async def run():
+        finished = []
+
+        async def work():
+            await asyncio.sleep(0.05)
+            finished.append(1)
+
+        sf = SingleFlight("test")
+        waiters = [asyncio.ensure_future(sf.do("k", work)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0.1)
+        assert finished == []
+        assert sf.stats()["in_flight"] == 0
+
+    asyncio.run(run())
+
+
+def test_disabled_calls_factory_every_time(monkeypatch):
+    monkeypatch.setattr(singleflight, "SINGLEFLIGHT_ENABLED", False)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+
+    async def run():
+        sf = SingleFlight("test")
+        await asyncio.gather(sf.do("k", work), sf.do("k", work))
+
+    asyncio.run(run())
+    assert calls == [1, 1]
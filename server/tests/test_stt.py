@@ -0,0 +1,27 @@
+# server/tests/test_stt.py
+import pytest
+
+from agents import stt
+
+
+def test_stub_backend_needs_no_dependency():
+    stt.check_stt_backend("stub")
+
+
+def test_unknown_backend_is_unavailable():
+    with pytest.raises(stt.STTUnavailable):
+        stt.check_stt_backend("nope")
+
+
+def test_missing_faster_whisper_is_unavailable(monkeypatch):
+    monkeypatch.setattr(stt.importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(stt.STTUnavailable):
+        stt.check_stt_backend("whisper")
+
+
+def test_get_stt_pool_checks_before_creating(monkeypatch):
+    monkeypatch.setattr(stt, "_pool", None)
+    monkeypatch.setattr(stt.check_stt_backend, "__defaults__", ("nope",))
+    with pytest.raises(stt.STTUnavailable):
+        stt.get_stt_pool()
+    assert stt._pool is None